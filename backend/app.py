@@ -1,10 +1,15 @@
 # ==================== app.py (COMPLETE WITH DATADOG - AI UNTOUCHED) ====================
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, send_file, Response
 import os
+import queue
+import threading
 from werkzeug.utils import secure_filename
+from werkzeug.exceptions import RequestEntityTooLarge
 from datetime import datetime
 import json
 import re
+import shutil
+import uuid
 from config import Config
 from flask_cors import CORS
 
@@ -17,21 +22,29 @@ gauge("govdoc.app.startup", 1, tags=["version:1.0", "env:production"])
 print("🎯 GovDoc Genie started with Datadog observability")
 
 # Import modules (AI logic untouched)
-from modules.document_processor import DocumentProcessor
-from modules.compliance_checker import ComplianceChecker
-from modules.enhanced_ai_analyzer import EnhancedAIAnalyzer
-from modules.evidence_tracker import EvidenceTracker
-from modules.report_generator import ReportGenerator
+from modules.component_registry import get_registry
+from modules.job_store import JobStore, JobRunner, check_webhook_url
+from modules.upload_ingest import IngestRequest, UploadRejected, commit_upload
+from modules.text_data import TextData
+from modules.registry_check import RegistryCheck
 
 # Initialize Flask app
 app = Flask(__name__)
 app.config.from_object(Config)
+# Multipart file parts stream to disk with size, hash and type checks
+app.request_class = IngestRequest
 CORS(app, resources={r"/*": {"origins": "*"}})
 
 # Create necessary directories
-for folder in [Config.UPLOAD_FOLDER, Config.OUTPUT_FOLDER]:
+for folder in [Config.UPLOAD_FOLDER, Config.OUTPUT_FOLDER, Config.REGISTRY_CHECK_FOLDER]:
     os.makedirs(folder, exist_ok=True)
 
+# Shared components are built once per worker, not once per request
+components = get_registry()
+if Config.WARM_COMPONENTS_ON_STARTUP and __name__ != '__mp_main__':
+    # spawned extraction workers re-import this module as __mp_main__
+    components.warm_up()
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in Config.ALLOWED_EXTENSIONS
 
@@ -44,6 +57,9 @@ def home():
         "observability": "Datadog enabled",
         "endpoints": {
             "analyze": "/analyze",
+            "analyze_stream": "/analyze/stream",
+            "jobs": "/jobs",
+            "job_status": "/jobs/<job_id>",
             "system_status": "/system-status",
             "test_patterns": "/test-patterns",
             "debug_document": "/debug-document"
@@ -52,6 +68,19 @@ def home():
 
 # ==================== HELPER FUNCTIONS (AI UNTOUCHED) ====================
 
+def _verify_registry(kind, number, validation):
+    """Optional registry tier: a well-formed number must also be live in the registry snapshot"""
+    snapshot = components.registry_snapshot
+    if snapshot is None or not validation.get('valid'):
+        return
+    registry = snapshot.verify(kind, validation.get('full_number', number))
+    validation['registry'] = registry
+    increment("govdoc.registry_snapshot.lookup", tags=[f"kind:{kind}", f"status:{registry['status']}"])
+    print(f"\n    📒 REGISTRY SNAPSHOT ({registry['as_of']}): {registry['status'].upper()}")
+    if not registry['valid']:
+        validation['valid'] = False
+        validation['error'] = registry['error']
+
 def _process_gst(processor, checker, tracker, text_data, extracted_data, validation_results, filepath):
     """Process GST document with detailed debugging"""
     print(f"\n    🔍 PROCESSING GST DOCUMENT...")
@@ -64,6 +93,7 @@ def _process_gst(processor, checker, tracker, text_data, extracted_data, validat
         gst_num = gst_results[0]['value']
         extracted_data['gst_number'] = gst_num
         validation = checker.validate_gst(gst_num)
+        _verify_registry('gst', gst_num, validation)
         validation_results['gst_number'] = validation
         
         if validation.get('valid'):
@@ -102,6 +132,7 @@ def _process_pan(processor, checker, tracker, text_data, extracted_data, validat
         pan_num = pan_results[0]['value']
         extracted_data['pan_number'] = pan_num
         validation = checker.validate_pan(pan_num)
+        _verify_registry('pan', pan_num, validation)
         validation_results['pan_number'] = validation
         
         if validation.get('valid'):
@@ -138,6 +169,7 @@ def _process_udyam(processor, checker, tracker, text_data, extracted_data, valid
         udyam_num = udyam_results[0]['value']
         extracted_data['udyam_number'] = udyam_num
         validation = checker.validate_udyam(udyam_num)
+        _verify_registry('udyam', udyam_num, validation)
         validation_results['udyam_number'] = validation
         
         if validation.get('valid'):
@@ -259,6 +291,32 @@ def _perform_cross_validation(checker, tracker, extracted_data, validation_resul
             print(f"\n    ℹ️ NAME CONSISTENCY: ONLY ONE NAME FOUND")
     else:
         print(f"\n    ❌ NAME CONSISTENCY: NO COMPANY NAMES FOUND")
+    
+    vendor_index = components.vendor_index
+    if vendor_index is not None and extracted_data.get('company_name'):
+        vendor_match = _match_vendor(vendor_index, extracted_data['company_name'])
+        validation_results['vendor_match'] = vendor_match
+        if vendor_match['matched']:
+            print(f"\n    ✅ VENDOR MASTER: {vendor_match['name']} ({vendor_match['vendor_id']})")
+            print(f"       Score: {vendor_match['score']:.1%}")
+        else:
+            print(f"\n    ⚠️ VENDOR MASTER: NO REGISTERED VENDOR MATCHES")
+            print(f"       Best score: {vendor_match['score']:.1%}")
+
+def _match_vendor(vendor_index, name, k=None):
+    """Top vendor-master candidates for a company name; matched if the best clears VENDOR_MATCH_MIN_SCORE"""
+    candidates = vendor_index.top_k(name, k)
+    best = candidates[0] if candidates else None
+    matched = best is not None and best['score'] >= Config.VENDOR_MATCH_MIN_SCORE
+    increment("govdoc.vendor_match.lookup", tags=[f"matched:{str(matched).lower()}"])
+    return {
+        'query': name,
+        'matched': matched,
+        'vendor_id': best['vendor_id'] if matched else None,
+        'name': best['name'] if matched else None,
+        'score': best['score'] if best else 0.0,
+        'candidates': candidates
+    }
 
 def _generate_recommendations(detailed_errors, extracted_data):
     """Generate specific recommendations based on errors"""
@@ -290,267 +348,609 @@ def _generate_recommendations(detailed_errors, extracted_data):
     
     return recommendations
 
-# ==================== MAIN ROUTES ====================
+# ==================== ANALYSIS PIPELINE ====================
 
-@app.route('/analyze', methods=['POST'])
-def analyze_documents():
-    """Main analysis with Datadog metrics (AI logic untouched)"""
+def _uploaded_parts():
+    """request.files, with oversized bodies reported as UploadRejected"""
     try:
-        print(f"\n{'='*80}")
-        print("🔥 ACCURATE DOCUMENT ANALYSIS REQUEST")
-        print(f"{'='*80}")
+        return request.files
+    except RequestEntityTooLarge:
+        raise UploadRejected(
+            f'Request exceeds {Config.MAX_REQUEST_SIZE // (1024 * 1024)}MB upload limit',
+            status_code=413, reason='request_too_large'
+        )
+
+def _save_uploaded_documents():
+    """
+    Save the gst/pan/udyam/quotation parts of the current request.
+    
+    Returns ({doc_type: filepath}, {doc_type: sha256}); raises UploadRejected.
+    """
+    files = {}
+    digests = {}
+    parts = _uploaded_parts()
+    for doc_type in ['gst', 'pan', 'udyam', 'quotation']:
+        file_key = f'{doc_type}_file'
+        if file_key in parts:
+            file = parts[file_key]
+            if file and file.filename and allowed_file(file.filename):
+                filename = secure_filename(file.filename)
+                filepath = os.path.join(app.config['UPLOAD_FOLDER'], f"{int(datetime.now().timestamp())}_{filename}")
+                upload = commit_upload(file, filepath)
+                files[doc_type] = filepath
+                digests[doc_type] = upload['sha256']
+                print(f"✅ Uploaded {doc_type}: {filename} ({upload['size']} bytes)")
+                
+                # 🎯 DATADOG: Track document upload
+                increment("govdoc.document.uploaded", tags=[f"type:{doc_type}"])
+    return files, digests
+
+def _upload_rejected_response(e):
+    print(f"⛔ Upload rejected ({e.reason}): {e}")
+    increment("govdoc.upload.rejected", tags=[f"reason:{e.reason}"])
+    return jsonify({
+        'success': False,
+        'error': str(e),
+        'reason': e.reason
+    }), e.status_code
+
+def _no_files_response():
+    increment("govdoc.analysis.error", tags=["reason:no_files"])
+    return jsonify({
+        'success': False,
+        'error': 'No documents uploaded',
+        'message': 'Please upload at least one document for analysis'
+    }), 400
+
+def _analysis_error_payload(e):
+    """Log an analysis failure and build the client-facing error body"""
+    print(f"\n{'='*80}")
+    print(f"❌ ANALYSIS ERROR")
+    print(f"{'='*80}")
+    print(f"Error: {str(e)}")
+    import traceback
+    traceback.print_exc()
+    print(f"{'='*80}")
+    
+    # 🎯 DATADOG: Track errors
+    increment("govdoc.analysis.error", tags=["reason:exception"])
+    
+    return {
+        'success': False,
+        'error': str(e),
+        'message': 'Analysis failed. Please check document format and try again.',
+        'common_fixes': [
+            'Ensure documents are not password-protected',
+            'Use searchable PDFs (not image-only)',
+            f'Check file size (<{Config.MAX_FILE_SIZE // (1024 * 1024)}MB)',
+            'Verify document clarity'
+        ]
+    }
+
+def _no_emit(event, data):
+    pass
+
+def _extraction_summary(doc_type, text_data):
+    """Per-page element counts and OCR confidence for the document_extracted event"""
+    text_data = TextData.of(text_data)
+    pages = {}
+    for i in range(len(text_data)):
+        page_num = text_data.page(i)
+        page = pages.setdefault(page_num, {'page': page_num, 'elements': 0, 'confidence_sum': 0.0, 'types': set(), 'dpi': None})
+        page['elements'] += 1
+        page['confidence_sum'] += text_data.confidence(i)
+        page['types'].add(text_data.type(i))
+        page['dpi'] = page['dpi'] or text_data.dpi(i)
+    
+    return {
+        'doc_type': doc_type,
+        'elements': len(text_data),
+        'pages': [
+            {
+                'page': page['page'],
+                'elements': page['elements'],
+                'mean_confidence': round(page['confidence_sum'] / page['elements'], 4),
+                'types': sorted(page['types']),
+                'ocr_dpi': page['dpi']
+            }
+            for page in sorted(pages.values(), key=lambda p: p['page'])
+        ]
+    }
+
+def _run_analysis(files, emit=None, digests=None):
+    """
+    Run extraction, validation and AI analysis over saved documents ({doc_type: filepath}).
+    
+    emit: optional callable(event, data) receiving stage events as they finish
+          (used by /analyze/stream).
+    digests: optional {doc_type: sha256} computed while the upload streamed in.
+    """
+    emit = emit or _no_emit
+    
+    # Shared warm processors (AI untouched), fresh tracker per request
+    processor = components.processor
+    checker = components.checker
+    analyzer = components.analyzer
+    tracker = components.new_tracker(
+        listener=lambda kind, field, entry: emit(kind, {'field': field, **entry})
+    )
+    
+    print(f"\n🔍 PROCESSING {len(files)} UPLOADED DOCUMENTS")
+    
+    # 🎯 DATADOG: Track document count
+    gauge("govdoc.documents.count", len(files))
+    
+    # Process each document (AI untouched)
+    document_texts = []
+    extracted_data = {}
+    validation_results = {}
+    
+    # Extract all documents concurrently, then run handlers in upload order
+    extracted_texts = components.extraction_stage.extract_all(
+        files, processor,
+        on_result=lambda doc_type, text_data: emit('document_extracted', _extraction_summary(doc_type, text_data)),
+        digests=digests
+    )
+    
+    for doc_type, filepath in files.items():
+        print(f"\n📄 [{doc_type.upper()}] Processing: {os.path.basename(filepath)}")
+        print(f"{'-'*60}")
         
-        # 🎯 DATADOG: Track analysis request
-        increment("govdoc.analysis.request", tags=["endpoint:analyze"])
+        text_data = extracted_texts[doc_type]
         
-        # Initialize all processors (AI untouched)
-        processor = DocumentProcessor()
-        checker = ComplianceChecker()
-        analyzer = EnhancedAIAnalyzer()
-        tracker = EvidenceTracker()
-        
-        # Get uploaded files
-        files = {}
-        for doc_type in ['gst', 'pan', 'udyam', 'quotation']:
-            file_key = f'{doc_type}_file'
-            if file_key in request.files:
-                file = request.files[file_key]
-                if file and file.filename and allowed_file(file.filename):
-                    filename = secure_filename(file.filename)
-                    filepath = os.path.join(app.config['UPLOAD_FOLDER'], f"{int(datetime.now().timestamp())}_{filename}")
-                    file.save(filepath)
-                    files[doc_type] = filepath
-                    print(f"✅ Uploaded {doc_type}: {filename}")
-                    
-                    # 🎯 DATADOG: Track document upload
-                    increment("govdoc.document.uploaded", tags=[f"type:{doc_type}"])
+        if text_data:
+            document_texts.append(text_data)
+            
+            if 'gst' in doc_type:
+                _process_gst(processor, checker, tracker, text_data, extracted_data, validation_results, filepath)
+            elif 'pan' in doc_type:
+                _process_pan(processor, checker, tracker, text_data, extracted_data, validation_results, filepath)
+            elif 'udyam' in doc_type:
+                _process_udyam(processor, checker, tracker, text_data, extracted_data, validation_results, filepath)
+            elif 'quotation' in doc_type:
+                _process_quotation(processor, checker, tracker, text_data, extracted_data, validation_results, filepath)
+        else:
+            print(f"\n    ❌ FAILED TO EXTRACT TEXT")
+            print(f"       File might be corrupted, password-protected, or image-only.")
+            increment("govdoc.extraction.failed", tags=[f"type:{doc_type}"])
         
-        if not files:
-            increment("govdoc.analysis.error", tags=["reason:no_files"])
-            return jsonify({
-                'success': False,
-                'error': 'No documents uploaded',
-                'message': 'Please upload at least one document for analysis'
-            }), 400
+        emit('document_processed', {
+            'doc_type': doc_type,
+            'text_extracted': bool(text_data),
+            'extracted_data': extracted_data
+        })
+    
+    print(f"\n{'='*80}")
+    print("📊 EXTRACTION SUMMARY")
+    print(f"{'='*80}")
+    
+    print(f"\n✅ EXTRACTED DATA:")
+    for key, value in extracted_data.items():
+        if isinstance(value, list):
+            print(f"   {key}:")
+            for item in value[:3]:
+                print(f"     • {str(item)[:80]}...")
+        else:
+            print(f"   {key}: {str(value)[:80]}...")
+    
+    print(f"\n❌ MISSING REQUIRED DATA:")
+    required = ['gst_number', 'pan_number', 'udyam_number', 'company_name', 'signature', 'quotation_date']
+    for req in required:
+        if req not in extracted_data:
+            print(f"   • {req.replace('_', ' ').title()}")
+    
+    all_text_data = TextData.concat(document_texts)
+    
+    # Cross-document validation
+    print(f"\n{'='*80}")
+    print("🔄 CROSS-DOCUMENT VALIDATION")
+    print(f"{'='*80}")
+    _perform_cross_validation(checker, tracker, extracted_data, validation_results)
+    
+    # Calculate completeness
+    completeness = checker.calculate_completeness_score(extracted_data)
+    validation_results['completeness'] = completeness
+    print(f"\n📈 COMPLETENESS SCORE: {completeness.get('percentage', '0%')}")
+    if completeness.get('missing_fields'):
+        print(f"   Missing: {', '.join(completeness['missing_fields'])}")
+    
+    # 🎯 DATADOG: Track completeness score
+    gauge("govdoc.completeness.score", completeness.get('score', 0))
+    
+    emit('cross_validation', {
+        key: validation_results[key]
+        for key in ['gst_pan_consistency', 'name_consistency', 'vendor_match', 'completeness']
+        if key in validation_results
+    })
+    
+    # Everything below only adds the model decision; the data is final here
+    emit('extracted', {
+        'extracted_data': extracted_data,
+        'validation_results': validation_results,
+        'compliance_score': completeness.get('score', 0)
+    })
+    
+    # AI ANALYSIS (COMPLETELY UNTOUCHED)
+    print(f"\n{'='*80}")
+    print("🧠 ACCURATE AI ANALYSIS")
+    print(f"{'='*80}")
+    
+    if not extracted_data:
+        print(f"\n    ⚠️ NO DATA EXTRACTED FROM DOCUMENTS")
+        ai_result = {
+            'success': True,
+            'analysis': {
+                'decision': 'REJECT',
+                'confidence': 0.9999,
+                'reasons': [
+                    'No document data could be extracted',
+                    'Files might be corrupted, password-protected, or image-only',
+                    'Please upload searchable PDFs or clear images'
+                ],
+                'summary': '❌ FAILED TO EXTRACT ANY DATA: Documents appear to be empty, corrupted, or unreadable',
+                'analysis_source': 'fallback',
+                'timestamp': datetime.now().isoformat()
+            }
+        }
+        emit('model_decision', ai_result['analysis'])
+    else:
+        # AI analysis (untouched)
+        ai_result = analyzer.analyze_with_cross_check(
+            extracted_data, 
+            validation_results, 
+            all_text_data,
+            progress=emit
+        )
+    
+    if ai_result.get('success'):
+        decision = ai_result['analysis']['decision']
+        confidence = ai_result['analysis'].get('confidence', 0.0)
+        reasons = ai_result['analysis'].get('reasons', [])
         
-        print(f"\n🔍 PROCESSING {len(files)} UPLOADED DOCUMENTS")
+        print(f"\n    ✅ FINAL DECISION: {decision}")
+        print(f"       Confidence: {confidence:.4%}")
+        print(f"       Source: {ai_result['analysis'].get('analysis_source', 'unknown')}")
         
-        # 🎯 DATADOG: Track document count
-        gauge("govdoc.documents.count", len(files))
+        # 🎯 DATADOG: Track AI decision
+        increment("govdoc.ai.decision", tags=[f"decision:{decision}"])
+        gauge("govdoc.ai.confidence", confidence)
         
-        # Process each document (AI untouched)
-        all_text_data = []
-        extracted_data = {}
-        validation_results = {}
+        print(f"\n    📋 DETAILED REASONS:")
+        for reason in reasons:
+            print(f"       {reason}")
         
-        for doc_type, filepath in files.items():
-            print(f"\n📄 [{doc_type.upper()}] Processing: {os.path.basename(filepath)}")
-            print(f"{'-'*60}")
-            
-            text_data = processor.extract_all_text(filepath)
-            
-            if text_data:
-                all_text_data.extend(text_data)
-                
-                if 'gst' in doc_type:
-                    _process_gst(processor, checker, tracker, text_data, extracted_data, validation_results, filepath)
-                elif 'pan' in doc_type:
-                    _process_pan(processor, checker, tracker, text_data, extracted_data, validation_results, filepath)
-                elif 'udyam' in doc_type:
-                    _process_udyam(processor, checker, tracker, text_data, extracted_data, validation_results, filepath)
-                elif 'quotation' in doc_type:
-                    _process_quotation(processor, checker, tracker, text_data, extracted_data, validation_results, filepath)
-            else:
-                print(f"\n    ❌ FAILED TO EXTRACT TEXT")
-                print(f"       File might be corrupted, password-protected, or image-only.")
-                increment("govdoc.extraction.failed", tags=[f"type:{doc_type}"])
+        detailed_errors = []
+        if 'gst_number' not in extracted_data:
+            detailed_errors.append({
+                'field': 'gst_number',
+                'error': 'GST certificate number not found',
+                'expected_format': '27ABCDE1234F1Z5 (15 characters)',
+                'help': 'Make sure GSTIN is clearly visible in the document'
+            })
+        if 'pan_number' not in extracted_data:
+            detailed_errors.append({
+                'field': 'pan_number',
+                'error': 'PAN card number not found',
+                'expected_format': 'ABCDE1234F (10 characters)',
+                'help': 'PAN should be in format: 5 letters + 4 digits + 1 letter'
+            })
+        if 'udyam_number' not in extracted_data:
+            detailed_errors.append({
+                'field': 'udyam_number',
+                'error': 'Udyam registration number not found',
+                'expected_format': 'UDYAM-MH-01-1234567',
+                'help': 'Udyam number format: UDYAM-[State]-[District]-[7 digits]'
+            })
+        if 'signature' not in extracted_data:
+            detailed_errors.append({
+                'field': 'signature',
+                'error': 'Signature not found on quotation',
+                'help': 'Make sure quotation has "Signature:", "Authorized Signatory", or "Signed" text'
+            })
         
-        print(f"\n{'='*80}")
-        print("📊 EXTRACTION SUMMARY")
-        print(f"{'='*80}")
+        # 🎯 DATADOG: Track error count
+        gauge("govdoc.errors.count", len(detailed_errors))
         
-        print(f"\n✅ EXTRACTED DATA:")
-        for key, value in extracted_data.items():
-            if isinstance(value, list):
-                print(f"   {key}:")
-                for item in value[:3]:
-                    print(f"     • {str(item)[:80]}...")
-            else:
-                print(f"   {key}: {str(value)[:80]}...")
+        recommendations = _generate_recommendations(detailed_errors, extracted_data)
         
-        print(f"\n❌ MISSING REQUIRED DATA:")
-        required = ['gst_number', 'pan_number', 'udyam_number', 'company_name', 'signature', 'quotation_date']
-        for req in required:
-            if req not in extracted_data:
-                print(f"   • {req.replace('_', ' ').title()}")
+        response = {
+            'success': True,
+            'analysis': ai_result['analysis'],
+            'extracted_data': extracted_data,
+            'validation_results': validation_results,
+            'detailed_errors': detailed_errors,
+            'compliance_score': completeness.get('score', 0),
+            'evidence_report': tracker.generate_evidence_report(),
+            'document_count': len(files),
+            'timestamp': datetime.now().isoformat(),
+            'accuracy_guarantee': '99.99%',
+            'extraction_method': 'Hybrid (Text + OCR for images)',
+            'recommendations': recommendations,
+            'patterns_used': {
+                'gst': Config.GST_PATTERN,
+                'pan': Config.PAN_PATTERN,
+                'udyam': Config.UDYAM_PATTERN,
+                'company_name': Config.COMPANY_NAME_PATTERN,
+                'date': Config.QUOTATION_DATE_PATTERN,
+                'price': Config.PRICE_PATTERN,
+                'signature': Config.SIGNATURE_PATTERN
+            }
+        }
         
-        # Cross-document validation
         print(f"\n{'='*80}")
-        print("🔄 CROSS-DOCUMENT VALIDATION")
+        print(f"🎯 ANALYSIS COMPLETE - 99.99% ACCURACY")
+        print(f"{'='*80}")
+        print(f"   Decision: {decision}")
+        print(f"   Confidence: {confidence:.4%}")
+        print(f"   Score: {completeness.get('score', 0):.1f}/100")
+        print(f"   Documents processed: {len(files)}")
         print(f"{'='*80}")
-        _perform_cross_validation(checker, tracker, extracted_data, validation_results)
-        
-        # Calculate completeness
-        completeness = checker.calculate_completeness_score(extracted_data)
-        validation_results['completeness'] = completeness
-        print(f"\n📈 COMPLETENESS SCORE: {completeness.get('percentage', '0%')}")
-        if completeness.get('missing_fields'):
-            print(f"   Missing: {', '.join(completeness['missing_fields'])}")
         
-        # 🎯 DATADOG: Track completeness score
-        gauge("govdoc.completeness.score", completeness.get('score', 0))
+        # 🎯 DATADOG: Track successful analysis
+        increment("govdoc.analysis.success")
         
-        # AI ANALYSIS (COMPLETELY UNTOUCHED)
+        return response
+    else:
+        raise Exception("AI analysis failed")
+
+def _run_analysis_job(files):
+    """JobRunner handler: same pipeline as /analyze, failure body attached to the exception"""
+    try:
+        return _run_analysis(files)
+    except Exception as e:
+        e.payload = _analysis_error_payload(e)
+        raise
+
+# Background jobs: every app worker drains the shared SQLite queue
+job_store = JobStore()
+job_runner = JobRunner(job_store, _run_analysis_job)
+if __name__ != '__mp_main__':
+    job_runner.start()
+
+# ==================== MAIN ROUTES ====================
+
+@app.route('/analyze', methods=['POST'])
+def analyze_documents():
+    """Main analysis with Datadog metrics (AI logic untouched)"""
+    try:
         print(f"\n{'='*80}")
-        print("🧠 ACCURATE AI ANALYSIS")
+        print("🔥 ACCURATE DOCUMENT ANALYSIS REQUEST")
         print(f"{'='*80}")
         
-        if not extracted_data:
-            print(f"\n    ⚠️ NO DATA EXTRACTED FROM DOCUMENTS")
-            ai_result = {
-                'success': True,
-                'analysis': {
-                    'decision': 'REJECT',
-                    'confidence': 0.9999,
-                    'reasons': [
-                        'No document data could be extracted',
-                        'Files might be corrupted, password-protected, or image-only',
-                        'Please upload searchable PDFs or clear images'
-                    ],
-                    'summary': '❌ FAILED TO EXTRACT ANY DATA: Documents appear to be empty, corrupted, or unreadable',
-                    'analysis_source': 'fallback',
-                    'timestamp': datetime.now().isoformat()
-                }
-            }
-        else:
-            # AI analysis (untouched)
-            ai_result = analyzer.analyze_with_cross_check(
-                extracted_data, 
-                validation_results, 
-                all_text_data
-            )
-        
-        if ai_result.get('success'):
-            decision = ai_result['analysis']['decision']
-            confidence = ai_result['analysis'].get('confidence', 0.0)
-            reasons = ai_result['analysis'].get('reasons', [])
-            
-            print(f"\n    ✅ FINAL DECISION: {decision}")
-            print(f"       Confidence: {confidence:.4%}")
-            print(f"       Source: {ai_result['analysis'].get('analysis_source', 'unknown')}")
-            
-            # 🎯 DATADOG: Track AI decision
-            increment("govdoc.ai.decision", tags=[f"decision:{decision}"])
-            gauge("govdoc.ai.confidence", confidence)
-            
-            print(f"\n    📋 DETAILED REASONS:")
-            for reason in reasons:
-                print(f"       {reason}")
-            
-            detailed_errors = []
-            if 'gst_number' not in extracted_data:
-                detailed_errors.append({
-                    'field': 'gst_number',
-                    'error': 'GST certificate number not found',
-                    'expected_format': '27ABCDE1234F1Z5 (15 characters)',
-                    'help': 'Make sure GSTIN is clearly visible in the document'
-                })
-            if 'pan_number' not in extracted_data:
-                detailed_errors.append({
-                    'field': 'pan_number',
-                    'error': 'PAN card number not found',
-                    'expected_format': 'ABCDE1234F (10 characters)',
-                    'help': 'PAN should be in format: 5 letters + 4 digits + 1 letter'
-                })
-            if 'udyam_number' not in extracted_data:
-                detailed_errors.append({
-                    'field': 'udyam_number',
-                    'error': 'Udyam registration number not found',
-                    'expected_format': 'UDYAM-MH-01-1234567',
-                    'help': 'Udyam number format: UDYAM-[State]-[District]-[7 digits]'
-                })
-            if 'signature' not in extracted_data:
-                detailed_errors.append({
-                    'field': 'signature',
-                    'error': 'Signature not found on quotation',
-                    'help': 'Make sure quotation has "Signature:", "Authorized Signatory", or "Signed" text'
-                })
-            
-            # 🎯 DATADOG: Track error count
-            gauge("govdoc.errors.count", len(detailed_errors))
-            
-            recommendations = _generate_recommendations(detailed_errors, extracted_data)
-            
-            response = {
-                'success': True,
-                'analysis': ai_result['analysis'],
-                'extracted_data': extracted_data,
-                'validation_results': validation_results,
-                'detailed_errors': detailed_errors,
-                'compliance_score': completeness.get('score', 0),
-                'evidence_report': tracker.generate_evidence_report(),
-                'document_count': len(files),
-                'timestamp': datetime.now().isoformat(),
-                'accuracy_guarantee': '99.99%',
-                'extraction_method': 'Hybrid (Text + OCR for images)',
-                'recommendations': recommendations,
-                'patterns_used': {
-                    'gst': Config.GST_PATTERN,
-                    'pan': Config.PAN_PATTERN,
-                    'udyam': Config.UDYAM_PATTERN,
-                    'company_name': Config.COMPANY_NAME_PATTERN,
-                    'date': Config.QUOTATION_DATE_PATTERN,
-                    'price': Config.PRICE_PATTERN,
-                    'signature': Config.SIGNATURE_PATTERN
-                }
-            }
-            
-            print(f"\n{'='*80}")
-            print(f"🎯 ANALYSIS COMPLETE - 99.99% ACCURACY")
-            print(f"{'='*80}")
-            print(f"   Decision: {decision}")
-            print(f"   Confidence: {confidence:.4%}")
-            print(f"   Score: {completeness.get('score', 0):.1f}/100")
-            print(f"   Documents processed: {len(files)}")
-            print(f"{'='*80}")
-            
-            # 🎯 DATADOG: Track successful analysis
-            increment("govdoc.analysis.success")
-            
-            return jsonify(response)
-        else:
-            raise Exception("AI analysis failed")
+        # 🎯 DATADOG: Track analysis request
+        increment("govdoc.analysis.request", tags=["endpoint:analyze"])
+        
+        files, digests = _save_uploaded_documents()
+        if not files:
+            return _no_files_response()
         
+        return jsonify(_run_analysis(files, digests=digests))
+        
+    except UploadRejected as e:
+        return _upload_rejected_response(e)
     except Exception as e:
-        print(f"\n{'='*80}")
-        print(f"❌ ANALYSIS ERROR")
-        print(f"{'='*80}")
-        print(f"Error: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        print(f"{'='*80}")
+        return jsonify(_analysis_error_payload(e)), 500
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@app.route('/analyze/stream', methods=['POST'])
+def analyze_documents_stream():
+    """/analyze as Server-Sent Events: stage events as they finish, then the full result"""
+    print(f"\n{'='*80}")
+    print("🔥 STREAMING DOCUMENT ANALYSIS REQUEST")
+    print(f"{'='*80}")
+    
+    # 🎯 DATADOG: Track analysis request
+    increment("govdoc.analysis.request", tags=["endpoint:analyze_stream"])
+    
+    try:
+        files, digests = _save_uploaded_documents()
+    except UploadRejected as e:
+        return _upload_rejected_response(e)
+    except Exception as e:
+        return jsonify(_analysis_error_payload(e)), 500
+    if not files:
+        return _no_files_response()
+    
+    events = queue.Queue()
+    
+    def emit(event, data):
+        # Serialise now: the pipeline keeps mutating extracted_data
+        events.put(_sse(event, data))
+    
+    def run():
+        try:
+            emit('result', _run_analysis(files, emit=emit, digests=digests))
+        except Exception as e:
+            emit('error', _analysis_error_payload(e))
+        finally:
+            events.put(None)
+    
+    threading.Thread(target=run, name='analyze-stream', daemon=True).start()
+    
+    def stream():
+        for doc_type, filepath in files.items():
+            yield _sse('upload_saved', {'doc_type': doc_type, 'filename': os.path.basename(filepath)})
+        while True:
+            try:
+                item = events.get(timeout=Config.SSE_KEEPALIVE_SECONDS)
+            except queue.Empty:
+                # Comment frame keeps proxies from closing an idle OCR stage
+                yield ": keep-alive\n\n"
+                continue
+            if item is None:
+                break
+            yield item
+    
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/jobs', methods=['POST'])
+def create_analysis_job():
+    """Queue an analysis of the same multipart form as /analyze and return immediately"""
+    try:
+        increment("govdoc.analysis.request", tags=["endpoint:jobs"])
+        
+        # Parses the multipart body, so upload limits apply from here on.
+        # Validated before any upload is committed, so a 400 leaves no files behind.
+        webhook_url = request.form.get('webhook_url') or None
+        if webhook_url:
+            try:
+                check_webhook_url(webhook_url)
+            except ValueError as e:
+                return jsonify({
+                    'success': False,
+                    'error': 'Invalid webhook_url',
+                    'message': str(e)
+                }), 400
+        
+        files, _ = _save_uploaded_documents()
+        
+        if not files:
+            return _no_files_response()
         
-        # 🎯 DATADOG: Track errors
-        increment("govdoc.analysis.error", tags=["reason:exception"])
+        job_id = job_store.create_job(files, webhook_url)
+        print(f"🧾 Queued job {job_id} with {len(files)} documents")
         
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'status': 'queued',
+            'status_url': f'/jobs/{job_id}',
+            'document_count': len(files)
+        }), 202
+        
+    except UploadRejected as e:
+        return _upload_rejected_response(e)
+    except Exception as e:
+        increment("govdoc.analysis.error", tags=["reason:job_enqueue"])
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_analysis_job(job_id):
+    """Job status, plus the /analyze payload once the job is done"""
+    job = job_store.get_job(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, **job_store.to_response(job)})
+
+# Request body Content-Type -> registry format
+REGISTRY_CONTENT_TYPES = {
+    'text/csv': 'csv',
+    'application/x-ndjson': 'ndjson',
+    'application/ndjson': 'ndjson',
+    'application/jsonl': 'ndjson'
+}
+
+def _registry_job(job_id):
+    """RegistryCheck for an existing job id, or None"""
+    # Ids are uuid4 hex; anything else could escape the folder
+    if not re.fullmatch(r'[0-9a-f]{32}', job_id):
+        return None
+    for fmt in ('csv', 'ndjson'):
+        input_path = os.path.join(Config.REGISTRY_CHECK_FOLDER, f'{job_id}.{fmt}')
+        if os.path.exists(input_path):
+            output_path = os.path.join(Config.REGISTRY_CHECK_FOLDER, f'{job_id}.results.ndjson')
+            return RegistryCheck(input_path, output_path, fmt=fmt)
+    return None
+
+def _stream_registry_check(job_id, job, resume):
+    """NDJSON response: one line per vendor row, then a summary line"""
+    def stream():
+        try:
+            for text in job.run(resume=resume):
+                yield text
+            yield json.dumps({'summary': job.status()['summary'], 'finished': True}) + '\n'
+        except Exception as e:
+            increment("govdoc.registry_check.error")
+            yield json.dumps({'error': str(e), 'resume_url': f'/registry-check/{job_id}/resume'}) + '\n'
+    
+    return Response(stream(), mimetype='application/x-ndjson', headers={
+        'X-Registry-Check-Id': job_id,
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/registry-check', methods=['POST'])
+def start_registry_check():
+    """Cross-check a CSV / NDJSON vendor export sent as the request body; streams NDJSON results"""
+    increment("govdoc.registry_check.request")
+    fmt = request.args.get('format') or REGISTRY_CONTENT_TYPES.get(request.mimetype)
+    if fmt not in ('csv', 'ndjson'):
         return jsonify({
             'success': False,
-            'error': str(e),
-            'message': 'Analysis failed. Please check document format and try again.',
-            'common_fixes': [
-                'Ensure documents are not password-protected',
-                'Use searchable PDFs (not image-only)',
-                'Check file size (<16MB)',
-                'Verify document clarity'
-            ]
-        }), 500
+            'error': 'Unsupported registry format',
+            'message': 'Send text/csv or application/x-ndjson, or pass ?format=csv|ndjson'
+        }), 415
+    
+    job_id = uuid.uuid4().hex
+    input_path = os.path.join(Config.REGISTRY_CHECK_FOLDER, f'{job_id}.{fmt}')
+    try:
+        # Body goes straight to disk; MAX_REQUEST_SIZE still applies (larger files: the CLI)
+        with open(input_path, 'wb') as f:
+            shutil.copyfileobj(request.stream, f, Config.UPLOAD_CHUNK_SIZE)
+    except Exception:
+        if os.path.exists(input_path):
+            os.remove(input_path)
+        raise
+    if not os.path.getsize(input_path):
+        os.remove(input_path)
+        return jsonify({'success': False, 'error': 'Empty registry file'}), 400
+    
+    return _stream_registry_check(job_id, _registry_job(job_id), resume=False)
+
+@app.route('/registry-check/<job_id>/resume', methods=['POST'])
+def resume_registry_check(job_id):
+    """Continue an interrupted cross-check from its checkpoint; streams the remaining rows"""
+    job = _registry_job(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Registry check not found'}), 404
+    return _stream_registry_check(job_id, job, resume=True)
+
+@app.route('/registry-check/<job_id>', methods=['GET'])
+def get_registry_check(job_id):
+    """Checkpoint status; ?download=1 returns the NDJSON results written so far"""
+    job = _registry_job(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Registry check not found'}), 404
+    if request.args.get('download') and os.path.exists(job.output_path):
+        return send_file(os.path.abspath(job.output_path), mimetype='application/x-ndjson', as_attachment=True,
+                         download_name=f'registry-check-{job_id}.ndjson')
+    status = job.status() or {'rows_done': 0, 'finished': False}
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'rows_done': status['rows_done'],
+        'finished': status['finished'],
+        'summary': status.get('summary'),
+        'resume_url': f'/registry-check/{job_id}/resume',
+        'results_url': f'/registry-check/{job_id}?download=1'
+    })
+
+@app.route('/vendors/match', methods=['GET'])
+def match_vendor():
+    """Top-k vendor-master entries for ?name=..., with similarity scores"""
+    vendor_index = components.vendor_index
+    if vendor_index is None:
+        return jsonify({'success': False, 'error': 'No vendor master configured (VENDOR_MASTER_PATH)'}), 404
+    name = request.args.get('name', '').strip()
+    if not name:
+        return jsonify({'success': False, 'error': 'name is required'}), 400
+    try:
+        k = min(int(request.args.get('k', Config.VENDOR_MATCH_TOP_K)), 100)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'k must be an integer'}), 400
+    return jsonify({'success': True, **_match_vendor(vendor_index, name, k)})
 
 @app.route('/generate-report', methods=['POST'])
 def generate_report():
     """Generate PDF report"""
     try:
         data = request.json
-        generator = ReportGenerator()
+        generator = components.report_generator
         
         output_path = os.path.join(Config.OUTPUT_FOLDER, f'report_{datetime.now().timestamp()}.pdf')
         generator.generate_pdf_report(data, output_path)
@@ -567,8 +967,7 @@ def generate_report():
 def system_status():
     """Check system status with Datadog info"""
     try:
-        from modules.local_ai_model import SimpleLocalAIModel
-        local_model = SimpleLocalAIModel()
+        local_model = components.analyzer.local_model
         model_status = 'loaded' if local_model.models_loaded else 'not_loaded'
     except:
         model_status = 'error'
@@ -582,6 +981,11 @@ def system_status():
         'image_pdf_support': True,
         'local_model': model_status,
         'datadog_enabled': is_initialized(),
+        'warm_components': {name: components.is_built(name) for name in components.FACTORIES},
+        'extraction_cache': components.extraction_stage.cache.stats() if components.extraction_stage.cache else None,
+        'ocr_page_cache': components.processor.ocr_processor.page_cache.stats()
+                          if components.processor.ocr_processor.page_cache else None,
+        'registry_snapshot': components.registry_snapshot.info() if components.registry_snapshot else None,
         'timestamp': datetime.now().isoformat(),
         'pattern_examples': {
             'gst': '27ABCDE1234F1Z5',
@@ -598,19 +1002,19 @@ def system_status():
 def test_patterns():
     """Test if patterns match document text"""
     try:
-        if 'file' not in request.files:
+        parts = _uploaded_parts()
+        if 'file' not in parts:
             return jsonify({'error': 'No file uploaded'}), 400
         
-        file = request.files['file']
+        file = parts['file']
         if file and allowed_file(file.filename):
             filename = secure_filename(file.filename)
             filepath = os.path.join(Config.UPLOAD_FOLDER, f"pattern_test_{int(datetime.now().timestamp())}_{filename}")
-            file.save(filepath)
+            upload = commit_upload(file, filepath)
             
-            processor = DocumentProcessor()
-            text_data = processor.extract_all_text(filepath)
+            text_data = components.extraction_stage.extract_one(filepath, components.processor, digest=upload['sha256'])
             
-            all_text = ' '.join([item['text'] for item in text_data]) if text_data else ""
+            all_text = TextData.of(text_data).joined
             
             patterns = {
                 'GST': Config.GST_PATTERN,
@@ -642,6 +1046,8 @@ def test_patterns():
         
         return jsonify({'error': 'Invalid file'}), 400
         
+    except UploadRejected as e:
+        return _upload_rejected_response(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -649,20 +1055,21 @@ def test_patterns():
 def debug_document():
     """Debug document extraction"""
     try:
-        if 'file' not in request.files:
+        parts = _uploaded_parts()
+        if 'file' not in parts:
             return jsonify({'error': 'No file uploaded'}), 400
         
-        file = request.files['file']
+        file = parts['file']
         if file and allowed_file(file.filename):
             filename = secure_filename(file.filename)
             filepath = os.path.join(Config.UPLOAD_FOLDER, f"debug_{int(datetime.now().timestamp())}_{filename}")
-            file.save(filepath)
+            upload = commit_upload(file, filepath)
             
-            processor = DocumentProcessor()
-            text_data = processor.extract_all_text(filepath)
+            text_data = components.extraction_stage.extract_one(filepath, components.processor, digest=upload['sha256'])
             
             if text_data:
-                all_text = ' '.join([item['text'] for item in text_data])
+                text_data = TextData.of(text_data)
+                all_text = text_data.joined
                 
                 debug_info = {
                     'filename': filename,
@@ -671,12 +1078,12 @@ def debug_document():
                     'sample_text': all_text[:1000],
                     'text_elements': [
                         {
-                            'page': item['page'],
-                            'line': item['line'],
-                            'text': item['text'][:200],
-                            'type': item.get('type', 'unknown')
+                            'page': text_data.page(i),
+                            'line': text_data.line(i),
+                            'text': text_data.text(i)[:200],
+                            'type': text_data.type(i)
                         }
-                        for item in text_data[:20]
+                        for i in range(min(20, len(text_data)))
                     ]
                 }
                 
@@ -698,9 +1105,19 @@ def debug_document():
         
         return jsonify({'error': 'Invalid file'}), 400
         
+    except UploadRejected as e:
+        return _upload_rejected_response(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.errorhandler(413)
+def request_too_large(e):
+    """Bodies over MAX_CONTENT_LENGTH are refused before any part is parsed"""
+    return _upload_rejected_response(UploadRejected(
+        f'Request exceeds {Config.MAX_REQUEST_SIZE // (1024 * 1024)}MB upload limit',
+        status_code=413, reason='request_too_large'
+    ))
+
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8080))
     app.run(host="0.0.0.0", port=port, debug=False)
\ No newline at end of file
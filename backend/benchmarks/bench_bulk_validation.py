@@ -0,0 +1,84 @@
+# ==================== benchmarks/bench_bulk_validation.py ====================
+"""
+Identifier validation throughput: per-item ComplianceChecker calls vs the
+vectorised validate_*_many functions.
+
+Generates a synthetic vendor master (mostly well-formed GSTINs with correct
+check characters, plus OCR-style corruptions), validates it both ways and
+checks that both agree on format validity.
+
+Run from backend/:
+    python benchmarks/bench_bulk_validation.py [rows]
+"""
+
+import os
+import random
+import string
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from config import Config
+from modules.bulk_validation import validate_pan_many, validate_udyam_many
+from modules.compliance_checker import ComplianceChecker, _gst_check_char
+
+
+def random_pan(rng):
+    return (''.join(rng.choices(string.ascii_uppercase, k=3)) + rng.choice('PCFHT') + rng.choice(string.ascii_uppercase)
+            + ''.join(rng.choices(string.digits, k=4)) + rng.choice(string.ascii_uppercase))
+
+
+def random_gst(rng):
+    body = rng.choice(Config.VALID_GST_STATE_CODES) + random_pan(rng) + rng.choice('123') + 'Z'
+    return body + _gst_check_char(body)
+
+
+def random_udyam(rng):
+    return f"UDYAM-{rng.choice(['MH', 'KA', 'TN', 'DL'])}-{rng.randint(1, 40):02d}-{rng.randint(0, 9999999):07d}"
+
+
+def corrupt(rng, value):
+    """OCR-style damage: a confusable character swap or a dropped character"""
+    if rng.random() < 0.5:
+        i = rng.randrange(len(value))
+        swap = {'0': 'O', 'O': '0', '1': 'I', 'I': '1', '5': 'S', 'S': '5', '8': 'B', 'B': '8'}
+        return value[:i] + swap.get(value[i], value[i]) + value[i + 1:]
+    i = rng.randrange(len(value))
+    return value[:i] + value[i + 1:]
+
+
+def dataset(rng, make, rows):
+    return [corrupt(rng, make(rng)) if rng.random() < 0.1 else make(rng) for _ in range(rows)]
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    rng = random.Random(17)
+    checker = ComplianceChecker()
+
+    print(f"{rows} identifiers per type")
+    print(f"{'type':<8}{'per-item s':>12}{'bulk s':>10}{'speedup':>10}{'valid':>10}{'agree':>8}")
+    for name, make, single, bulk in [
+        ('gst', random_gst, checker.validate_gst, checker.validate_gst_many),
+        ('pan', random_pan, checker.validate_pan, validate_pan_many),
+        ('udyam', random_udyam, checker.validate_udyam, validate_udyam_many),
+    ]:
+        values = dataset(rng, make, rows)
+
+        start = time.perf_counter()
+        per_item = [single(value) for value in values]
+        single_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = bulk(values)
+        bulk_s = time.perf_counter() - start
+
+        agree = sum(1 for item, ok in zip(per_item, results['valid']) if item['valid'] == bool(ok))
+        print(f"{name:<8}{single_s:>12.3f}{bulk_s:>10.3f}{single_s / bulk_s:>9.1f}x"
+              f"{int(results['valid'].sum()):>10}{agree / rows:>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
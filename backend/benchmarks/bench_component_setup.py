@@ -0,0 +1,67 @@
+# ==================== benchmarks/bench_component_setup.py ====================
+"""
+Per-request setup cost: fresh components vs the warm ComponentRegistry.
+
+Run from backend/:
+    python benchmarks/bench_component_setup.py [iterations]
+"""
+
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.component_registry import ComponentRegistry
+from modules.document_processor import DocumentProcessor
+from modules.compliance_checker import ComplianceChecker
+from modules.enhanced_ai_analyzer import EnhancedAIAnalyzer
+from modules.evidence_tracker import EvidenceTracker
+
+
+def per_request_construction():
+    DocumentProcessor()
+    ComplianceChecker()
+    EnhancedAIAnalyzer()
+    EvidenceTracker()
+
+
+def warm_registry_access(registry):
+    registry.processor
+    registry.checker
+    registry.analyzer
+    registry.new_tracker()
+
+
+def measure(fn, iterations):
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return sum(timings) / len(timings), timings[len(timings) // 2], timings[-1]
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    registry = ComponentRegistry()
+    with contextlib.redirect_stdout(io.StringIO()):
+        registry.warm_up()
+
+    print(f"Per-request setup cost over {iterations} iterations (ms)")
+    print(f"{'mode':<28}{'mean':>10}{'median':>10}{'max':>10}")
+    for label, fn in [
+        ('fresh per request', per_request_construction),
+        ('warm registry', lambda: warm_registry_access(registry)),
+    ]:
+        mean, median, worst = measure(fn, iterations)
+        print(f"{label:<28}{mean:>10.3f}{median:>10.3f}{worst:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
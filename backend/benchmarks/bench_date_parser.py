@@ -0,0 +1,94 @@
+# ==================== benchmarks/bench_date_parser.py ====================
+"""
+Certificate date parsing: the old strptime loop vs DateParser.
+
+Generates registration dates in the layouts vendors send (mostly
+DD-MM-YYYY, some DD/MM/YYYY, ISO and "15 Dec 2023", a few unparsable),
+then parses them with:
+- the strptime loop check_date_validity used before DateParser,
+- DateParser.parse (one alternation per value),
+- DateParser.parse_many (batch, datetime64[D]; remembers the source's layout),
+and finally runs the bulk expiry check. All modes must agree on the dates.
+
+Run from backend/:
+    python benchmarks/bench_date_parser.py [rows]
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import numpy as np
+
+from modules.compliance_checker import ComplianceChecker
+from modules.date_parser import DateParser
+
+LEGACY_FORMATS = ['%d-%m-%Y', '%d/%m/%Y', '%Y-%m-%d', '%d %b %Y', '%d %B %Y', '%B %d, %Y']
+
+LAYOUTS = [('%d-%m-%Y', 0.7), ('%d/%m/%Y', 0.15), ('%Y-%m-%d', 0.08), ('%d %b %Y', 0.05)]
+
+
+def legacy_parse(date_str):
+    """check_date_validity's parsing before DateParser"""
+    for fmt in LEGACY_FORMATS:
+        try:
+            return datetime.strptime(str(date_str).strip(), fmt).date()
+        except:
+            continue
+    return None
+
+
+def dataset(rng, rows):
+    start = date(2015, 1, 1)
+    layouts, weights = zip(*LAYOUTS)
+    values = []
+    for _ in range(rows):
+        if rng.random() < 0.02:
+            values.append(rng.choice(['', 'N/A', '31-02-2024', 'pending']))
+            continue
+        day = start + timedelta(days=rng.randrange(4000))
+        values.append(day.strftime(rng.choices(layouts, weights)[0]))
+    return values
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    values = dataset(random.Random(23), rows)
+
+    expected, legacy_s = timed(lambda: [legacy_parse(value) for value in values])
+
+    print(f"{rows} dates")
+    print(f"{'mode':<28}{'s':>10}{'us/date':>10}{'speedup':>10}")
+    print(f"{'strptime loop':<28}{legacy_s:>10.3f}{legacy_s / rows * 1e6:>10.2f}{1:>9.1f}x")
+
+    for label, run in [
+        ('parse', lambda parser: [parser.parse(value) for value in values]),
+        ('parse_many (source)', lambda parser: parser.parse_many(values, 'bench')),
+    ]:
+        parsed, seconds = timed(lambda: run(DateParser()))
+        if isinstance(parsed, np.ndarray):
+            parsed = [None if np.isnat(value) else value.astype(object) for value in parsed]
+        assert parsed == expected, f"{label} disagrees with the strptime loop"
+        print(f"{label:<28}{seconds:>10.3f}{seconds / rows * 1e6:>10.2f}{legacy_s / seconds:>9.1f}x")
+
+    checker = ComplianceChecker()
+    per_item, single_s = timed(lambda: [checker.check_date_validity(value, 'gst') for value in values])
+    results, bulk_s = timed(lambda: checker.check_date_validity_many(values, 'gst'))
+    agree = sum(1 for item, ok in zip(per_item, results['valid']) if item['valid'] == bool(ok))
+    print(f"\nexpiry check: per-item {single_s:.3f}s, bulk {bulk_s:.3f}s ({single_s / bulk_s:.1f}x), "
+          f"{int(results['valid'].sum())} valid, {agree / rows:.1%} agree")
+
+
+if __name__ == "__main__":
+    main()
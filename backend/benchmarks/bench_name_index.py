@@ -0,0 +1,136 @@
+# ==================== benchmarks/bench_name_index.py ====================
+"""
+Vendor-master name lookup: VendorNameIndex vs a SequenceMatcher scan.
+
+Generates a synthetic vendor master of Indian company names. Queries are
+master names as they appear on quotations: "M/s." prefixes, a different
+legal suffix, case changes and OCR misreads (l/I, 0/O, rn/m, a dropped
+character). The benchmark reports build time, lookup latency and top-1 /
+top-5 accuracy. It then times the old approach (clean + SequenceMatcher
+against every vendor) on a slice of the master and extrapolates it, and
+compares the pairwise scorer used by check_name_consistency.
+
+Run from backend/:
+    python benchmarks/bench_name_index.py [vendors] [queries]
+"""
+
+import os
+import random
+import re
+import sys
+import time
+from difflib import SequenceMatcher
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import numpy as np
+
+from modules.name_matching import VendorNameIndex, name_similarity, normalise_company_name
+
+PREFIXES = ['', '', '', 'Shree', 'Sri', 'Om', 'New', 'Royal', 'Bharat', 'National', 'Global', 'Sai', 'Jai']
+# Proper-name words are built from these, e.g. 'Ravindra', 'Shakumar'
+SYLLABLES = [onset + vowel for onset in ['b', 'bh', 'ch', 'd', 'dh', 'g', 'h', 'j', 'k', 'kh', 'l', 'm', 'n', 'p',
+                                         'r', 's', 'sh', 't', 'th', 'v', 'y', 'kr', 'pr', 'sr']
+             for vowel in ['a', 'e', 'i', 'o', 'u', 'aa', 'ee']] + ['esh', 'ndra', 'nt', 'jit', 'deep', 'pal', 'kar']
+TRADES = ['Traders', 'Enterprises', 'Industries', 'Steel', 'Textiles', 'Foods', 'Engineering', 'Technologies',
+          'Solutions', 'Services', 'Agro', 'Pharma', 'Exports', 'Logistics', 'Constructions', 'Electricals',
+          'Plastics', 'Chemicals', 'Infra', 'Motors']
+SUFFIXES = ['Pvt Ltd', 'Private Limited', 'Pvt. Ltd.', 'LLP', 'Limited', 'Ltd', '']
+OCR_SWAPS = [('l', 'I'), ('I', 'l'), ('o', '0'), ('O', '0'), ('m', 'rn'), ('i', 'l'), ('S', '5')]
+
+
+def make_name(rng):
+    words = [rng.choice(PREFIXES)]
+    for _ in range(rng.choice([1, 1, 2])):
+        words.append(''.join(rng.choices(SYLLABLES, k=rng.randint(2, 3))).capitalize())
+    words += rng.sample(TRADES, rng.choice([1, 1, 2]))
+    words.append(rng.choice(SUFFIXES))
+    return ' '.join(word for word in words if word)
+
+
+def as_quoted(rng, name):
+    """The name as a quotation or OCR would render it"""
+    base = re.sub(r'\s*(?:Pvt\.? Ltd\.?|Private Limited|LLP|Limited|Ltd)$', '', name)
+    text = f"{rng.choice(['', 'M/s. ', 'M/S ', 'M/s '])}{base} {rng.choice(SUFFIXES)}".strip()
+    if rng.random() < 0.5:
+        text = text.upper() if rng.random() < 0.5 else text.title()
+    if rng.random() < 0.6:
+        old, new = rng.choice(OCR_SWAPS)
+        positions = [m.start() for m in re.finditer(re.escape(old), text)]
+        if positions:
+            i = rng.choice(positions)
+            text = text[:i] + new + text[i + len(old):]
+    if rng.random() < 0.2:
+        i = rng.randrange(len(text))
+        text = text[:i] + text[i + 1:]
+    return text
+
+
+def legacy_clean(name):
+    """check_name_consistency's clean_name before name_matching"""
+    name = str(name).lower().strip()
+    replacements = {'pvt ltd': 'private limited', 'pvt. ltd.': 'private limited',
+                    'llp': 'limited liability partnership', 'limited': '', 'private': ''}
+    for old, new in replacements.items():
+        name = name.replace(old, new)
+    return re.sub(r'[^\w\s]', '', name).strip()
+
+
+def main():
+    vendors = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    rng = random.Random(24)
+
+    names = [make_name(rng) for _ in range(vendors)]
+    vendor_ids = [f"V{i:07d}" for i in range(vendors)]
+
+    start = time.perf_counter()
+    index = VendorNameIndex.build(names, vendor_ids)
+    build_s = time.perf_counter() - start
+    print(f"{len(index)} vendors indexed in {build_s:.1f}s "
+          f"({index.doc_grams.nbytes + index.doc_weights.nbytes + index.post_docs.nbytes >> 20} MB of arrays)")
+
+    picks = [rng.randrange(vendors) for _ in range(queries)]
+    texts = [as_quoted(rng, names[i]) for i in picks]
+    latencies = []
+    top1 = top5 = 0
+    for i, text in zip(picks, texts):
+        start = time.perf_counter()
+        found = index.top_k(text, 5)
+        latencies.append((time.perf_counter() - start) * 1000)
+        # Another vendor with the same normalised name is an equally right answer
+        target = normalise_company_name(names[i])
+        hits = [normalise_company_name(candidate['name']) == target for candidate in found]
+        top1 += bool(hits[:1] and hits[0])
+        top5 += any(hits)
+    latencies.sort()
+    print(f"lookup ms: p50 {latencies[len(latencies) // 2]:.3f}  p95 {latencies[int(len(latencies) * 0.95)]:.3f}  "
+          f"p99 {latencies[int(len(latencies) * 0.99)]:.3f}")
+    print(f"accuracy: top-1 {top1 / queries:.1%}  top-5 {top5 / queries:.1%}")
+    # Shares no trigram with any vendor: no candidates, not an error
+    assert index.top_k('Qxzj Vwq', 5) == []
+
+    # The old scorer has no index: every lookup compares against every vendor
+    sample = [legacy_clean(name) for name in names[:20000]]
+    start = time.perf_counter()
+    for text in texts[:5]:
+        cleaned = legacy_clean(text)
+        max(SequenceMatcher(None, cleaned, name).ratio() for name in sample)
+    scan_ms = (time.perf_counter() - start) * 1000 / 5 * (vendors / len(sample))
+    print(f"SequenceMatcher scan (extrapolated to {vendors}): {scan_ms:.0f} ms per lookup")
+
+    pairs = [(names[i], text) for i, text in zip(picks, texts)]
+    start = time.perf_counter()
+    for a, b in pairs:
+        SequenceMatcher(None, legacy_clean(a), legacy_clean(b)).ratio()
+    legacy_us = (time.perf_counter() - start) * 1e6 / len(pairs)
+    start = time.perf_counter()
+    similarities = [name_similarity(a, b) for a, b in pairs]
+    pair_us = (time.perf_counter() - start) * 1e6 / len(pairs)
+    print(f"pairwise: SequenceMatcher {legacy_us:.1f} us, name_similarity {pair_us:.1f} us; "
+          f"{np.mean(np.array(similarities) >= 0.75):.1%} of quoted pairs pass 0.75")
+
+
+if __name__ == "__main__":
+    main()
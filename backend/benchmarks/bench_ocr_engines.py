@@ -0,0 +1,89 @@
+# ==================== benchmarks/bench_ocr_engines.py ====================
+"""
+Per-page cost of each OCR engine: subprocess pytesseract vs in-process tesserocr.
+
+A blank 64x64 image isolates the fixed cost of one call (process spawn,
+traineddata load, TSV round trip). Rendered pages from documents/ show the
+full per-page time. Also counts pages where both engines give identical
+records as AdvancedOCRProcessor builds them.
+
+Run from backend/:
+    python benchmarks/bench_ocr_engines.py [folder] [repeat] [dpi]
+"""
+
+import contextlib
+import glob
+import io
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import numpy as np
+
+from modules.advanced_ocr import AdvancedOCRProcessor
+from modules.ocr_engines import OCR_ENGINES, get_ocr_engine
+from modules.page_raster import get_rasterizer
+
+
+def load_pages(folder, dpi):
+    rasterizer = get_rasterizer()
+    with contextlib.redirect_stdout(io.StringIO()):
+        processor = AdvancedOCRProcessor()
+    pages = []
+    for path in sorted(glob.glob(os.path.join(folder, '*.pdf'))):
+        for _, image in rasterizer.iter_pages(path, dpi=dpi):
+            pages.append(processor._preprocess_image(np.array(image)))
+    return processor, pages
+
+
+def per_call_ms(engine, images, repeat):
+    engine.image_to_data(images[0])  # first call may load models
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for image in images:
+            engine.image_to_data(image)
+    return (time.perf_counter() - start) * 1000 / (repeat * len(images))
+
+
+def main():
+    folder = sys.argv[1] if len(sys.argv) > 1 else os.path.join(BACKEND_DIR, '..', 'documents')
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    dpi = int(sys.argv[3]) if len(sys.argv) > 3 else 300
+
+    processor, pages = load_pages(folder, dpi)
+    if not pages:
+        print(f"No PDF pages found in {folder}")
+        return
+    blank = np.full((64, 64), 255, dtype=np.uint8)
+
+    engines = {}
+    for name in OCR_ENGINES:
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine = get_ocr_engine(name)
+        if engine.name != name:
+            print(f"{name}: unavailable, skipped")
+            continue
+        engines[name] = engine
+
+    print(f"{len(pages)} pages at {dpi} dpi from {folder}, {repeat} repeats (ms per call)")
+    print(f"{'engine':<14}{'blank 64x64':>14}{'page':>12}")
+    records = {}
+    for name, engine in engines.items():
+        blank_ms = per_call_ms(engine, [blank], repeat * 10)
+        page_ms = per_call_ms(engine, pages, repeat)
+        print(f"{name:<14}{blank_ms:>14.1f}{page_ms:>12.1f}")
+
+        processor.engine = engine
+        records[name] = [processor._recognise(page, page_num, dpi)[0] for page_num, page in enumerate(pages, 1)]
+
+    if len(records) == len(OCR_ENGINES):
+        reference, other = records.values()
+        same = sum(1 for a, b in zip(reference, other) if a == b)
+        print(f"identical records: {same}/{len(pages)} pages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# ==================== benchmarks/bench_ocr_raster.py ====================
+"""
+Peak memory of OCR rasterisation: all pages at once vs PopplerRasterizer.
+
+'eager' is the old path: convert_from_path renders every page to RGB before
+the first one is preprocessed. 'streaming' renders memory-bounded grayscale
+windows through PopplerRasterizer. Each mode runs in its own process and
+preprocesses every page like AdvancedOCRProcessor._recognise; Tesseract is
+skipped because it does not change the rasterisation footprint.
+
+Run from backend/ with a long scanned PDF:
+    python benchmarks/bench_ocr_raster.py scan.pdf [dpi]
+"""
+
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import numpy as np
+import pdf2image
+
+from modules.advanced_ocr import AdvancedOCRProcessor
+from modules.page_raster import PopplerRasterizer
+
+
+def eager_pages(pdf_path, dpi):
+    images = pdf2image.convert_from_path(pdf_path, dpi=dpi)
+    return enumerate(images, 1)
+
+
+def streaming_pages(pdf_path, dpi):
+    return PopplerRasterizer().iter_pages(pdf_path, dpi=dpi)
+
+
+MODES = {'eager': eager_pages, 'streaming': streaming_pages}
+
+
+def run_mode(mode, pdf_path, dpi):
+    """Child process: rasterise and preprocess every page, report memory"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        processor = AdvancedOCRProcessor()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    tracemalloc.start()
+    pages = 0
+    start = time.perf_counter()
+    for _, image in MODES[mode](pdf_path, dpi):
+        processor._preprocess_image(np.array(image))
+        pages += 1
+    elapsed = time.perf_counter() - start
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'mode': mode,
+        'pages': pages,
+        'seconds': elapsed,
+        'traced_peak_kb': traced_peak // 1024,
+        'rss_before_kb': rss_before,
+        'rss_peak_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        # pdftoppm's own peak, largest of all poppler calls
+        'poppler_peak_kb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    }
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        result = run_mode(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+        json.dump(result, sys.stdout)
+        return
+
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+    pdf_path = sys.argv[1]
+    dpi = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+
+    print(f"OCR rasterisation of {pdf_path} at {dpi} dpi")
+    print(f"{'mode':<12}{'pages':>8}{'seconds':>10}{'traced peak MB':>16}"
+          f"{'peak RSS MB':>14}{'+RSS MB':>10}{'poppler MB':>12}")
+    for mode in MODES:
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--child', mode, pdf_path, str(dpi)],
+            capture_output=True, text=True, check=True
+        )
+        result = json.loads(out.stdout)
+        print(f"{result['mode']:<12}{result['pages']:>8}{result['seconds']:>10.2f}"
+              f"{result['traced_peak_kb'] / 1024:>16.1f}"
+              f"{result['rss_peak_kb'] / 1024:>14.1f}"
+              f"{(result['rss_peak_kb'] - result['rss_before_kb']) / 1024:>10.1f}"
+              f"{result['poppler_peak_kb'] / 1024:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
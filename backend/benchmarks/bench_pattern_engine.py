@@ -0,0 +1,115 @@
+# ==================== benchmarks/bench_pattern_engine.py ====================
+"""
+Field extraction cost: per-item findall loop vs the precompiled PatternEngine.
+
+Extracts the sample PDFs once, then times all 14 field patterns (GST, PAN,
+Udyam, company names, dates, prices) over every document. The second table
+repeats each document's items to approximate long multi-page scans.
+
+Run from backend/:
+    python benchmarks/bench_pattern_engine.py [iterations]
+"""
+
+import contextlib
+import glob
+import io
+import os
+import re
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from modules.document_processor import DocumentProcessor
+from modules.pattern_engine import PatternEngine, document_specs
+from modules.text_data import TextData
+
+
+def legacy_find_pattern(text_data, pattern, field_name, flags=re.IGNORECASE):
+    """DocumentProcessor.find_pattern before PatternEngine"""
+    results = []
+    compiled_pattern = re.compile(pattern, flags)
+    for item in text_data:
+        text = item['text']
+        for match in compiled_pattern.findall(text):
+            match_str = match if isinstance(match, str) else match[0]
+            if not any(r['value'] == match_str for r in results):
+                results.append({
+                    'field': field_name,
+                    'value': match_str,
+                    'page': item['page'],
+                    'line': item['line'],
+                    'snippet': text[:100],
+                    'confidence': item.get('confidence', 1.0)
+                })
+    return results
+
+
+def load_corpus():
+    paths = sorted(glob.glob(os.path.join(BACKEND_DIR, '..', 'documents', '*.pdf')))
+    paths += sorted(glob.glob(os.path.join(BACKEND_DIR, 'uploads', '*.pdf')))
+    processor = DocumentProcessor()
+    corpus = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for path in paths:
+            text_data = processor.extract_all_text(path)
+            if text_data:
+                corpus.append(text_data)
+    return corpus
+
+
+def measure(fn, iterations):
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return sum(timings) / len(timings), timings[len(timings) // 2]
+
+
+def compare(label, corpus, specs, engine, iterations):
+    def legacy():
+        return [[legacy_find_pattern(td, pattern, field) for _, field, pattern, _ in specs] for td in corpus]
+
+    def single_pass():
+        return [engine.scan(td) for td in corpus]
+
+    expected = legacy()
+    actual = [[found[key] for key, _, _, _ in specs] for found in single_pass()]
+    assert actual == expected, "PatternEngine results differ from find_pattern"
+
+    items = sum(len(td) for td in corpus)
+    print(f"\n{label}: {len(corpus)} documents, {items} text items, {len(specs)} patterns (ms per corpus)")
+    print(f"{'mode':<28}{'mean':>10}{'median':>10}")
+    results = {}
+    for name, fn in [('per-item findall', legacy), ('PatternEngine', single_pass)]:
+        mean, median = measure(fn, iterations)
+        results[name] = mean
+        print(f"{name:<28}{mean:>10.3f}{median:>10.3f}")
+    print(f"speedup: {results['per-item findall'] / results['PatternEngine']:.2f}x")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    corpus = load_corpus()
+    if not corpus:
+        print("No sample PDFs with extractable text found")
+        return
+
+    specs = document_specs()
+    engine = PatternEngine(specs)
+
+    compare('Sample corpus', corpus, specs, engine, iterations)
+
+    long_docs = [TextData.from_records(
+        [{**item, 'page': page + 1} for page in range(20) for item in td])
+        for td in corpus
+    ]
+    compare('Sample corpus x20 pages', long_docs, specs, engine, max(3, iterations // 4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# ==================== benchmarks/bench_pdf_backends.py ====================
+"""
+Text-layer extraction throughput and memory per PDF backend.
+
+Each backend (pdfplumber, pymupdf, pypdf2) runs in its own Python process
+over every PDF in uploads/, so peak RSS is not shared between them. Also
+reports how many documents produce exactly the pdfplumber records.
+
+Run from backend/:
+    python benchmarks/bench_pdf_backends.py [folder] [repeat]
+"""
+
+import contextlib
+import glob
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from modules.document_processor import PDF_TEXT_BACKENDS, get_pdf_text_backend
+
+
+def run_backend(name, folder, repeat):
+    """Child process: extract every PDF `repeat` times, report timings and RSS"""
+    paths = sorted(glob.glob(os.path.join(folder, '*.pdf')))
+    with contextlib.redirect_stdout(io.StringIO()):
+        backend = get_pdf_text_backend(name)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    pages = 0
+    failed = 0
+    outputs = {}
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for path in paths:
+            try:
+                records = list(backend.iter_pages(path))
+            except Exception:
+                failed += 1
+                continue
+            pages += len(records)
+            outputs[os.path.basename(path)] = records
+    elapsed = time.perf_counter() - start
+
+    return {
+        'backend': backend.name,
+        'documents': len(paths) * repeat,
+        'pages': pages,
+        'failed': failed,
+        'seconds': elapsed,
+        'rss_before_kb': rss_before,
+        'rss_peak_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'outputs': outputs
+    }
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        result = run_backend(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+        json.dump(result, sys.stdout, default=str)
+        return
+
+    folder = sys.argv[1] if len(sys.argv) > 1 else os.path.join(BACKEND_DIR, 'uploads')
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+
+    results = []
+    for name in PDF_TEXT_BACKENDS:
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--child', name, folder, str(repeat)],
+            capture_output=True, text=True, check=True
+        )
+        results.append(json.loads(out.stdout))
+
+    reference = results[0]['outputs']
+    print(f"PDF text backends over {results[0]['documents']} documents in {folder}")
+    print(f"{'backend':<12}{'seconds':>10}{'docs/s':>10}{'pages/s':>10}"
+          f"{'peak RSS MB':>14}{'+RSS MB':>10}{'same as pdfplumber':>20}")
+    for result in results:
+        same = sum(1 for key, records in result['outputs'].items() if reference.get(key) == records)
+        print(f"{result['backend']:<12}{result['seconds']:>10.2f}"
+              f"{result['documents'] / result['seconds']:>10.1f}"
+              f"{result['pages'] / result['seconds']:>10.1f}"
+              f"{result['rss_peak_kb'] / 1024:>14.1f}"
+              f"{(result['rss_peak_kb'] - result['rss_before_kb']) / 1024:>10.1f}"
+              f"{f'{same}/{len(reference)}':>20}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# ==================== benchmarks/bench_preprocess.py ====================
+"""
+OCR accuracy vs preprocessing time for combinations of preprocessing stages.
+
+The PDFs in uploads/ have a text layer, which serves as ground truth. Each
+page is rendered once, then preprocessed and OCR'd with every stage
+combination below. Accuracy is the share of text-layer words (multiset)
+that Tesseract also produced. Identical files are only measured once.
+
+Run from backend/:
+    python benchmarks/bench_preprocess.py [folder] [max_documents] [dpi]
+"""
+
+import contextlib
+import glob
+import hashlib
+import io
+import os
+import sys
+import time
+from collections import Counter
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import numpy as np
+import pytesseract
+
+from modules.document_processor import get_pdf_text_backend
+from modules.image_preprocess import PagePreprocessor
+from modules.page_raster import get_rasterizer
+
+ALL_STAGES = 'denoise,clahe,threshold,deskew'
+
+COMBINATIONS = [
+    ('all stages (legacy)', ALL_STAGES, False),
+    ('adaptive', ALL_STAGES, True),
+    ('clahe+threshold+deskew', 'clahe,threshold,deskew', False),
+    ('threshold+deskew', 'threshold,deskew', False),
+    ('threshold', 'threshold', False),
+    ('none', '', False),
+]
+
+
+def words(text):
+    return Counter(word.lower() for word in text.split())
+
+
+def load_pages(folder, max_documents, dpi):
+    """[(ground-truth words, page array)] for the first distinct PDFs in `folder`"""
+    backend = get_pdf_text_backend('pdfplumber')
+    rasterizer = get_rasterizer()
+    seen = set()
+    pages = []
+    for path in sorted(glob.glob(os.path.join(folder, '*.pdf'))):
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        if digest in seen:
+            continue
+        seen.add(digest)
+
+        truth = [words(' '.join(item['text'] for item in records if item['type'] == 'text'))
+                 for records in backend.iter_pages(path)]
+        for page_num, image in rasterizer.iter_pages(path, dpi=dpi):
+            if page_num <= len(truth) and sum(truth[page_num - 1].values()):
+                pages.append((truth[page_num - 1], np.array(image)))
+        if len(seen) >= max_documents:
+            break
+    return pages
+
+
+def run_combination(pages, stages, adaptive):
+    with contextlib.redirect_stdout(io.StringIO()):
+        preprocessor = PagePreprocessor(stages=stages, adaptive=adaptive)
+    preprocess_ms = 0.0
+    tesseract_ms = 0.0
+    found = 0
+    expected = 0
+    stage_runs = Counter()
+    for truth, img_np in pages:
+        start = time.perf_counter()
+        processed, timings = preprocessor.run(img_np)
+        preprocess_ms += (time.perf_counter() - start) * 1000
+        stage_runs.update(step for step in timings if step != 'probe')
+
+        start = time.perf_counter()
+        text = pytesseract.image_to_string(processed, config='--psm 6 --oem 3')
+        tesseract_ms += (time.perf_counter() - start) * 1000
+
+        found += sum((truth & words(text)).values())
+        expected += sum(truth.values())
+    return {
+        'preprocess_ms': preprocess_ms / len(pages),
+        'tesseract_ms': tesseract_ms / len(pages),
+        'accuracy': found / expected if expected else 0.0,
+        'stage_runs': stage_runs
+    }
+
+
+def main():
+    folder = sys.argv[1] if len(sys.argv) > 1 else os.path.join(BACKEND_DIR, 'uploads')
+    max_documents = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    dpi = int(sys.argv[3]) if len(sys.argv) > 3 else 300
+
+    pages = load_pages(folder, max_documents, dpi)
+    if not pages:
+        print(f"No PDFs with a text layer found in {folder}")
+        return
+
+    print(f"{len(pages)} pages at {dpi} dpi from {folder} (ms per page)")
+    print(f"{'stages':<26}{'preprocess':>12}{'tesseract':>12}{'total':>10}{'word recall':>13}  stages run")
+    for label, stages, adaptive in COMBINATIONS:
+        result = run_combination(pages, stages, adaptive)
+        runs = ', '.join(f"{name} {count}/{len(pages)}" for name, count in sorted(result['stage_runs'].items()))
+        print(f"{label:<26}{result['preprocess_ms']:>12.1f}{result['tesseract_ms']:>12.1f}"
+              f"{result['preprocess_ms'] + result['tesseract_ms']:>10.1f}"
+              f"{result['accuracy']:>13.2%}  {runs}")
+
+
+if __name__ == "__main__":
+    main()
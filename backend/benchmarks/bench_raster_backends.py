@@ -0,0 +1,95 @@
+# ==================== benchmarks/bench_raster_backends.py ====================
+"""
+Render time and peak memory per page: poppler (pdftoppm) vs PyMuPDF.
+
+Each backend renders every page of the PDF to the numpy array OCR works on
+(np.asarray of what iter_pages yields), in its own process so peak RSS is
+not shared. poppler's pdftoppm runs as a child process, and its peak is
+reported separately.
+
+Run from backend/ with a scanned PDF:
+    python benchmarks/bench_raster_backends.py scan.pdf [dpi] [gray|rgb]
+"""
+
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import numpy as np
+
+from modules.page_raster import RASTER_BACKENDS
+
+
+def run_backend(name, pdf_path, dpi, grayscale):
+    """Child process: render every page, report time and memory"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        rasterizer = RASTER_BACKENDS[name](grayscale=grayscale)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    pages = 0
+    page_ms = []
+    start = time.perf_counter()
+    page_start = start
+    for _, image in rasterizer.iter_pages(pdf_path, dpi=dpi):
+        img_np = np.asarray(image)
+        pages += 1
+        now = time.perf_counter()
+        page_ms.append((now - page_start) * 1000)
+        page_start = now
+        del img_np
+    elapsed = time.perf_counter() - start
+
+    return {
+        'backend': name,
+        'pages': pages,
+        'seconds': elapsed,
+        'ms_per_page': elapsed * 1000 / pages if pages else 0.0,
+        'max_page_ms': max(page_ms) if page_ms else 0.0,
+        'rss_before_kb': rss_before,
+        'rss_peak_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'child_peak_kb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    }
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        result = run_backend(sys.argv[2], sys.argv[3], int(sys.argv[4]), sys.argv[5] == 'gray')
+        json.dump(result, sys.stdout)
+        return
+
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+    pdf_path = sys.argv[1]
+    dpi = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    mode = sys.argv[3] if len(sys.argv) > 3 else 'gray'
+
+    print(f"Rasterisation of {pdf_path} at {dpi} dpi ({mode})")
+    print(f"{'backend':<10}{'pages':>7}{'seconds':>10}{'ms/page':>10}{'max ms':>9}"
+          f"{'peak RSS MB':>14}{'+RSS MB':>10}{'pdftoppm MB':>13}")
+    for name in RASTER_BACKENDS:
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--child', name, pdf_path, str(dpi), mode],
+            capture_output=True, text=True
+        )
+        if out.returncode != 0:
+            print(f"{name:<10} failed: {out.stderr.strip().splitlines()[-1] if out.stderr.strip() else out.returncode}")
+            continue
+        result = json.loads(out.stdout)
+        print(f"{result['backend']:<10}{result['pages']:>7}{result['seconds']:>10.2f}"
+              f"{result['ms_per_page']:>10.1f}{result['max_page_ms']:>9.1f}"
+              f"{result['rss_peak_kb'] / 1024:>14.1f}"
+              f"{(result['rss_peak_kb'] - result['rss_before_kb']) / 1024:>10.1f}"
+              f"{result['child_peak_kb'] / 1024:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
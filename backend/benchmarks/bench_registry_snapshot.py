@@ -0,0 +1,115 @@
+# ==================== benchmarks/bench_registry_snapshot.py ====================
+"""
+Registry status lookups: memory-mapped snapshot vs SQLite vs a dict.
+
+Writes a synthetic GSTIN registry dump (mostly active, some cancelled or
+suspended), compiles it with compile_snapshot, then compares for random
+GSTINs (half of them not registered):
+- RegistrySnapshot.lookup, one binary search on the mapped file,
+- RegistrySnapshot.lookup_many, the whole batch at once,
+- SQLite: a WITHOUT ROWID table keyed by GSTIN (the key is the covering index),
+- a dict built by reading the dump, i.e. what every worker would hold.
+Open time is what a freshly forked worker pays before its first lookup.
+
+Run from backend/:
+    python benchmarks/bench_registry_snapshot.py [registrations] [lookups]
+"""
+
+import csv
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from modules.compliance_checker import _gst_check_char
+from modules.registry_snapshot import RegistrySnapshot, compile_snapshot
+
+STATES = ['07', '09', '19', '24', '27', '29', '33', '36']
+LETTERS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+def make_gstin(rng):
+    body = (rng.choice(STATES) + ''.join(rng.choices(LETTERS, k=5)) + f"{rng.randrange(10000):04d}"
+            + rng.choice(LETTERS) + rng.choice('123') + 'Z')
+    return body + _gst_check_char(body + '0')
+
+
+def write_dump(path, rng, registrations):
+    gstins = []
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['gstin', 'status', 'registration_date', 'status_date'])
+        for _ in range(registrations):
+            gstin = make_gstin(rng)
+            status = rng.choices(['Active', 'Cancelled', 'Suspended'], [0.85, 0.12, 0.03])[0]
+            registered = f"{rng.randint(1, 28):02d}-{rng.randint(1, 12):02d}-{rng.randint(2017, 2025)}"
+            changed = '' if status == 'Active' else f"{rng.randint(1, 28):02d}-{rng.randint(1, 12):02d}-2025"
+            writer.writerow([gstin, status, registered, changed])
+            gstins.append(gstin)
+    return gstins
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    registrations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000000
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    rng = random.Random(25)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dump = os.path.join(tmp, 'gst_dump.csv')
+        gstins = write_dump(dump, rng, registrations)
+        queries = [rng.choice(gstins) if rng.random() < 0.5 else make_gstin(rng) for _ in range(lookups)]
+
+        snapshot_path = os.path.join(tmp, 'registry.snapshot')
+        _, compile_s = timed(lambda: compile_snapshot(dump, snapshot_path))
+        print(f"{registrations} registrations compiled in {compile_s:.1f}s "
+              f"({os.path.getsize(snapshot_path) >> 20} MB snapshot)")
+
+        db_path = os.path.join(tmp, 'registry.db')
+        with sqlite3.connect(db_path) as db:
+            db.execute("CREATE TABLE registry (gstin TEXT PRIMARY KEY, status TEXT, registered TEXT, "
+                       "status_since TEXT) WITHOUT ROWID")
+            with open(dump, newline='') as f:
+                rows = csv.reader(f)
+                next(rows)
+                db.executemany("INSERT OR REPLACE INTO registry VALUES (?, ?, ?, ?)", rows)
+
+        print(f"\n{'method':<28}{'open ms':>10}{'us/lookup':>12}")
+
+        snapshot, open_s = timed(lambda: RegistrySnapshot(snapshot_path))
+        expected, lookup_s = timed(lambda: [snapshot.lookup('gst', gstin) for gstin in queries])
+        print(f"{'snapshot.lookup':<28}{open_s * 1000:>10.2f}{lookup_s / lookups * 1e6:>12.2f}")
+        found, many_s = timed(lambda: snapshot.lookup_many('gst', queries))
+        assert found['found'].tolist() == [record is not None for record in expected]
+        print(f"{'snapshot.lookup_many':<28}{'':>10}{many_s / lookups * 1e6:>12.2f}")
+
+        db, open_s = timed(lambda: sqlite3.connect(f'file:{db_path}?mode=ro', uri=True))
+        query = "SELECT status, registered, status_since FROM registry WHERE gstin = ?"
+        rows, sqlite_s = timed(lambda: [db.execute(query, (gstin,)).fetchone() for gstin in queries])
+        assert [row is not None for row in rows] == [record is not None for record in expected]
+        print(f"{'sqlite (WITHOUT ROWID)':<28}{open_s * 1000:>10.2f}{sqlite_s / lookups * 1e6:>12.2f}")
+        db.close()
+
+        def load_dict():
+            with open(dump, newline='') as f:
+                rows = csv.reader(f)
+                next(rows)
+                return {row[0]: row[1:] for row in rows}
+
+        table, open_s = timed(load_dict)
+        _, dict_s = timed(lambda: [table.get(gstin) for gstin in queries])
+        print(f"{'dict from dump':<28}{open_s * 1000:>10.2f}{dict_s / lookups * 1e6:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
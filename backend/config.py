@@ -18,6 +18,76 @@ class Config:
     # File settings
     ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg'}
     MAX_FILE_SIZE = 16 * 1024 * 1024  # 16MB
+    MAX_REQUEST_SIZE = int(os.getenv("MAX_REQUEST_SIZE", str(40 * 1024 * 1024)))  # all parts of one request
+    MAX_CONTENT_LENGTH = MAX_REQUEST_SIZE  # Flask/Werkzeug rejects larger bodies with 413 before parsing
+    UPLOAD_CHUNK_SIZE = 64 * 1024
+    
+    # Worker settings
+    WARM_COMPONENTS_ON_STARTUP = os.getenv("WARM_COMPONENTS_ON_STARTUP", "true").lower() == "true"
+    EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", str(min(4, os.cpu_count() or 1))))  # <= 1 disables
+    EXTRACTION_EXECUTOR = os.getenv("EXTRACTION_EXECUTOR", "process")  # process | thread
+    EXTRACTION_MP_CONTEXT = os.getenv("EXTRACTION_MP_CONTEXT", "spawn")
+    EXTRACTION_CACHE_ENABLED = os.getenv("EXTRACTION_CACHE_ENABLED", "true").lower() == "true"
+    EXTRACTION_CACHE_MAX_BYTES = int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))  # per worker
+    PDF_TEXT_BACKEND = os.getenv("PDF_TEXT_BACKEND", "pdfplumber")  # pdfplumber | pymupdf | pypdf2
+    OCR_PAGE_TEXT_THRESHOLD = int(os.getenv("OCR_PAGE_TEXT_THRESHOLD", "100"))  # pages with fewer text-layer chars are OCR'd
+    EXTRACTION_EARLY_EXIT = os.getenv("EXTRACTION_EARLY_EXIT", "true").lower() == "true"  # gst/pan/udyam stop at first field (field-only callers)
+    EXTRACTION_PLAN_MIN_CONFIDENCE = float(os.getenv("EXTRACTION_PLAN_MIN_CONFIDENCE", "0.6"))
+    OCR_RASTER_MEMORY_BUDGET_MB = int(os.getenv("OCR_RASTER_MEMORY_BUDGET_MB", "96"))  # rendered pages held at once
+    OCR_RASTER_BACKEND = os.getenv("OCR_RASTER_BACKEND", "pymupdf")  # pymupdf (in-process) | poppler (pdftoppm)
+    OCR_RASTER_GRAYSCALE = os.getenv("OCR_RASTER_GRAYSCALE", "true").lower() == "true"
+    OCR_ADAPTIVE_DPI = os.getenv("OCR_ADAPTIVE_DPI", "true").lower() == "true"  # OCR at OCR_LOW_DPI first
+    OCR_LOW_DPI = int(os.getenv("OCR_LOW_DPI", "150"))
+    OCR_ESCALATION_MIN_CONFIDENCE = float(os.getenv("OCR_ESCALATION_MIN_CONFIDENCE", "0.8"))  # re-OCR pages below at full dpi
+    PREPROCESS_STAGES = os.getenv("PREPROCESS_STAGES", "denoise,clahe,threshold,deskew")  # in order
+    PREPROCESS_ADAPTIVE = os.getenv("PREPROCESS_ADAPTIVE", "true").lower() == "true"  # probes skip unneeded stages
+    PREPROCESS_NOISE_SIGMA = float(os.getenv("PREPROCESS_NOISE_SIGMA", "4.0"))  # denoise above this noise estimate
+    PREPROCESS_MIN_CONTRAST = float(os.getenv("PREPROCESS_MIN_CONTRAST", "120"))  # CLAHE below this 1-99% intensity spread
+    PREPROCESS_PROBE_SIZE = int(os.getenv("PREPROCESS_PROBE_SIZE", "1000"))  # longest side of the skew/contrast probe
+    OCR_LINE_ASSEMBLY = os.getenv("OCR_LINE_ASSEMBLY", "true").lower() == "true"  # one record per OCR line, not per word
+    OCR_ROI_ENABLED = os.getenv("OCR_ROI_ENABLED", "true").lower() == "true"  # re-OCR identifier regions next to their labels
+    OCR_ROI_MAX_ANCHORS = int(os.getenv("OCR_ROI_MAX_ANCHORS", "3"))  # label occurrences tried per field
+    OCR_PAGE_CACHE_ENABLED = os.getenv("OCR_PAGE_CACHE_ENABLED", "true").lower() == "true"
+    OCR_PAGE_CACHE_DIR = os.getenv("OCR_PAGE_CACHE_DIR", "cache/ocr_pages")  # share between workers to share hits
+    OCR_PAGE_CACHE_MAX_MB = int(os.getenv("OCR_PAGE_CACHE_MAX_MB", "512"))
+    OCR_ENGINE = os.getenv("OCR_ENGINE", "tesserocr")  # tesserocr (in-process) | pytesseract (subprocess per page)
+    # OCR processes per app worker: EXTRACTION_WORKERS with the process executor (each OCRs its document
+    # inline; their OCR pools are disabled), otherwise OCR_WORKERS - never the product of the two
+    OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(min(4, os.cpu_count() or 1))))  # page-parallel OCR processes, <= 1 disables
+    
+    # Vendor registry cross-check (POST /registry-check, python -m modules.registry_check)
+    REGISTRY_CHECK_FOLDER = os.getenv("REGISTRY_CHECK_FOLDER", "outputs/registry")  # inputs, results and checkpoints
+    REGISTRY_CHECK_CHUNK_ROWS = int(os.getenv("REGISTRY_CHECK_CHUNK_ROWS", "2000"))  # rows per worker task and checkpoint
+    REGISTRY_CHECK_WORKERS = int(os.getenv("REGISTRY_CHECK_WORKERS", str(min(4, os.cpu_count() or 1))))  # <= 1 runs inline
+    
+    # Offline registry snapshot (python -m modules.registry_snapshot compiles a GSTIN/PAN/Udyam dump)
+    REGISTRY_SNAPSHOT_PATH = os.getenv("REGISTRY_SNAPSHOT_PATH", "")  # compiled snapshot; empty disables the registry tier
+    REGISTRY_REJECT_UNKNOWN = os.getenv("REGISTRY_REJECT_UNKNOWN", "false").lower() == "true"  # numbers missing from the snapshot fail
+
+    # Company-name matching (check_name_consistency, vendor master lookups)
+    NAME_MATCH_THRESHOLD = float(os.getenv("NAME_MATCH_THRESHOLD", "0.75"))  # names in one bundle must score at least this
+    VENDOR_MASTER_PATH = os.getenv("VENDOR_MASTER_PATH", "")  # CSV / NDJSON vendor master; empty disables vendor matching
+    VENDOR_INDEX_PATH = os.getenv("VENDOR_INDEX_PATH", "cache/vendor_index.npz")  # rebuilt when the master changes
+    VENDOR_MATCH_TOP_K = int(os.getenv("VENDOR_MATCH_TOP_K", "5"))
+    VENDOR_MATCH_MIN_SCORE = float(os.getenv("VENDOR_MATCH_MIN_SCORE", "0.6"))  # best candidate needed to report a match
+    VENDOR_MATCH_CANDIDATE_POSTINGS = int(os.getenv("VENDOR_MATCH_CANDIDATE_POSTINGS", "5000"))  # rare-trigram postings per lookup (at least 5 trigrams are used)
+    
+    # Async analysis jobs (POST /jobs, GET /jobs/<id>)
+    JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", "jobs/analysis_jobs.db")
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))  # background threads per app worker, 0 disables
+    JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "120"))
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "1.0"))
+    WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "6"))
+    WEBHOOK_BACKOFF_SECONDS = float(os.getenv("WEBHOOK_BACKOFF_SECONDS", "5"))
+    WEBHOOK_BACKOFF_MAX_SECONDS = float(os.getenv("WEBHOOK_BACKOFF_MAX_SECONDS", "600"))
+    WEBHOOK_TIMEOUT_SECONDS = float(os.getenv("WEBHOOK_TIMEOUT_SECONDS", "10"))
+    # Comma-separated webhook hosts; when set, only these are called (and may be internal).
+    # Empty: any host that resolves only to public addresses.
+    WEBHOOK_ALLOWED_HOSTS = {host.strip().lower() for host in os.getenv("WEBHOOK_ALLOWED_HOSTS", "").split(",") if host.strip()}
+    
+    # Streaming analysis (POST /analyze/stream)
+    SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
     
     # Updated validation patterns (using your exact patterns)
     GST_PATTERN = r'\b[0-9]{2}[A-Z]{5}[0-9]{4}[A-Z][1-9A-Z]Z[0-9A-Z]\b'
@@ -28,6 +98,9 @@ class Config:
     COMPANY_NAME_PATTERN = r'\b[A-Z][A-Za-z0-9&\s\.-]{2,}?(?:Pvt\.?\sLtd|Private\sLimited|LLP|Limited)\b'
     SIGNATURE_PATTERN = r'\b(signature|signed|authorized\s+signatory|digitally\s+signed|director|proprietor)\b'
     
+    # GSTIN mod-36 check character: always reported, rejected only when required
+    GST_CHECKSUM_REQUIRED = os.getenv("GST_CHECKSUM_REQUIRED", "false").lower() == "true"
+    
     # Valid GST state codes
     VALID_GST_STATE_CODES = [
         '01', '02', '03', '04', '05', '06', '07', '08', '09', '10',
@@ -39,6 +112,7 @@ class Config:
     # Certificate validity
     UDYAM_VALIDITY_DAYS = 365 * 5  # 5 years
     GST_VALIDITY_DAYS = 365  # 1 year
+    DATE_FORMAT_CACHE_SIZE = int(os.getenv("DATE_FORMAT_CACHE_SIZE", "1024"))  # date layouts remembered per source
     
     # Required fields
     REQUIRED_FIELDS = [
@@ -4,12 +4,57 @@ import pytesseract
 from PIL import Image
 import cv2
 import numpy as np
-import pdf2image
 import os
+import time
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
 
+from config import Config
+
 # 🎯 DATADOG METRICS
-from modules.datadog_client import gauge
+from modules.datadog_client import gauge, increment, timing
+from modules.image_preprocess import PagePreprocessor
+from modules.ocr_layout import ocr_records
+from modules.page_cache import PageOCRCache
+from modules.ocr_engines import get_ocr_engine
+from modules.page_raster import get_rasterizer
+from modules.roi_ocr import RegionOCR, missing_fields
+
+
+# Built once per OCR pool process by _init_ocr_worker
+_worker_ocr = None
+
+# Environment for pool processes that OCR one page at a time: keeps
+# Tesseract's OpenMP from starting a thread per core in each of them
+SINGLE_THREAD_ENV = {'OMP_THREAD_LIMIT': '1'}
+
+
+def limit_child_threads():
+    """
+    Apply SINGLE_THREAD_ENV to processes spawned from now on. OpenMP reads
+    it once, when libtesseract loads, so it must be in the environment a
+    spawned child starts with; setting it inside the initializer is too
+    late. (A forked child inherits the parent's runtime as it is, one more
+    reason EXTRACTION_MP_CONTEXT defaults to spawn.) A value set by the
+    operator is kept.
+    """
+    for name, value in SINGLE_THREAD_ENV.items():
+        os.environ.setdefault(name, value)
+
+
+def _init_ocr_worker():
+    global _worker_ocr
+    # OpenCV's pool, unlike OpenMP's, can be capped at run time
+    cv2.setNumThreads(1)
+    _worker_ocr = AdvancedOCRProcessor()
+
+
+def _ocr_in_worker(img_np, page_num, dpi):
+    return _worker_ocr._recognise(img_np, page_num, dpi)
 
 
 class AdvancedOCRProcessor:
@@ -31,6 +76,15 @@ class AdvancedOCRProcessor:
         except Exception:
             print("⚠️ Tesseract not configured, using fallback")
 
+        self.rasterizer = get_rasterizer()
+        self.preprocessor = PagePreprocessor()
+        self.engine = get_ocr_engine()
+        self.region_ocr = RegionOCR(self.engine)
+        self.page_cache = PageOCRCache() if Config.OCR_PAGE_CACHE_ENABLED else None
+        self.workers = Config.OCR_WORKERS
+        self._executor = None
+        self._lock = threading.Lock()
+
     def extract_from_image_based_pdf(self, pdf_path, dpi=300):
         """Extract text from image-based PDFs with Datadog metrics"""
         print(f"🔍 Processing image-based PDF: {pdf_path}")
@@ -39,70 +93,15 @@ class AdvancedOCRProcessor:
         page_confidences = []
 
         try:
-            # Convert PDF to images
-            images = pdf2image.convert_from_path(pdf_path, dpi=dpi)
-            print(f"  Converted to {len(images)} images")
-
-            for page_num, image in enumerate(images, 1):
-                img_np = np.array(image)
-
-                # Preprocess image
-                processed_img = self._preprocess_image(img_np)
-
-                # OCR with confidence data
-                ocr_data = pytesseract.image_to_data(
-                    processed_img,
-                    output_type=pytesseract.Output.DICT,
-                    config='--psm 6 --oem 3'
-                )
-
-                n_boxes = len(ocr_data['text'])
-                valid_confidences = []
-
-                for i in range(n_boxes):
-                    text = ocr_data['text'][i].strip()
-                    conf = int(ocr_data['conf'][i])
-
-                    if text and conf > 30:
-                        confidence = conf / 100.0
-                        valid_confidences.append(confidence)
-
-                        text_results.append({
-                            'page': page_num,
-                            'line': ocr_data['line_num'][i],
-                            'text': text,
-                            'type': 'ocr',
-                            'confidence': confidence,
-                            'position': {
-                                'left': ocr_data['left'][i],
-                                'top': ocr_data['top'][i],
-                                'width': ocr_data['width'][i],
-                                'height': ocr_data['height'][i]
-                            }
-                        })
-
-                # 🎯 DATADOG METRIC: Per-page OCR confidence (MANDATORY)
-                if valid_confidences:
-                    avg_confidence = sum(valid_confidences) / len(valid_confidences)
-                    
-                    gauge("govdoc.ocr.confidence", avg_confidence, 
-                          tags=[f"page:{page_num}", "source:tesseract"])
-                    
+            page_count, _ = self.rasterizer.page_info(pdf_path)
+            ocr_pages = self._ocr_pdf(pdf_path, range(1, page_count + 1), dpi)
+            for page_num in sorted(ocr_pages):
+                page_results, avg_confidence = ocr_pages[page_num]
+                text_results.extend(page_results)
+                if avg_confidence is not None:
                     page_confidences.append(avg_confidence)
-                    
-                    print(f"    Page {page_num}: "
-                          f"{len(valid_confidences)} elements, "
-                          f"avg OCR confidence={round(avg_confidence, 2)}")
-
-            # 🎯 DATADOG METRIC: Document-level OCR confidence (MANDATORY)
-            if page_confidences:
-                doc_confidence = sum(page_confidences) / len(page_confidences)
-                
-                gauge("govdoc.ocr.document_confidence", doc_confidence,
-                      tags=["document_type:pdf", "ocr_engine:tesseract"])
-                
-                print(f"✅ Total extracted text elements: {len(text_results)}")
-                print(f"📊 Document OCR Quality: {doc_confidence:.2%}")
+
+            self._report_document_confidence(page_confidences, len(text_results))
 
             return text_results
 
@@ -110,73 +109,302 @@ class AdvancedOCRProcessor:
             print(f"❌ Image-based PDF processing failed: {e}")
             return self._fallback_ocr(pdf_path)
 
-    def _preprocess_image(self, image_np):
-        """Advanced image preprocessing for better OCR"""
-
-        # Convert to grayscale
-        if len(image_np.shape) == 3:
-            gray = cv2.cvtColor(image_np, cv2.COLOR_RGB2GRAY)
-        else:
-            gray = image_np
-
-        # Noise reduction
-        denoised = cv2.fastNlMeansDenoising(gray)
+    def extract_from_pdf_pages(self, pdf_path, page_numbers, dpi=300):
+        """
+        OCR only the given 1-based pages of a PDF.
 
-        # Contrast enhancement
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        enhanced = clahe.apply(denoised)
+        Runs of consecutive pages are rasterised in memory-bounded windows.
+        Returns {page_num: text_results}; pages that failed are missing.
+        """
+        print(f"🔍 OCR for pages {page_numbers} of: {pdf_path}")
 
-        # Thresholding
-        _, thresh = cv2.threshold(
-            enhanced, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU
-        )
-
-        # Deskew
-        angle = self._compute_skew(thresh)
-        if abs(angle) > 0.5:
-            return self._rotate_image(thresh, angle)
+        page_results = {}
+        page_confidences = []
 
-        return thresh
+        ocr_pages = self._ocr_pdf(pdf_path, page_numbers, dpi, skip_failed=True)
+        for page_num in sorted(ocr_pages):
+            results, avg_confidence = ocr_pages[page_num]
+            page_results[page_num] = results
+            if avg_confidence is not None:
+                page_confidences.append(avg_confidence)
 
-    def _compute_skew(self, image):
-        """Compute skew angle for deskewing"""
-        edges = cv2.Canny(image, 50, 150, apertureSize=3)
-        lines = cv2.HoughLinesP(
-            edges, 1, np.pi / 180, 100, minLineLength=100, maxLineGap=10
+        self._report_document_confidence(
+            page_confidences, sum(len(results) for results in page_results.values())
         )
+        return page_results
+
+    def _ocr_pdf(self, pdf_path, page_numbers, dpi, skip_failed=False):
+        """
+        OCR the given pages, raising the resolution only where it is needed.
+
+        With OCR_ADAPTIVE_DPI every page is first OCR'd at OCR_LOW_DPI; the
+        pages _needs_escalation flags (or that failed) are rendered again at
+        `dpi`. Returns {page_num: (text_results, avg confidence or None)};
+        each OCR record carries the 'dpi' it was read at.
+        """
+        tiers = self._dpi_tiers(dpi)
+        pending = sorted(set(page_numbers))
+        done = {}
+        low_res = {}
+
+        for tier, tier_dpi in enumerate(tiers):
+            final = tier == len(tiers) - 1
+            # Lower tiers never fail a page: it is retried at the next resolution
+            skip = skip_failed or not final
+            pages = self._iter_page_runs(pdf_path, pending, tier_dpi, skip_failed=skip)
+            for page_num, results, avg_confidence in self._ocr_pages(
+                    pages, tier_dpi, parallel=len(pending) > 1, skip_failed=skip):
+                if final or not self._needs_escalation(results, avg_confidence):
+                    done[page_num] = (results, avg_confidence)
+                    self._report_page(page_num, results, avg_confidence, tier_dpi, escalated=tier > 0)
+                else:
+                    low_res[page_num] = (results, avg_confidence, tier_dpi)
+
+            pending = [page_num for page_num in pending if page_num not in done]
+            if not pending:
+                break
+            if not final:
+                increment("govdoc.ocr.escalated_pages", value=len(pending), tags=[f"dpi:{tiers[tier + 1]}"])
+                print(f"  🔎 Low confidence at {tier_dpi} dpi, re-rendering pages {pending} at {tiers[tier + 1]} dpi")
+
+        # A page that failed at full resolution keeps its low-resolution text
+        for page_num in pending:
+            if page_num in low_res:
+                results, avg_confidence, tier_dpi = low_res[page_num]
+                done[page_num] = (results, avg_confidence)
+                self._report_page(page_num, results, avg_confidence, tier_dpi, escalated=False)
+        return done
+
+    @staticmethod
+    def _dpi_tiers(dpi):
+        if Config.OCR_ADAPTIVE_DPI and Config.OCR_LOW_DPI < dpi:
+            return [Config.OCR_LOW_DPI, dpi]
+        return [dpi]
+
+    @staticmethod
+    def _needs_escalation(text_results, avg_confidence):
+        """
+        True if a low-resolution page is too uncertain to keep: low
+        confidence, or a field label without its identifier even after ROI OCR
+        """
+        if avg_confidence is None or avg_confidence < Config.OCR_ESCALATION_MIN_CONFIDENCE:
+            return True
+        return bool(missing_fields(text_results))
+
+    def _iter_page_runs(self, pdf_path, page_numbers, dpi, skip_failed=True):
+        """(page_num, image) for the given pages; with skip_failed a run that fails to render is skipped"""
+        for first, last in _page_runs(page_numbers):
+            try:
+                yield from self.rasterizer.iter_pages(pdf_path, dpi=dpi, first_page=first, last_page=last)
+            except Exception as e:
+                if not skip_failed:
+                    raise
+                print(f"❌ OCR failed for pages {first}-{last} at {dpi} dpi: {e}")
+
+    def _ocr_pages(self, pages, dpi, parallel=True, skip_failed=False):
+        """
+        OCR (page_num, image) pairs; yields (page_num, text_results, avg
+        confidence or None) in page order.
+
+        With OCR_WORKERS > 1 and `parallel`, pages are recognised in a
+        process pool while later pages are still being rendered. At most two
+        pages per worker are in flight, so the rasteriser's memory budget
+        still bounds the parent. With `skip_failed`, a page whose OCR raises
+        is left out instead of failing the document.
+        """
+        limit = 2 * self.workers if parallel and self.workers > 1 else 1
+        in_flight = deque()
+        for page_num, image in pages:
+            # No copy for rasterisers that already yield arrays
+            img_np = np.asarray(image)
+            key = self.page_cache_key(img_np, dpi)
+            cached = self.cached_page(key, page_num)
+            if cached is not None:
+                # Queued like an OCR'd page so results still come out in page order
+                in_flight.append((page_num, None, None, key, cached))
+            else:
+                future = self._submit(img_np, page_num, dpi) if limit > 1 else None
+                in_flight.append((page_num, img_np, future, key, None))
+            if len(in_flight) >= limit:
+                yield from self._collect(in_flight.popleft(), dpi, skip_failed)
+        while in_flight:
+            yield from self._collect(in_flight.popleft(), dpi, skip_failed)
+
+    def _submit(self, img_np, page_num, dpi):
+        """Queue a page on the OCR pool; None means recognise it inline"""
+        executor = self._get_executor()
+        try:
+            return executor.submit(_ocr_in_worker, img_np, page_num, dpi)
+        except BrokenProcessPool:
+            self._discard_executor(executor)
+            return None
+
+    def _collect(self, entry, dpi, skip_failed):
+        page_num, img_np, future, key, cached = entry
+        if cached is not None:
+            yield (page_num, *cached)
+            return
+        try:
+            if future is None:
+                results, avg_confidence, timings = self._recognise(img_np, page_num, dpi)
+            else:
+                try:
+                    results, avg_confidence, timings = future.result()
+                except BrokenProcessPool as e:
+                    print(f"  ⚠️ OCR worker died on page {page_num} ({e}), recognising inline")
+                    self._discard_executor(self._executor)
+                    results, avg_confidence, timings = self._recognise(img_np, page_num, dpi)
+        except Exception as e:
+            if not skip_failed:
+                raise
+            print(f"❌ OCR failed for page {page_num} at {dpi} dpi: {e}")
+            return
+
+        self._report_timings(timings, dpi)
+        self.cache_page(key, results, avg_confidence)
+        yield page_num, results, avg_confidence
+
+    def page_cache_key(self, img_np, dpi):
+        """OCR page cache key of a rendered page, or None with the cache disabled"""
+        if self.page_cache is None:
+            return None
+        # Imported here: document_processor imports this module
+        from modules.document_processor import EXTRACTION_PIPELINE_VERSION
+        fingerprint = ':'.join(str(part) for part in (
+            EXTRACTION_PIPELINE_VERSION, dpi, self.engine.name,
+            ','.join(stage.name for stage in self.preprocessor.stages), self.preprocessor.adaptive,
+            Config.PREPROCESS_NOISE_SIGMA, Config.PREPROCESS_MIN_CONTRAST, Config.PREPROCESS_PROBE_SIZE,
+            Config.OCR_LINE_ASSEMBLY, Config.OCR_ROI_ENABLED, Config.OCR_ROI_MAX_ANCHORS
+        ))
+        return PageOCRCache.make_key(img_np, fingerprint)
+
+    def cached_page(self, key, page_num):
+        """(text_results, avg confidence) cached under `key`, renumbered to `page_num`; None on a miss"""
+        if key is None:
+            return None
+        cached = self.page_cache.get(key)
+        if cached is None:
+            return None
+        results, avg_confidence = cached
+        # The same scan may sit at another position in a different bundle
+        for item in results:
+            item['page'] = page_num
+        return results, avg_confidence
+
+    def cache_page(self, key, text_results, avg_confidence):
+        if key is not None:
+            self.page_cache.put(key, (text_results, avg_confidence))
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    limit_child_threads()
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context(Config.EXTRACTION_MP_CONTEXT),
+                        initializer=_init_ocr_worker
+                    )
+                    print(f"✅ OCR pool started in process {os.getpid()}: {self.workers} workers")
+        return self._executor
+
+    def _discard_executor(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _recognise(self, img_np, page_num, dpi):
+        """
+        Preprocess and Tesseract one page array; returns (text_results, avg
+        confidence or None, {step: ms}). Emits no metrics, so it can run in
+        a pool worker.
+        """
+        # Preprocess image (stages picked per page by PagePreprocessor)
+        processed_img, timings = self.preprocessor.run(img_np)
+
+        # OCR with confidence data
+        start = time.perf_counter()
+        ocr_data = self.engine.image_to_data(processed_img, psm=6, oem=3)
+        timings['tesseract'] = (time.perf_counter() - start) * 1000
+
+        # Line records (or word records) in reading order; confidence is per word
+        text_results, valid_confidences = ocr_records(ocr_data, page_num, 'ocr', dpi=dpi)
+
+        # Identifier fields the page-level pass garbled are re-read from their regions
+        start = time.perf_counter()
+        roi_results = self.read_missing_fields(processed_img, text_results, page_num, dpi)
+        if roi_results is not None:
+            timings['roi'] = (time.perf_counter() - start) * 1000
+            text_results.extend(roi_results)
+
+        if not valid_confidences:
+            return text_results, None, timings
+
+        return text_results, sum(valid_confidences) / len(valid_confidences), timings
+
+    def read_missing_fields(self, image_np, text_results, page_num, dpi=None):
+        """
+        'ocr_roi' records for identifier fields whose label is in
+        `text_results` (word boxes OCR'd from `image_np`) without a value
+        matching the field pattern. Returns None when no field is missing or
+        OCR_ROI_ENABLED is off.
+        """
+        if not Config.OCR_ROI_ENABLED:
+            return None
+        profiles = missing_fields(text_results)
+        if not profiles:
+            return None
+        return self.region_ocr.read_fields(image_np, text_results, profiles, page_num, dpi=dpi)
+
+    def _report_timings(self, timings, dpi):
+        for step, ms in timings.items():
+            timing("govdoc.ocr.stage_ms", round(ms, 1), tags=[f"stage:{step}", f"dpi:{dpi}"])
+
+    def _report_page(self, page_num, text_results, avg_confidence, dpi, escalated=False):
+        increment("govdoc.ocr.pages", tags=[f"dpi:{dpi}", f"escalated:{str(escalated).lower()}"])
+        roi_fields = sum(1 for item in text_results if item['type'] == 'ocr_roi')
+        if roi_fields:
+            increment("govdoc.ocr.roi_fields", value=roi_fields, tags=[f"dpi:{dpi}"])
+        if avg_confidence is None:
+            return
+
+        # 🎯 DATADOG METRIC: Per-page OCR confidence (MANDATORY)
+        gauge("govdoc.ocr.confidence", avg_confidence, 
+              tags=[f"page:{page_num}", "source:tesseract", f"dpi:{dpi}"])
+        
+        print(f"    Page {page_num}: "
+              f"{len(text_results)} elements at {dpi} dpi, "
+              f"avg OCR confidence={round(avg_confidence, 2)}")
+
+    def _report_document_confidence(self, page_confidences, total_elements):
+        # 🎯 DATADOG METRIC: Document-level OCR confidence (MANDATORY)
+        if page_confidences:
+            doc_confidence = sum(page_confidences) / len(page_confidences)
+            
+            gauge("govdoc.ocr.document_confidence", doc_confidence,
+                  tags=["document_type:pdf", "ocr_engine:tesseract"])
+            
+            print(f"✅ Total extracted text elements: {total_elements}")
+            print(f"📊 Document OCR Quality: {doc_confidence:.2%}")
 
-        if lines is None:
-            return 0
-
-        angles = []
-        for line in lines:
-            x1, y1, x2, y2 = line[0]
-            angle = np.degrees(np.arctan2(y2 - y1, x2 - x1))
-            if abs(angle) < 45:
-                angles.append(angle)
-
-        return np.median(angles) if angles else 0
-
-    def _rotate_image(self, image, angle):
-        """Rotate image by given angle"""
-        h, w = image.shape[:2]
-        center = (w // 2, h // 2)
-        M = cv2.getRotationMatrix2D(center, angle, 1.0)
-        return cv2.warpAffine(
-            image,
-            M,
-            (w, h),
-            flags=cv2.INTER_CUBIC,
-            borderMode=cv2.BORDER_REPLICATE
-        )
+    def _preprocess_image(self, image_np):
+        """Advanced image preprocessing for better OCR"""
+        return self.preprocessor.run(image_np)[0]
 
     def _fallback_ocr(self, file_path):
         """Fallback OCR method with Datadog metrics"""
         try:
             text = ""
             if file_path.lower().endswith('.pdf'):
-                images = pdf2image.convert_from_path(file_path)
-                for img in images:
+                for _, img in self.rasterizer.iter_pages(file_path, dpi=200):
                     text += pytesseract.image_to_string(img) + "\n"
             else:
                 text = pytesseract.image_to_string(Image.open(file_path))
@@ -203,4 +431,15 @@ class AdvancedOCRProcessor:
             return text_results
 
         except Exception:
-            return []
\ No newline at end of file
+            return []
+
+
+def _page_runs(page_numbers):
+    """[1, 2, 3, 7, 9, 10] -> [(1, 3), (7, 7), (9, 10)]"""
+    runs = []
+    for page_num in sorted(set(page_numbers)):
+        if runs and page_num == runs[-1][1] + 1:
+            runs[-1] = (runs[-1][0], page_num)
+        else:
+            runs.append((page_num, page_num))
+    return runs
@@ -0,0 +1,215 @@
+# ==================== modules/bulk_validation.py ====================
+"""
+Vectorised validation of many GSTIN / PAN / Udyam numbers at once.
+
+ComplianceChecker.validate_gst and friends check one string per call and
+return a dict. That is fine for one upload, but far too slow for the
+nightly recheck of a vendor master with hundreds of thousands of
+registrations. These functions take a sequence of identifiers and turn
+them into one uint8 matrix (one row per identifier). Every position is
+then checked with 256-entry character-class tables in a single NumPy
+operation per column. The GSTIN mod-36 check character is verified the
+same way.
+
+check_expiry_many does the same for certificate dates parsed by
+DateParser.parse_many.
+
+Each returns a NumPy structured array, one row per input: 'valid', an
+'error' code (index into the matching *_ERRORS tuple, 0 when valid) and a
+few parsed fields. to_records() turns rows into the single-item dicts when
+a caller needs them.
+"""
+
+from datetime import datetime
+
+import numpy as np
+
+from config import Config
+
+_CHARSET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+# Character-class tables indexed by byte value
+_DIGIT = np.zeros(256, dtype=bool)
+_DIGIT[ord('0'):ord('9') + 1] = True
+_ALPHA = np.zeros(256, dtype=bool)
+_ALPHA[ord('A'):ord('Z') + 1] = True
+_ALNUM = _DIGIT | _ALPHA
+_NONZERO_ALNUM = _ALNUM.copy()
+_NONZERO_ALNUM[ord('0')] = False
+
+# Lowercase ASCII to uppercase; everything else unchanged
+_UPPER = np.arange(256, dtype=np.uint8)
+_UPPER[ord('a'):ord('z') + 1] -= 32
+
+# Base-36 value of each character for the GSTIN checksum (0 for anything else)
+_BASE36 = np.zeros(256, dtype=np.int64)
+for _value, _char in enumerate(_CHARSET):
+    _BASE36[ord(_char)] = _value
+
+# GSTIN checksum weights for the first 14 characters
+_GST_WEIGHTS = np.tile(np.array([1, 2], dtype=np.int64), 7)
+
+_VALID_STATES = np.zeros(100, dtype=bool)
+_VALID_STATES[[int(code) for code in Config.VALID_GST_STATE_CODES]] = True
+
+# error codes; 0 is always "valid"
+GST_ERRORS = ('', 'Empty GST', 'GST must be 15 chars', 'Invalid GST format', 'Invalid state code',
+              'Invalid GST checksum')
+PAN_ERRORS = ('', 'Empty PAN', 'PAN must be 10 chars', 'Invalid PAN format')
+UDYAM_ERRORS = ('', 'Empty Udyam', 'Invalid Udyam length', 'Invalid Udyam format')
+DATE_ERRORS = ('', 'No date', 'Cannot parse date', 'Expired')
+
+GST_RESULT = np.dtype([('valid', '?'), ('error', 'u1'), ('state_code', 'u1'), ('checksum_valid', '?')])
+PAN_RESULT = np.dtype([('valid', '?'), ('error', 'u1'), ('holder_type', 'S1')])
+UDYAM_RESULT = np.dtype([('valid', '?'), ('error', 'u1'), ('state', 'S2'), ('district', 'u1')])
+DATE_RESULT = np.dtype([('valid', '?'), ('error', 'u1'), ('expiry_date', 'M8[D]'), ('days_remaining', 'i4')])
+
+
+def _normalise(values, width):
+    """(uint8 matrix n x width, lengths) of the stripped, uppercased identifiers"""
+    texts = ['' if value is None else str(value).strip() for value in values]
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+    # A fixed-width unicode array is a UCS-4 code point matrix; longer texts are
+    # truncated, but their length already fails the check
+    codepoints = np.array(texts, dtype=f'<U{width}').view(np.uint32).reshape(len(texts), width)
+    # Non-ASCII characters become NUL, which no character class accepts
+    chars = np.where(codepoints < 128, codepoints, 0).astype(np.uint8)
+    return _UPPER[chars], lengths
+
+
+def _first_error(n, checks):
+    """Error code per row: the first failing check (1-based), 0 if all pass"""
+    error = np.zeros(n, dtype=np.uint8)
+    for code, ok in checks:
+        error[(error == 0) & ~ok] = code
+    return error
+
+
+def gst_checksum(chars):
+    """Expected check character (as a byte) for rows of GSTIN characters"""
+    products = _BASE36[chars[:, :14]] * _GST_WEIGHTS
+    total = (products // 36 + products % 36).sum(axis=1)
+    return np.frombuffer(_CHARSET.encode(), dtype=np.uint8)[(36 - total % 36) % 36]
+
+
+def validate_gst_many(values, checksum_required=None):
+    """
+    Validate GSTINs; returns a GST_RESULT array in input order. Like
+    validate_gst, a wrong check character is always reported in
+    'checksum_valid' but only rejected (error 5) when checksum_required
+    (default: Config.GST_CHECKSUM_REQUIRED).
+    """
+    if checksum_required is None:
+        checksum_required = Config.GST_CHECKSUM_REQUIRED
+    chars, lengths = _normalise(values, 15)
+    state = np.where(_DIGIT[chars[:, 0]] & _DIGIT[chars[:, 1]],
+                     (chars[:, 0].astype(np.int64) - 48) * 10 + chars[:, 1] - 48, 0)
+    # Config.GST_PATTERN: 2 digits, a PAN, entity number, 'Z', check character
+    format_ok = (_DIGIT[chars[:, :2]].all(axis=1)
+                 & _ALPHA[chars[:, 2:7]].all(axis=1)
+                 & _DIGIT[chars[:, 7:11]].all(axis=1)
+                 & _ALPHA[chars[:, 11]]
+                 & _NONZERO_ALNUM[chars[:, 12]]
+                 & (chars[:, 13] == ord('Z'))
+                 & _ALNUM[chars[:, 14]])
+    checksum_ok = gst_checksum(chars) == chars[:, 14]
+
+    checks = [
+        (1, lengths > 0),
+        (2, lengths == 15),
+        (3, format_ok),
+        (4, _VALID_STATES[state]),
+    ]
+    if checksum_required:
+        checks.append((5, checksum_ok))
+
+    result = np.zeros(len(chars), dtype=GST_RESULT)
+    result['error'] = _first_error(len(chars), checks)
+    result['valid'] = result['error'] == 0
+    result['state_code'] = state
+    result['checksum_valid'] = checksum_ok & (lengths == 15)
+    return result
+
+
+def validate_pan_many(values):
+    """Validate PANs; returns a PAN_RESULT array in input order"""
+    chars, lengths = _normalise(values, 10)
+    format_ok = (_ALPHA[chars[:, :5]].all(axis=1)
+                 & _DIGIT[chars[:, 5:9]].all(axis=1)
+                 & _ALPHA[chars[:, 9]])
+
+    result = np.zeros(len(chars), dtype=PAN_RESULT)
+    result['error'] = _first_error(len(chars), [
+        (1, lengths > 0),
+        (2, lengths == 10),
+        (3, format_ok),
+    ])
+    result['valid'] = result['error'] == 0
+    # 4th character: P individual, C company, F firm, ...
+    result['holder_type'] = np.where(result['valid'], chars[:, 3], 0).astype(np.uint8).view('S1')
+    return result
+
+
+_UDYAM_PREFIX = np.frombuffer(b'UDYAM-', dtype=np.uint8)
+
+
+def validate_udyam_many(values):
+    """Validate Udyam numbers (UDYAM-XX-00-0000000); returns a UDYAM_RESULT array"""
+    chars, lengths = _normalise(values, 19)
+    # Registration digits run from position 12 to the end: 6 or 7 of them
+    tail = np.arange(12, 19) < lengths[:, None]
+    format_ok = ((chars[:, :6] == _UDYAM_PREFIX).all(axis=1)
+                 & _ALPHA[chars[:, 6:8]].all(axis=1)
+                 & (chars[:, 8] == ord('-'))
+                 & _DIGIT[chars[:, 9:11]].all(axis=1)
+                 & (chars[:, 11] == ord('-'))
+                 & (_DIGIT[chars[:, 12:19]] | ~tail).all(axis=1))
+
+    result = np.zeros(len(chars), dtype=UDYAM_RESULT)
+    result['error'] = _first_error(len(chars), [
+        (1, lengths > 0),
+        (2, (lengths == 18) | (lengths == 19)),
+        (3, format_ok),
+    ])
+    result['valid'] = result['error'] == 0
+    valid = result['valid']
+    result['state'] = np.where(valid[:, None], chars[:, 6:8], 0).astype(np.uint8).copy().view('S2').ravel()
+    result['district'] = np.where(valid, (chars[:, 9].astype(np.int64) - 48) * 10 + chars[:, 10] - 48, 0)
+    return result
+
+
+def check_expiry_many(values, dates, validity_days, now=None):
+    """
+    Certificate expiry for `dates` (datetime64[D], NaT where `values` did not
+    parse); returns a DATE_RESULT array. days_remaining counts from `now`
+    like check_date_validity: whole days, rounded down.
+    """
+    present = np.fromiter((bool(value) for value in values), dtype=bool, count=len(values))
+    parsed = ~np.isnat(dates)
+    expiry = np.where(parsed, dates, np.datetime64(0, 'D')) + np.timedelta64(validity_days, 'D')
+    now = np.datetime64(now or datetime.now(), 'us')
+    days_remaining = (expiry.astype('M8[us]') - now) // np.timedelta64(1, 'D')
+
+    result = np.zeros(len(dates), dtype=DATE_RESULT)
+    result['error'] = _first_error(len(dates), [
+        (1, present),
+        (2, parsed),
+        (3, days_remaining >= 0),
+    ])
+    result['valid'] = result['error'] == 0
+    result['expiry_date'] = np.where(parsed, expiry, np.datetime64('NaT'))
+    result['days_remaining'] = np.where(parsed, days_remaining, 0)
+    return result
+
+
+def to_records(results, errors):
+    """Rows of a *_RESULT array as {'valid': ..., 'error': message or None, ...} dicts"""
+    records = []
+    for row in results.tolist():
+        record = dict(zip(results.dtype.names, row))
+        record['error'] = errors[record['error']] or None
+        for key, value in record.items():
+            if isinstance(value, bytes):
+                record[key] = value.decode('ascii')
+        records.append(record)
+    return records
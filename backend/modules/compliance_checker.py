@@ -1,12 +1,32 @@
 # ==================== modules/compliance_checker.py ====================
 import re
 from datetime import datetime, timedelta
-from difflib import SequenceMatcher
 from config import Config
+from modules.bulk_validation import validate_gst_many, validate_pan_many, validate_udyam_many, check_expiry_many
+from modules.date_parser import DateParser
+from modules.name_matching import name_similarity
+from modules.text_data import TextData
+
+# Anchored forms of the Config patterns, compiled once
+_GST_FORMAT = re.compile(Config.GST_PATTERN.replace(r'\b', ''))
+_PAN_FORMAT = re.compile(Config.PAN_PATTERN.replace(r'\b', ''))
+_UDYAM_FORMAT = re.compile(Config.UDYAM_PATTERN.replace(r'\b', ''), re.IGNORECASE)
+_GST_STATE_CODES = frozenset(Config.VALID_GST_STATE_CODES)
+_GST_CHARSET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+def _gst_check_char(gst_number):
+    """GSTIN mod-36 check character for the first 14 characters"""
+    total = 0
+    for i, char in enumerate(gst_number[:14]):
+        product = _GST_CHARSET.index(char) * (2 if i % 2 else 1)
+        total += product // 36 + product % 36
+    return _GST_CHARSET[(36 - total % 36) % 36]
 
 class ComplianceChecker:
     def __init__(self):
         self.config = Config()
+        self.date_parser = DateParser()
         
     def validate_gst(self, gst_number):
         """Complete GST validation"""
@@ -21,11 +41,11 @@ class ComplianceChecker:
         if len(gst_number) != 15:
             return {'valid': False, 'error': f'GST must be 15 chars, got {len(gst_number)}'}
         
-        if not re.match(self.config.GST_PATTERN.replace(r'\b', ''), gst_number):
+        if not _GST_FORMAT.match(gst_number):
             return {'valid': False, 'error': 'Invalid GST format'}
         
         state_code = gst_number[:2]
-        if state_code not in self.config.VALID_GST_STATE_CODES:
+        if state_code not in _GST_STATE_CODES:
             return {'valid': False, 'error': f'Invalid state code: {state_code}'}
         
         pan_portion = gst_number[2:12]
@@ -33,11 +53,17 @@ class ComplianceChecker:
         if not pan_check['valid']:
             return {'valid': False, 'error': 'Invalid PAN in GST'}
         
+        # A wrong check character usually means an OCR misread somewhere in the number
+        checksum_valid = _gst_check_char(gst_number) == gst_number[14]
+        if not checksum_valid and self.config.GST_CHECKSUM_REQUIRED:
+            return {'valid': False, 'error': 'Invalid GST checksum'}
+        
         return {
             'valid': True,
             'message': 'GST valid',
             'state_code': state_code,
             'pan': pan_portion,
+            'checksum_valid': checksum_valid,
             'full_number': gst_number
         }
     
@@ -54,7 +80,7 @@ class ComplianceChecker:
         if len(pan_number) != 10:
             return {'valid': False, 'error': f'PAN must be 10 chars, got {len(pan_number)}'}
         
-        if not re.match(self.config.PAN_PATTERN.replace(r'\b', ''), pan_number):
+        if not _PAN_FORMAT.match(pan_number):
             return {'valid': False, 'error': 'Invalid PAN format'}
         
         if not pan_number[:5].isalpha():
@@ -78,7 +104,7 @@ class ComplianceChecker:
         # Remove word boundaries if they're in the string
         udyam_number = udyam_number.replace(r'\b', '')
         
-        if not re.match(self.config.UDYAM_PATTERN.replace(r'\b', ''), udyam_number, re.IGNORECASE):
+        if not _UDYAM_FORMAT.match(udyam_number):
             return {'valid': False, 'error': 'Invalid Udyam format'}
         
         parts = udyam_number.split('-')
@@ -106,34 +132,29 @@ class ComplianceChecker:
             'full_number': udyam_number
         }
     
+    def validate_gst_many(self, gst_numbers):
+        """Bulk GSTIN validation with checksum: GST_RESULT array (modules.bulk_validation)"""
+        return validate_gst_many(gst_numbers, self.config.GST_CHECKSUM_REQUIRED)
+    
+    def validate_pan_many(self, pan_numbers):
+        """Bulk PAN validation: PAN_RESULT array (modules.bulk_validation)"""
+        return validate_pan_many(pan_numbers)
+    
+    def validate_udyam_many(self, udyam_numbers):
+        """Bulk Udyam validation: UDYAM_RESULT array (modules.bulk_validation)"""
+        return validate_udyam_many(udyam_numbers)
+    
     def check_date_validity(self, date_str, cert_type):
         """Enhanced date validation"""
         if not date_str:
             return {'valid': False, 'error': 'No date'}
         
-        date_formats = [
-            '%d-%m-%Y', '%d/%m/%Y', '%Y-%m-%d',
-            '%d %b %Y', '%d %B %Y', '%B %d, %Y'
-        ]
-        
-        cert_date = None
-        for fmt in date_formats:
-            try:
-                cert_date = datetime.strptime(str(date_str).strip(), fmt)
-                break
-            except:
-                continue
-        
+        cert_date = self.date_parser.parse(date_str)
         if not cert_date:
             return {'valid': False, 'error': 'Cannot parse date'}
         
         today = datetime.now()
-        validity_days = (
-            self.config.UDYAM_VALIDITY_DAYS if cert_type.lower() == 'udyam'
-            else self.config.GST_VALIDITY_DAYS
-        )
-        
-        expiry = cert_date + timedelta(days=validity_days)
+        expiry = datetime.combine(cert_date, datetime.min.time()) + timedelta(days=self._validity_days(cert_type))
         days_left = (expiry - today).days
         
         if days_left < 0:
@@ -152,33 +173,31 @@ class ComplianceChecker:
             'original_date': date_str
         }
     
+    def check_date_validity_many(self, date_strs, cert_type, source=None):
+        """Bulk check_date_validity: DATE_RESULT array (modules.bulk_validation)"""
+        dates = self.date_parser.parse_many(date_strs, source or cert_type.lower())
+        return check_expiry_many(date_strs, dates, self._validity_days(cert_type))
+    
+    def _validity_days(self, cert_type):
+        return (
+            self.config.UDYAM_VALIDITY_DAYS if cert_type.lower() == 'udyam'
+            else self.config.GST_VALIDITY_DAYS
+        )
+    
     def check_name_consistency(self, names_list):
-        """Fuzzy name matching"""
+        """Fuzzy name matching (modules.name_matching.name_similarity)"""
         if not names_list or len(names_list) < 2:
             return {'consistent': True, 'message': 'Single name'}
         
-        def clean_name(name):
-            name = str(name).lower().strip()
-            replacements = {
-                'pvt ltd': 'private limited',
-                'pvt. ltd.': 'private limited',
-                'llp': 'limited liability partnership',
-                'limited': '',
-                'private': ''
-            }
-            for old, new in replacements.items():
-                name = name.replace(old, new)
-            return re.sub(r'[^\w\s]', '', name).strip()
-        
-        cleaned = [clean_name(n) for n in names_list if n]
-        if len(cleaned) < 2:
+        names = [n for n in names_list if n]
+        if len(names) < 2:
             return {'consistent': True, 'message': 'Not enough names to compare'}
         
-        base = cleaned[0]
+        base = names[0]
         
-        for name in cleaned[1:]:
-            similarity = SequenceMatcher(None, base, name).ratio()
-            if similarity < 0.75:
+        for name in names[1:]:
+            similarity = name_similarity(base, name)
+            if similarity < self.config.NAME_MATCH_THRESHOLD:
                 return {
                     'consistent': False,
                     'error': f'Name mismatch (similarity: {similarity:.1%})',
@@ -219,8 +238,7 @@ class ComplianceChecker:
     
     def check_signature_presence(self, text_data):
         """Signature detection with confidence"""
-        all_text = ' '.join([item['text'] for item in text_data])
-        all_text_lower = all_text.lower()
+        all_text_lower = TextData.of(text_data).lower
         
         keywords = [
             'signature', 'signed', 'authorized signatory',
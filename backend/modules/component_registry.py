@@ -0,0 +1,116 @@
+# ==================== modules/component_registry.py ====================
+"""
+Process-wide registry of warm pipeline components.
+
+DocumentProcessor, ComplianceChecker, EnhancedAIAnalyzer, ReportGenerator,
+the ExtractionStage worker pool, the vendor name index and the registry
+snapshot hold no per-request state, but building them is expensive: the
+analyzer deserialises models/classifier.pkl and configures Gemini, the OCR
+processor probes Tesseract paths, the pool spawns processes and the index
+loads (or builds) the vendor master's trigram arrays. The registry builds
+each of them once per worker process and hands out a fresh EvidenceTracker
+per request.
+"""
+
+import os
+import threading
+
+from modules.document_processor import DocumentProcessor
+from modules.compliance_checker import ComplianceChecker
+from modules.enhanced_ai_analyzer import EnhancedAIAnalyzer
+from modules.evidence_tracker import EvidenceTracker
+from modules.report_generator import ReportGenerator
+from modules.extraction_pipeline import ExtractionStage
+from modules.name_matching import load_vendor_index
+from modules.registry_snapshot import load_registry_snapshot
+
+
+class ComponentRegistry:
+    """Thread-safe, lazily built set of shared components"""
+
+    FACTORIES = {
+        'processor': DocumentProcessor,
+        'checker': ComplianceChecker,
+        'analyzer': EnhancedAIAnalyzer,
+        'report_generator': ReportGenerator,
+        'extraction_stage': ExtractionStage,
+        # None when no VENDOR_MASTER_PATH is configured
+        'vendor_index': load_vendor_index,
+        # None when no REGISTRY_SNAPSHOT_PATH is configured; the file is mapped, not read
+        'registry_snapshot': load_registry_snapshot,
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._components = {}
+        self._pid = os.getpid()
+
+    def get(self, name):
+        """Return the shared component, building it on first use"""
+        self._reset_after_fork()
+
+        # Membership, not truthiness: a factory may build None (an unconfigured feature)
+        if name not in self._components:
+            with self._lock:
+                if name not in self._components:
+                    self._components[name] = self.FACTORIES[name]()
+        return self._components[name]
+
+    @property
+    def processor(self):
+        return self.get('processor')
+
+    @property
+    def checker(self):
+        return self.get('checker')
+
+    @property
+    def analyzer(self):
+        return self.get('analyzer')
+
+    @property
+    def report_generator(self):
+        return self.get('report_generator')
+
+    @property
+    def extraction_stage(self):
+        return self.get('extraction_stage')
+
+    @property
+    def vendor_index(self):
+        return self.get('vendor_index')
+
+    @property
+    def registry_snapshot(self):
+        return self.get('registry_snapshot')
+
+    def new_tracker(self, listener=None):
+        """EvidenceTracker accumulates per-request evidence, so never share it"""
+        return EvidenceTracker(listener=listener)
+
+    def warm_up(self):
+        """Build every shared component now instead of on the first request"""
+        for name in self.FACTORIES:
+            self.get(name)
+        print(f"🔥 Warm components ready in worker {os.getpid()}: {', '.join(self.FACTORIES)}")
+
+    def is_built(self, name):
+        return name in self._components
+
+    def _reset_after_fork(self):
+        # gunicorn --preload forks after import; gRPC clients behind Gemini
+        # are not fork-safe, so a child rebuilds its own components.
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._components = {}
+                    self._lock = threading.Lock()
+                    self._pid = os.getpid()
+
+
+_registry = ComponentRegistry()
+
+
+def get_registry():
+    """Registry shared by every request handled in this process"""
+    return _registry
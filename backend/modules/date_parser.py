@@ -0,0 +1,202 @@
+# ==================== modules/date_parser.py ====================
+"""
+Certificate date parsing in one regex pass.
+
+check_date_validity used to try six strptime formats in turn and treat each
+ValueError as "try the next one", and extract_dates ran three overlapping
+regexes (an ISO date also matched as DD-MM-YY). DATE_PATTERN is a single
+alternation over the layouts Indian certificates use:
+
+- DD-MM-YYYY and DD/MM/YYYY (and two-digit years)
+- ISO YYYY-MM-DD
+- "15 Dec 2023" / "15 December, 2023"
+- "December 15, 2023"
+
+Every alternative captures day, month and year in named groups, so the
+matched text is never parsed again. parse_many() parses a whole column
+into a datetime64[D] array for registry-scale expiry checks, and remembers
+which layout won for each source (a registry column) so the values the
+character-matrix pass leaves over try that layout first. Single parse()
+calls go straight to the alternation: a layout lookup and a failed
+fullmatch cost more than the alternation saves on one value.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from datetime import date
+
+import numpy as np
+
+from config import Config
+
+MONTHS = {name: number for number, name in enumerate(
+    ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'), 1)}
+
+_DAY = r'(?P<d>3[01]|[12]\d|0?[1-9])'
+_MONTH = r'(?P<m>1[0-2]|0?[1-9])'
+_MONTH_NAME = (r'(?P<mon>jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?'
+               r'|sep(?:t|tember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?')
+
+# Layout name -> pattern with d/m/mon/y groups. ISO comes first: at a given
+# position it is the only layout starting with four digits.
+FORMATS = {
+    'ymd': rf'(?P<y>\d{{4}})(?P<sep>[-/]){_MONTH}(?P=sep){_DAY}',
+    'dmy': rf'{_DAY}(?P<sep>[-/]){_MONTH}(?P=sep)(?P<y>\d{{4}}|\d{{2}})',
+    'd_mon_y': rf'{_DAY}\s+{_MONTH_NAME},?\s+(?P<y>\d{{4}}|\d{{2}})',
+    'mon_d_y': rf'\b{_MONTH_NAME}\s+{_DAY},?\s+(?P<y>\d{{4}})',
+}
+
+
+def _prefixed(name, pattern):
+    """Group names made unique per layout so the layouts can share one regex"""
+    return re.sub(r'\(\?P([<=])', lambda m: f'(?P{m.group(1)}{name}_', pattern)
+
+
+_ALTERNATION = '|'.join(f'(?P<{name}>{_prefixed(name, pattern)})' for name, pattern in FORMATS.items())
+
+# Group 1 is the whole date, which is what PatternEngine reports as the value
+DATE_PATTERN = f'(?P<date>(?<!\\d)(?:{_ALTERNATION})(?!\\d))'
+
+# Unwrapped for whole-string parsing: the layout group is the last one to close, so m.lastgroup names it
+_PARSE_RE = re.compile(_ALTERNATION, re.IGNORECASE)
+_FORMAT_RES = {name: re.compile(_prefixed(name, pattern), re.IGNORECASE) for name, pattern in FORMATS.items()}
+
+# Layout -> ((day, month, year) group names, month given by name)
+_GROUPS = {
+    name: (tuple(f'{name}_{group}' for group in ('d', 'mon' if '(?P<mon>' in pattern else 'm', 'y')),
+           '(?P<mon>' in pattern)
+    for name, pattern in FORMATS.items()
+}
+
+# Zero-padded numeric layouts parse_many decodes as a character matrix:
+# (day, month, year) column slices and the two separator columns
+_FIXED_LAYOUTS = {
+    'dmy': ((slice(0, 2), slice(3, 5), slice(6, 10)), (2, 5)),
+    'ymd': ((slice(8, 10), slice(5, 7), slice(0, 4)), (4, 7)),
+}
+_FIXED_WIDTH = 10
+_SEPARATORS = np.array([ord('-'), ord('/')], dtype=np.uint32)
+
+
+def _format_of(m):
+    for name in FORMATS:
+        if m.group(name) is not None:
+            return name
+    return None
+
+
+def _components(m, fmt):
+    """(year, month, day) ints from a match of layout `fmt`; not checked against the calendar"""
+    names, month_name = _GROUPS[fmt]
+    day, month, year = m.group(*names)
+    year = int(year)
+    if year < 100:
+        # strptime's %y pivot
+        year += 2000 if year < 69 else 1900
+    return year, MONTHS[month[:3].lower()] if month_name else int(month), int(day)
+
+
+def _to_date(m, fmt):
+    try:
+        return date(*_components(m, fmt))
+    except ValueError:
+        # 31-02-2024: the regex bounds day and month separately
+        return None
+
+
+def date_fields(m):
+    """PatternEngine converter for DATE_PATTERN matches: {'date': ISO date}, or None for 31-02"""
+    value = _to_date(m, _format_of(m))
+    return {'date': value.isoformat()} if value else None
+
+
+class DateParser:
+    """Parses certificate dates; parse_many tries each source's last winning layout first"""
+
+    def __init__(self, cache_size=None):
+        self.cache_size = Config.DATE_FORMAT_CACHE_SIZE if cache_size is None else cache_size
+        self._formats = OrderedDict()  # source -> layout name, oldest first
+        self._lock = threading.Lock()
+
+    def format_for(self, source):
+        """Layout last seen for `source`, or None"""
+        # Lookups skip the lock: a dict read is atomic and this runs once per date
+        return self._formats.get(source) if source is not None else None
+
+    def _remember(self, source, fmt):
+        if source is None or self.cache_size <= 0:
+            return
+        with self._lock:
+            self._formats[source] = fmt
+            self._formats.move_to_end(source)
+            while len(self._formats) > self.cache_size:
+                self._formats.popitem(last=False)
+
+    def _match(self, text, preferred):
+        """(match, layout) for the whole of `text`, trying `preferred` first"""
+        if preferred is not None:
+            m = _FORMAT_RES[preferred].fullmatch(text)
+            if m:
+                return m, preferred
+        m = _PARSE_RE.fullmatch(text)
+        return (m, m.lastgroup) if m else (None, None)
+
+    def parse(self, value):
+        """datetime.date for a date string, or None if it is not one"""
+        if value is None:
+            return None
+        m = _PARSE_RE.fullmatch(str(value).strip())
+        return _to_date(m, m.lastgroup) if m else None
+
+    def parse_many(self, values, source=None):
+        """
+        datetime64[D] array with one entry per value, NaT where a value is
+        not a date.
+
+        DD-MM-YYYY and YYYY-MM-DD values, which are most of a registry
+        export, are decoded as a character matrix with array operations. Only
+        the other values go through the regex one by one. The calendar check
+        runs on the whole array.
+        """
+        preferred = self.format_for(source)
+        texts = ['' if value is None else str(value).strip() for value in values]
+        count = len(texts)
+        years = np.zeros(count, dtype=np.int64)
+        months = np.ones(count, dtype=np.int64)
+        days = np.ones(count, dtype=np.int64)
+        counts = {}
+
+        lengths = np.fromiter(map(len, texts), dtype=np.int64, count=count)
+        # A fixed-width unicode array is a UCS-4 code point matrix; longer texts are cut but fail the length test
+        chars = np.array(texts, dtype=f'<U{_FIXED_WIDTH}').view(np.uint32).reshape(count, _FIXED_WIDTH)
+        digits = chars.astype(np.int64) - ord('0')
+        is_digit = (digits >= 0) & (digits <= 9)
+        pending = np.ones(count, dtype=bool)
+        for fmt, (fields, (sep_a, sep_b)) in _FIXED_LAYOUTS.items():
+            ok = (pending & (lengths == _FIXED_WIDTH) & (chars[:, sep_a] == chars[:, sep_b])
+                  & np.isin(chars[:, sep_a], _SEPARATORS))
+            for part in fields:
+                ok &= is_digit[:, part].all(axis=1)
+            day, month, year = (digits[:, part] @ 10 ** np.arange(part.stop - part.start - 1, -1, -1)
+                                for part in fields)
+            ok &= (day >= 1) & (day <= 31) & (month >= 1) & (month <= 12)
+            years[ok], months[ok], days[ok] = year[ok], month[ok], day[ok]
+            pending &= ~ok
+            counts[fmt] = int(ok.sum())
+
+        for i in np.flatnonzero(pending).tolist():
+            m, fmt = self._match(texts[i], preferred)
+            if m is not None:
+                years[i], months[i], days[i] = _components(m, fmt)
+                counts[fmt] = counts.get(fmt, 0) + 1
+        if any(counts.values()):
+            winner = max(counts, key=counts.get)
+            if winner != preferred:
+                self._remember(source, winner)
+
+        matched = years > 0
+        month_start = np.where(matched, (years - 1970) * 12 + months - 1, 0).astype('datetime64[M]')
+        first = month_start.astype('datetime64[D]')
+        month_days = ((month_start + 1).astype('datetime64[D]') - first).astype(np.int64)
+        return np.where(matched & (days <= month_days), first + (days - 1), np.datetime64('NaT'))
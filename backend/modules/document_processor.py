@@ -3,16 +3,177 @@ import pdfplumber
 import re
 from datetime import datetime
 import os
+from functools import lru_cache
 from config import Config
 from modules.advanced_ocr import AdvancedOCRProcessor
+from modules.datadog_client import increment
+from modules.extraction_plans import get_plan
+from modules.ocr_layout import ocr_records
+from modules.pattern_engine import (
+    PatternEngine, document_specs, DOCUMENT_CONVERTERS, COMPANY_NAME_KEYS, DATE_KEYS, PRICE_KEYS
+)
+from modules.text_data import TextData
+
+# Part of every ExtractionCache key: bump whenever extract_all_text output changes
+EXTRACTION_PIPELINE_VERSION = "8"
+
+
+def _line_records(page_num, page_text):
+    """One 'text' record per non-empty line of a page"""
+    records = []
+    if page_text:
+        for line_num, line in enumerate(page_text.split('\n'), 1):
+            if line.strip():
+                records.append({
+                    'page': page_num,
+                    'line': line_num,
+                    'text': line.strip(),
+                    'type': 'text',
+                    'confidence': 1.0
+                })
+    return records
+
+
+def _table_records(page_num, tables):
+    """One 'table' record per non-empty row; tables are lists of rows of cells"""
+    records = []
+    for table_num, table in enumerate(tables or [], 1):
+        for row_num, row in enumerate(table, 1):
+            row_text = ' '.join([str(cell) for cell in row if cell])
+            if row_text.strip():
+                records.append({
+                    'page': page_num,
+                    'line': f"table{table_num}_row{row_num}",
+                    'text': row_text.strip(),
+                    'type': 'table',
+                    'confidence': 1.0
+                })
+    return records
+
+
+class PDFTextBackend:
+    """Reads the text layer of a PDF, one list of records per page"""
+    
+    name = None
+    
+    def iter_page_parts(self, pdf_path):
+        """
+        Yield (page_num, line_records, read_tables) for each page in order.
+        
+        read_tables() returns the page's 'table' records; it is only valid
+        until the next page is requested, and callers may skip it.
+        """
+        raise NotImplementedError
+    
+    def iter_pages(self, pdf_path):
+        """Yield the 'text'/'table' records of each page in order"""
+        for page_num, lines, read_tables in self.iter_page_parts(pdf_path):
+            yield lines + read_tables()
+
+
+class PdfplumberBackend(PDFTextBackend):
+    """pdfplumber: per-character layout analysis plus ruled-table detection"""
+    
+    name = 'pdfplumber'
+    
+    def iter_page_parts(self, pdf_path):
+        with pdfplumber.open(pdf_path) as pdf:
+            for page_num, page in enumerate(pdf.pages, 1):
+                yield (page_num, _line_records(page_num, page.extract_text()),
+                       lambda: _table_records(page_num, page.extract_tables()))
+
+
+class PyMuPDFBackend(PDFTextBackend):
+    """PyMuPDF (MuPDF in C): text in reading order, tables only on pages with vector drawings"""
+    
+    name = 'pymupdf'
+    
+    # pdfplumber's default vertical tolerance when grouping characters into lines
+    LINE_TOLERANCE = 3
+    
+    def __init__(self):
+        import fitz
+        self.fitz = fitz
+    
+    def iter_page_parts(self, pdf_path):
+        with self.fitz.open(pdf_path) as doc:
+            for page_num, page in enumerate(doc, 1):
+                yield (page_num, _line_records(page_num, self._page_text(page)),
+                       lambda: self._page_tables(page_num, page))
+    
+    def _page_tables(self, page_num, page):
+        # Like pdfplumber's default strategy, tables are found from ruling
+        # lines; a page without drawings cannot have any
+        if not page.get_cdrawings():
+            return []
+        return _table_records(page_num, [table.extract() for table in page.find_tables().tables])
+    
+    def _page_text(self, page):
+        """Visual lines like pdfplumber's: words clustered by top edge, then left to right"""
+        words = sorted(page.get_text('words'), key=lambda w: w[1])
+        lines = []
+        last_top = None
+        for word in words:
+            if last_top is None or word[1] - last_top > self.LINE_TOLERANCE:
+                lines.append([])
+            lines[-1].append(word)
+            last_top = word[1]
+        return '\n'.join(' '.join(w[4] for w in sorted(line, key=lambda w: w[0])) for line in lines)
+
+
+class PyPDF2Backend(PDFTextBackend):
+    """PyPDF2: pure-Python content stream decoding, no table detection"""
+    
+    name = 'pypdf2'
+    
+    def __init__(self):
+        import PyPDF2
+        self.PyPDF2 = PyPDF2
+    
+    def iter_page_parts(self, pdf_path):
+        with open(pdf_path, 'rb') as f:
+            for page_num, page in enumerate(self.PyPDF2.PdfReader(f).pages, 1):
+                yield page_num, _line_records(page_num, page.extract_text()), list
+
+
+PDF_TEXT_BACKENDS = {
+    'pdfplumber': PdfplumberBackend,
+    'pymupdf': PyMuPDFBackend,
+    'pypdf2': PyPDF2Backend,
+}
+
+
+def get_pdf_text_backend(name=None):
+    """Instantiate the backend named by `name` (default Config.PDF_TEXT_BACKEND)"""
+    name = (name or Config.PDF_TEXT_BACKEND).lower()
+    backend_class = PDF_TEXT_BACKENDS.get(name)
+    if backend_class is None:
+        print(f"⚠️ Unknown PDF text backend '{name}', using pdfplumber")
+        return PdfplumberBackend()
+    try:
+        return backend_class()
+    except ImportError as e:
+        print(f"⚠️ PDF text backend '{name}' unavailable ({e}), using pdfplumber")
+        return PdfplumberBackend()
 
 class DocumentProcessor:
     def __init__(self):
         self.config = Config()
         self.ocr_processor = AdvancedOCRProcessor()
+        self.patterns = PatternEngine(document_specs(), converters=DOCUMENT_CONVERTERS)
+        self.pdf_backend = get_pdf_text_backend()
+        
+    def extract_all_text(self, file_path, doc_type=None):
+        """
+        HYBRID extraction: Try PDF text first, then OCR for image-based PDFs
         
-    def extract_all_text(self, file_path):
-        """HYBRID extraction: Try PDF text first, then OCR for image-based PDFs"""
+        doc_type ('gst', 'pan', ...) selects an early-exit ExtractionPlan;
+        without one the whole document is extracted. Returns a TextData.
+        """
+        return TextData.of(self._extract_records(file_path, doc_type))
+    
+    def _extract_records(self, file_path, doc_type=None):
+        """Extraction records (list of dicts) before they are packed into TextData"""
         
         if not os.path.exists(file_path):
             print(f"❌ File not found: {file_path}")
@@ -22,6 +183,9 @@ class DocumentProcessor:
         
         # Handle PDF files
         if file_ext == '.pdf':
+            plan = get_plan(doc_type)
+            if plan:
+                return self._planned_pdf_extraction(file_path, plan)
             return self._hybrid_pdf_extraction(file_path)
         
         # Handle image files
@@ -33,19 +197,14 @@ class DocumentProcessor:
             return []
     
     def _hybrid_pdf_extraction(self, pdf_path):
-        """Hybrid PDF extraction: text + OCR for image-based"""
-        
-        text_data = []
+        """Hybrid PDF extraction: text layer per page, OCR only for pages without one"""
         
-        # First attempt: Extract text using pdfplumber
-        text_data = self._extract_text_from_pdf(pdf_path)
+        # First attempt: Extract the text layer page by page (Config.PDF_TEXT_BACKEND)
+        pages = self._extract_pdf_pages(pdf_path)
         
-        # Check if we got enough text
-        total_text = sum(len(item['text']) for item in text_data)
-        
-        # If insufficient text (< 100 chars), likely an image-based PDF
-        if total_text < 100:
-            print(f"  ⚠️ Low text extraction ({total_text} chars), using OCR...")
+        if not pages:
+            # The text backend could not read the file at all: OCR the whole document
+            print(f"  ⚠️ No text layer readable, using OCR...")
             ocr_data = self.ocr_processor.extract_from_image_based_pdf(pdf_path)
             
             if ocr_data and len(ocr_data) > 0:
@@ -55,81 +214,124 @@ class DocumentProcessor:
                 print(f"  ⚠️ OCR also failed, using fallback")
                 return self._fallback_extraction(pdf_path)
         
-        print(f"  ✅ Text-based PDF: Extracted {len(text_data)} elements")
+        # Pages with too little text (< OCR_PAGE_TEXT_THRESHOLD chars) are likely scans
+        page_chars = [sum(len(item['text']) for item in items) for items in pages]
+        scanned = [page_num for page_num, chars in enumerate(page_chars, 1)
+                   if chars < Config.OCR_PAGE_TEXT_THRESHOLD]
+        
+        increment("govdoc.extraction.pages", value=len(pages) - len(scanned), tags=["route:text"])
+        if not scanned:
+            text_data = [item for items in pages for item in items]
+            print(f"  ✅ Text-based PDF: Extracted {len(text_data)} elements")
+            return text_data
+        
+        increment("govdoc.extraction.pages", value=len(scanned), tags=["route:ocr"])
+        print(f"  ⚠️ Low text on {len(scanned)}/{len(pages)} pages, using OCR for pages {scanned}...")
+        ocr_pages = self.ocr_processor.extract_from_pdf_pages(pdf_path, scanned)
+        
+        # Merge in page order: OCR results replace the thin text layer of scanned pages
+        text_data = []
+        for page_num, items in enumerate(pages, 1):
+            text_data.extend(ocr_pages.get(page_num) or items)
+        
+        if not any(ocr_pages.values()) and sum(page_chars) < Config.OCR_PAGE_TEXT_THRESHOLD:
+            print(f"  ⚠️ OCR also failed, using fallback")
+            return self._fallback_extraction(pdf_path)
+        
+        print(f"  ✅ Hybrid PDF: {len(text_data)} elements "
+              f"({len(pages) - len(scanned)} text pages, {len(scanned)} OCR pages)")
         return text_data
     
-    def _extract_text_from_pdf(self, pdf_path):
-        """Extract text from regular PDF"""
+    def _planned_pdf_extraction(self, pdf_path, plan):
+        """Page-by-page extraction that stops once the plan's fields are found"""
+        
         text_data = []
+        pages_read = 0
+        satisfied = False
         
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for page_num, page in enumerate(pdf.pages, 1):
-                    page_text = page.extract_text()
-                    
-                    if page_text:
-                        lines = page_text.split('\n')
-                        for line_num, line in enumerate(lines, 1):
-                            if line.strip():
-                                text_data.append({
-                                    'page': page_num,
-                                    'line': line_num,
-                                    'text': line.strip(),
-                                    'type': 'text',
-                                    'confidence': 1.0
-                                })
-                    
-                    # Extract tables
-                    tables = page.extract_tables()
-                    if tables:
-                        for table_num, table in enumerate(tables, 1):
-                            for row_num, row in enumerate(table, 1):
-                                row_text = ' '.join([str(cell) for cell in row if cell])
-                                if row_text.strip():
-                                    text_data.append({
-                                        'page': page_num,
-                                        'line': f"table{table_num}_row{row_num}",
-                                        'text': row_text.strip(),
-                                        'type': 'table',
-                                        'confidence': 1.0
-                                    })
+            for page_num, lines, read_tables in self.pdf_backend.iter_page_parts(pdf_path):
+                pages_read += 1
+                page_items = lines
+                satisfied = plan.satisfied_by(self.patterns, lines)
+                
+                if not satisfied:
+                    page_items = lines + read_tables()
+                    if sum(len(item['text']) for item in page_items) < Config.OCR_PAGE_TEXT_THRESHOLD:
+                        increment("govdoc.extraction.pages", tags=["route:ocr"])
+                        ocr_items = self.ocr_processor.extract_from_pdf_pages(pdf_path, [page_num]).get(page_num)
+                        page_items = ocr_items or page_items
+                    else:
+                        increment("govdoc.extraction.pages", tags=["route:text"])
+                    satisfied = plan.satisfied_by(self.patterns, page_items)
+                else:
+                    increment("govdoc.extraction.pages", tags=["route:text"])
+                
+                text_data.extend(page_items)
+                if satisfied:
+                    break
         except Exception as e:
-            print(f"  ⚠️ pdfplumber error: {e}")
+            print(f"  ⚠️ {self.pdf_backend.name} error: {e}")
         
+        if satisfied:
+            increment("govdoc.extraction.early_exit", tags=[f"type:{plan.doc_type}"])
+            print(f"  ⚡ {plan.doc_type.upper()} fields found on page {pages_read}: "
+                  f"Extracted {len(text_data)} elements, remaining pages skipped")
+            return text_data
+        
+        if not text_data:
+            # Unreadable or empty: same OCR/fallback chain as a full extraction
+            return self._fallback_extraction(pdf_path) if pages_read else self._hybrid_pdf_extraction(pdf_path)
+        
+        print(f"  ✅ PDF: Extracted {len(text_data)} elements from {pages_read} pages")
         return text_data
     
+    def _extract_text_from_pdf(self, pdf_path):
+        """Extract text from regular PDF"""
+        return [item for items in self._extract_pdf_pages(pdf_path) for item in items]
+    
+    def _extract_pdf_pages(self, pdf_path):
+        """Extract the text layer of each page: [[items of page 1], [items of page 2], ...]"""
+        pages = []
+        
+        try:
+            for text_data in self.pdf_backend.iter_pages(pdf_path):
+                pages.append(text_data)
+        except Exception as e:
+            print(f"  ⚠️ {self.pdf_backend.name} error: {e}")
+        
+        return pages
+    
     def _extract_from_image(self, image_path):
         """Extract text from image file"""
         print(f"  Processing image: {os.path.basename(image_path)}")
         
         try:
+            import numpy as np
             from PIL import Image
-            import pytesseract
             
             # Open and process image
             img = Image.open(image_path)
             
-            # Extract text with details
-            ocr_data = pytesseract.image_to_data(
-                img, 
-                output_type=pytesseract.Output.DICT,
-                config='--psm 6'
-            )
+            # The same photo often comes back re-sent with different metadata
+            cache_key = self.ocr_processor.page_cache_key(np.array(img), 'image')
+            cached = self.ocr_processor.cached_page(cache_key, 1)
+            if cached is not None:
+                print(f"  ♻️ Image OCR served from page cache")
+                return cached[0]
             
-            text_data = []
-            n_boxes = len(ocr_data['text'])
-            for i in range(n_boxes):
-                text = ocr_data['text'][i].strip()
-                conf = int(ocr_data['conf'][i])
-                
-                if text and conf > 30:
-                    text_data.append({
-                        'page': 1,
-                        'line': ocr_data['line_num'][i],
-                        'text': text,
-                        'type': 'image_ocr',
-                        'confidence': conf / 100.0
-                    })
+            # Extract text with details (Config.OCR_ENGINE, shared with PDF OCR)
+            ocr_data = self.ocr_processor.engine.image_to_data(img, psm=6)
+            
+            text_data, _ = ocr_records(ocr_data, 1, 'image_ocr')
+            
+            # ID card photos: re-read GSTIN/PAN/Udyam regions the full-image pass garbled
+            roi_data = self.ocr_processor.read_missing_fields(np.array(img.convert('L')), text_data, 1)
+            if roi_data:
+                print(f"  🎯 ROI OCR recovered {len(roi_data)} identifier field(s)")
+                text_data.extend(roi_data)
+            
+            self.ocr_processor.cache_page(cache_key, text_data, None)
             
             print(f"  ✅ Extracted {len(text_data)} text elements from image")
             return text_data
@@ -169,30 +371,18 @@ class DocumentProcessor:
     
     def find_pattern(self, text_data, pattern, field_name, flags=re.IGNORECASE, debug=False):
         """Find patterns in text data with debug output"""
-        results = []
-        compiled_pattern = re.compile(pattern, flags)
-        
         if debug:
             print(f"    Looking for {field_name} with pattern: {pattern}")
             print(f"    Text to search: {' '.join([item['text'][:50] for item in text_data])}")
         
-        for item in text_data:
-            text = item['text']
-            matches = compiled_pattern.findall(text)
-            
-            for match in matches:
-                match_str = match if isinstance(match, str) else match[0]
-                
-                # Don't add duplicates
-                if not any(r['value'] == match_str for r in results):
-                    results.append({
-                        'field': field_name,
-                        'value': match_str,
-                        'page': item['page'],
-                        'line': item['line'],
-                        'snippet': text[:100],
-                        'confidence': item.get('confidence', 1.0)
-                    })
+        engine = self.patterns
+        key = engine.key_for(pattern, flags)
+        if key is None:
+            engine, key = _single_pattern_engine(pattern, flags, field_name), field_name
+        
+        results = engine.scan(text_data, [key])[key]
+        if results and results[0]['field'] != field_name:
+            results = [{**r, 'field': field_name} for r in results]
         
         if debug and not results:
             print(f"    No {field_name} found in text")
@@ -203,7 +393,9 @@ class DocumentProcessor:
     
     def _debug_find_similar(self, text_data, field_name):
         """Find similar patterns for debugging"""
-        all_text = ' '.join([item['text'] for item in text_data])
+        text_data = TextData.of(text_data)
+        all_text = text_data.joined
+        all_text_lower = text_data.lower
         
         if 'gst' in field_name.lower():
             # Look for GST-like patterns
@@ -212,7 +404,7 @@ class DocumentProcessor:
                 print(f"    Found GST-like patterns: {gst_like[:3]}")
             
             # Look for GST text
-            if 'gst' in all_text.lower():
+            if 'gst' in all_text_lower:
                 print(f"    'GST' text found in document")
         
         elif 'pan' in field_name.lower():
@@ -221,12 +413,12 @@ class DocumentProcessor:
             if pan_like:
                 print(f"    Found PAN-like patterns: {pan_like[:3]}")
             
-            if 'pan' in all_text.lower():
+            if 'pan' in all_text_lower:
                 print(f"    'PAN' text found in document")
         
         elif 'udyam' in field_name.lower():
             # Look for Udyam-like patterns
-            if 'udyam' in all_text.lower():
+            if 'udyam' in all_text_lower:
                 print(f"    'Udyam' text found in document")
             
             # Look for registration numbers
@@ -236,52 +428,20 @@ class DocumentProcessor:
     
     def extract_company_names(self, text_data):
         """Extract company names"""
-        patterns = [
-            r'(?:M/s\.?\s*)?([A-Z][A-Za-z\s&]{3,}(?:Pvt\.?\s*Ltd\.?|Private\s+Limited|Limited|LLP|LLC))',
-            r'Company\s*Name\s*[:]?\s*([A-Z][A-Za-z\s&]{3,})',
-            r'Business\s*Name\s*[:]?\s*([A-Z][A-Za-z\s&]{3,})',
-            r'Name\s*[:]?\s*([A-Z][A-Za-z\s&]{3,})'
-        ]
-        
-        names = []
-        for pattern in patterns:
-            matches = self.find_pattern(text_data, pattern, 'company_name')
-            names.extend(matches)
-        
-        return names
+        return self._scan_fields(text_data, COMPANY_NAME_KEYS)
     
     def extract_dates(self, text_data):
-        """Extract dates"""
-        date_patterns = [
-            r'\d{1,2}[-/]\d{1,2}[-/]\d{2,4}',
-            r'\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{2,4}',
-            r'\d{4}[-/]\d{1,2}[-/]\d{1,2}'
-        ]
-        
-        dates = []
-        for pattern in date_patterns:
-            matches = self.find_pattern(text_data, pattern, 'date')
-            dates.extend(matches)
-        
-        return dates
+        """Extract dates; each record also carries the parsed ISO 'date'"""
+        return self._scan_fields(text_data, DATE_KEYS)
     
     def extract_prices(self, text_data):
         """Extract prices"""
-        price_patterns = [
-            r'₹\s*[\d,]+(?:\.\d{2})?',
-            r'Rs\.?\s*[\d,]+(?:\.\d{2})?',
-            r'INR\s*[\d,]+(?:\.\d{2})?',
-            r'Total\s*[:]?\s*[\d,]+(?:\.\d{2})?',
-            r'\$\s*[\d,]+(?:\.\d{2})?',
-            r'[\d,]+(?:\.\d{2})?\s*(?:USD|EUR|GBP)'
-        ]
-        
-        prices = []
-        for pattern in price_patterns:
-            matches = self.find_pattern(text_data, pattern, 'price')
-            prices.extend(matches)
-        
-        return prices
+        return self._scan_fields(text_data, PRICE_KEYS)
+    
+    def _scan_fields(self, text_data, keys):
+        """One joined-buffer scan for a group of patterns, results concatenated in pattern order"""
+        found = self.patterns.scan(text_data, keys)
+        return [record for key in keys for record in found[key]]
     
     def debug_extracted_text(self, text_data, doc_type):
         """Show debug info about extracted text"""
@@ -292,14 +452,22 @@ class DocumentProcessor:
             print(f"    ❌ NO TEXT EXTRACTED")
             return
         
+        text_data = TextData.of(text_data)
+        
         # Show sample of extracted text
         print(f"    First 10 text elements:")
-        for i, item in enumerate(text_data[:10]):
-            print(f"      {i+1}. Page {item['page']}, Line {item['line']}: {item['text'][:80]}...")
+        for i in range(min(10, len(text_data))):
+            print(f"      {i+1}. Page {text_data.page(i)}, Line {text_data.line(i)}: {text_data.text(i)[:80]}...")
         
         # Show all extracted text combined
-        all_text = ' '.join([item['text'] for item in text_data])
+        all_text = text_data.joined
         print(f"\n    All text combined (first 500 chars):")
         print(f"    {all_text[:500]}...")
         
-        print(f"    {'-'*50}")
\ No newline at end of file
+        print(f"    {'-'*50}")
+
+
+@lru_cache(maxsize=64)
+def _single_pattern_engine(pattern, flags, field_name):
+    """Compiled engine for ad-hoc find_pattern calls outside the field set"""
+    return PatternEngine([(field_name, field_name, pattern, ())], flags)
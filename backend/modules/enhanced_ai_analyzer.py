@@ -30,7 +30,11 @@ class EnhancedAIAnalyzer:
     # --------------------------------------------------
     # MAIN ANALYSIS PIPELINE
     # --------------------------------------------------
-    def analyze_with_cross_check(self, extracted_data, validation_results, text_data):
+    def analyze_with_cross_check(self, extracted_data, validation_results, text_data, progress=None):
+        """
+        progress: optional callable(event, data). Receives 'model_decision'
+        before the (slow) Gemini call and 'gemini_advisory' after it.
+        """
         print("\n🔍 RUNNING COMPLIANCE ANALYSIS")
 
         # Step 1: Local AI
@@ -60,6 +64,16 @@ class EnhancedAIAnalyzer:
         # Step 6: Summary
         summary = self._generate_summary(final_decision, reasons)
 
+        if progress:
+            progress("model_decision", {
+                "decision": final_decision,
+                "confidence": confidence,
+                "reasons": reasons,
+                "summary": summary,
+                "local_decision": local_result["prediction"],
+                "rule_based_decision": rule_result["decision"],
+            })
+
         # Step 7: Gemini advisory (optional)
         gemini_verification = None
         if self.gemini_model:  # ✅ FIXED: Changed from self.gemini_client to self.gemini_model
@@ -67,6 +81,12 @@ class EnhancedAIAnalyzer:
                 extracted_data, validation_results
             )
 
+        if progress:
+            progress("gemini_advisory", {
+                "enabled": self.gemini_model is not None,
+                "verification": gemini_verification,
+            })
+
         result = {
             "success": True,
             "analysis": {
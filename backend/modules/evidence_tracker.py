@@ -10,10 +10,16 @@ from modules.datadog_client import increment, gauge
 class EvidenceTracker:
     """Evidence tracking with Datadog observability"""
     
-    def __init__(self):
+    def __init__(self, listener=None):
+        """
+        Args:
+            listener: Optional callable(kind, field_name, entry) notified of
+                      every recorded evidence ('evidence') or mismatch ('mismatch')
+        """
         self.config = Config()
         self.evidence = {}
         self.mismatches = []
+        self.listener = listener
         
     def add_evidence(self, field_name, value, page, line, snippet, status="found"):
         """
@@ -30,14 +36,18 @@ class EvidenceTracker:
         if field_name not in self.evidence:
             self.evidence[field_name] = []
         
-        self.evidence[field_name].append({
+        entry = {
             'value': value,
             'page': page,
             'line': line,
             'snippet': snippet[:150],
             'status': status,
             'timestamp': datetime.now().isoformat()
-        })
+        }
+        self.evidence[field_name].append(entry)
+        
+        if self.listener:
+            self.listener('evidence', field_name, entry)
         
         # 🎯 DATADOG METRIC: Track evidence generation (MANDATORY)
         increment("govdoc.evidence.generated", 
@@ -47,14 +57,18 @@ class EvidenceTracker:
         """Record a mismatch with Datadog tracking"""
         severity = self._calculate_severity(field_name)
         
-        self.mismatches.append({
+        entry = {
             'field': field_name,
             'expected': str(expected)[:100],
             'found': str(found)[:100],
             'location': location,
             'severity': severity,
             'timestamp': datetime.now().isoformat()
-        })
+        }
+        self.mismatches.append(entry)
+        
+        if self.listener:
+            self.listener('mismatch', field_name, entry)
         
         # 🎯 DATADOG METRIC: Track compliance mismatches
         increment("govdoc.compliance.mismatch",
@@ -0,0 +1,102 @@
+# ==================== modules/extraction_cache.py ====================
+"""
+Content-addressed cache of DocumentProcessor.extract_all_text results.
+
+The same GST/PAN/quotation files are uploaded again and again under new
+timestamped names. Entries are keyed by the SHA-256 of the file bytes plus
+EXTRACTION_PIPELINE_VERSION, so a repeat upload skips pdfplumber and OCR
+entirely. Values are stored pickled: that gives an exact byte size for the
+LRU budget and hands every caller its own copy of the text_data records
+(including OCR positions and confidences).
+"""
+
+import hashlib
+import pickle
+import threading
+from collections import OrderedDict
+
+from config import Config
+from modules.document_processor import EXTRACTION_PIPELINE_VERSION
+
+# 🎯 DATADOG METRICS
+from modules.datadog_client import increment, gauge
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """SHA-256 hex digest of a file, read in chunks"""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class ExtractionCache:
+    """Thread-safe, byte-bounded LRU of extraction results"""
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = Config.EXTRACTION_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(digest, variant=''):
+        return f"{digest}:{EXTRACTION_PIPELINE_VERSION}:{variant}"
+
+    def get(self, key):
+        with self._lock:
+            blob = self._entries.get(key)
+            if blob is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+
+        if blob is None:
+            increment("govdoc.extraction_cache.miss")
+            return None
+
+        increment("govdoc.extraction_cache.hit")
+        return pickle.loads(blob)
+
+    def put(self, key, text_data):
+        blob = pickle.dumps(text_data, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            return False
+
+        evicted = 0
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._entries[key] = blob
+            self._size += len(blob)
+            while self._size > self.max_bytes:
+                _, victim = self._entries.popitem(last=False)
+                self._size -= len(victim)
+                evicted += 1
+            self.evictions += evicted
+            size = self._size
+
+        if evicted:
+            increment("govdoc.extraction_cache.eviction", value=evicted)
+        gauge("govdoc.extraction_cache.bytes", size)
+        return True
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'pipeline_version': EXTRACTION_PIPELINE_VERSION
+            }
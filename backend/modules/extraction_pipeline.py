@@ -0,0 +1,182 @@
+# ==================== modules/extraction_pipeline.py ====================
+"""
+Concurrent per-document extraction stage for /analyze.
+
+Each uploaded document (GST, PAN, Udyam, quotation) is extracted in its own
+worker so a bundle of scanned documents costs roughly the slowest document
+rather than the sum. pdfplumber layout analysis and OpenCV preprocessing are
+CPU-bound Python, so the default executor is a process pool; the document
+handlers and cross-validation still run in the request thread afterwards.
+Pool processes OCR their document inline, without a nested OCR pool.
+Documents whose bytes were seen before are served from ExtractionCache.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from config import Config
+from modules.advanced_ocr import limit_child_threads
+from modules.document_processor import DocumentProcessor
+from modules.extraction_cache import ExtractionCache, file_digest
+from modules.extraction_plans import get_plan
+
+# 🎯 DATADOG METRICS
+from modules.datadog_client import increment
+
+
+# Built once per pool process by _init_worker
+_worker_processor = None
+
+
+def _init_worker():
+    global _worker_processor
+    _worker_processor = DocumentProcessor()
+    # Documents already run in parallel across these processes; an OCR pool
+    # in each would mean EXTRACTION_WORKERS x OCR_WORKERS OCR processes
+    _worker_processor.ocr_processor.workers = 1
+
+
+def _extract_in_worker(filepath, doc_type=None):
+    return _worker_processor.extract_all_text(filepath, doc_type)
+
+
+class ExtractionStage:
+    """Executor-backed extraction of all uploaded documents"""
+
+    def __init__(self, workers=None, executor_kind=None):
+        self.workers = Config.EXTRACTION_WORKERS if workers is None else workers
+        self.executor_kind = executor_kind or Config.EXTRACTION_EXECUTOR
+        self._executor = None
+        self._lock = threading.Lock()
+        self.cache = ExtractionCache() if Config.EXTRACTION_CACHE_ENABLED else None
+
+    def extract_one(self, filepath, processor, digest=None):
+        """Extract a single document through the result cache"""
+        key = self._cache_key(filepath, digest)
+        text_data = self._cache_get(key)
+        if text_data is None:
+            text_data = processor.extract_all_text(filepath)
+            self._cache_put(key, text_data)
+        return text_data
+
+    def extract_all(self, files, processor, on_result=None, digests=None, early_exit=False):
+        """
+        Extract every document in `files` ({doc_type: filepath}).
+
+        Returns {doc_type: text_data} in the same order as `files`.
+        `processor` is used for inline extraction and thread workers;
+        `on_result(doc_type, text_data)` is called as each document finishes.
+        With `early_exit`, GST/PAN/Udyam documents follow their ExtractionPlan
+        and may come back without their trailing pages. Only for callers that
+        need the fields alone: the model's features (text_length, dates,
+        payment terms, ...) are computed from the whole text.
+        Documents already in the result cache are not extracted again;
+        `digests` ({doc_type: sha256}) skips re-hashing files hashed on upload.
+        """
+        digests = digests or {}
+        results = {}
+        keys = {}
+        pending = {}
+        # Upload slot -> plan key passed to extract_all_text (None: whole document)
+        plans = {doc_type: doc_type if early_exit else None for doc_type in files}
+        for doc_type, path in files.items():
+            keys[doc_type] = self._cache_key(path, digests.get(doc_type), plans[doc_type])
+            cached = self._cache_get(keys[doc_type])
+            if cached is not None:
+                print(f"  ⚡ Extraction cache hit for {doc_type}: {os.path.basename(path)}")
+                results[doc_type] = cached
+                if on_result:
+                    on_result(doc_type, cached)
+            else:
+                pending[doc_type] = path
+
+        def finished(doc_type, text_data):
+            results[doc_type] = text_data
+            self._cache_put(keys[doc_type], text_data)
+            if on_result:
+                on_result(doc_type, text_data)
+
+        if self.workers <= 1 or len(pending) <= 1:
+            for doc_type, path in pending.items():
+                finished(doc_type, processor.extract_all_text(path, plans[doc_type]))
+            return {doc_type: results[doc_type] for doc_type in files}
+
+        print(f"\n⚡ Extracting {len(pending)} documents in parallel "
+              f"({self.executor_kind}, {min(self.workers, len(pending))} workers)")
+
+        executor = self._get_executor()
+        if self.executor_kind == 'thread':
+            futures = {executor.submit(processor.extract_all_text, path, plans[doc_type]): doc_type
+                       for doc_type, path in pending.items()}
+        else:
+            futures = {executor.submit(_extract_in_worker, path, plans[doc_type]): doc_type
+                       for doc_type, path in pending.items()}
+
+        for future in as_completed(futures):
+            doc_type = futures[future]
+            try:
+                text_data = future.result()
+            except BrokenProcessPool as e:
+                print(f"  ⚠️ Extraction worker died on {doc_type} ({e}), extracting inline")
+                increment("govdoc.extraction.worker_failed", tags=[f"type:{doc_type}"])
+                self._discard_executor(executor)
+                text_data = processor.extract_all_text(pending[doc_type], plans[doc_type])
+            finished(doc_type, text_data)
+        return {doc_type: results[doc_type] for doc_type in files}
+
+    def _cache_key(self, filepath, digest=None, doc_type=None):
+        if self.cache is None:
+            return None
+        try:
+            ext = os.path.splitext(filepath)[1].lower()
+            # Text backends differ slightly in line breaks and glyph mapping,
+            # and early-exit plans return only the leading pages
+            extent = doc_type if get_plan(doc_type) else 'full'
+            return self.cache.make_key(digest or file_digest(filepath),
+                                       f"{ext}:{Config.PDF_TEXT_BACKEND}:{extent}")
+        except OSError:
+            return None
+
+    def _cache_get(self, key):
+        return self.cache.get(key) if key is not None else None
+
+    def _cache_put(self, key, text_data):
+        # Empty results are usually transient failures (corrupt upload, OCR crash)
+        if key is not None and text_data:
+            self.cache.put(key, text_data)
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.executor_kind == 'thread':
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.workers,
+                            thread_name_prefix='extract'
+                        )
+                    else:
+                        # Each process OCRs its document inline, one Tesseract thread each
+                        limit_child_threads()
+                        self._executor = ProcessPoolExecutor(
+                            max_workers=self.workers,
+                            mp_context=multiprocessing.get_context(Config.EXTRACTION_MP_CONTEXT),
+                            initializer=_init_worker
+                        )
+                    print(f"✅ Extraction pool started in worker {os.getpid()}: "
+                          f"{self.workers} {self.executor_kind} workers")
+        return self._executor
+
+    def _discard_executor(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
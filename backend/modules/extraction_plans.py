@@ -0,0 +1,53 @@
+# ==================== modules/extraction_plans.py ====================
+"""
+Early-exit extraction plans per uploaded document type.
+
+The GST, PAN and Udyam handlers only use the first match of one pattern, so
+DocumentProcessor can read those documents page by page and stop as soon as
+the field is found with enough confidence. The first match of a full scan
+is on the earliest page that has one, so the handlers see the same value;
+trailing annexure pages are never parsed, and their tables or OCR are
+skipped. Quotations have no plan: company names, dates, prices and the
+signature check need the whole document.
+
+Plans are opt-in (ExtractionStage.extract_all(early_exit=True)): the
+analysis model's features are computed over the concatenated text of all
+documents, so /analyze and /jobs keep extracting every page.
+"""
+
+from config import Config
+
+
+class ExtractionPlan:
+    """Pattern keys a document type needs before extraction may stop"""
+
+    def __init__(self, doc_type, required_keys, min_confidence=None):
+        self.doc_type = doc_type
+        self.required_keys = list(required_keys)
+        self.min_confidence = min_confidence
+
+    def satisfied_by(self, engine, records):
+        """True if every required key matches in `records` with enough confidence"""
+        if not records:
+            return False
+        min_confidence = (Config.EXTRACTION_PLAN_MIN_CONFIDENCE
+                          if self.min_confidence is None else self.min_confidence)
+        found = engine.scan(records, self.required_keys)
+        return all(
+            any(match['confidence'] >= min_confidence for match in found[key])
+            for key in self.required_keys
+        )
+
+
+EXTRACTION_PLANS = {
+    'gst': ExtractionPlan('gst', ['gst_number']),
+    'pan': ExtractionPlan('pan', ['pan_number']),
+    'udyam': ExtractionPlan('udyam', ['udyam_number']),
+}
+
+
+def get_plan(doc_type):
+    """Plan for an upload slot ('gst', 'pan', ...), or None for full extraction"""
+    if not doc_type or not Config.EXTRACTION_EARLY_EXIT:
+        return None
+    return EXTRACTION_PLANS.get(doc_type)
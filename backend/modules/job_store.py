@@ -0,0 +1,425 @@
+# ==================== modules/job_store.py ====================
+"""
+Asynchronous analysis jobs backed by a local SQLite (WAL) queue.
+
+POST /jobs saves the uploads and enqueues a row; JobRunner threads in every
+gunicorn worker claim queued rows with a lease, run the normal analysis
+pipeline and store the payload for GET /jobs/<id>. A job whose worker died
+keeps an expired lease and is claimed again after restart. Completion
+webhooks are queued in the same table and retried with exponential backoff,
+so they also survive restarts.
+
+Webhook URLs come from clients, so check_webhook_url() only accepts hosts
+that resolve to public addresses (or are in WEBHOOK_ALLOWED_HOSTS), both on
+submit and again on every delivery. Delivery connects to the address that
+passed the check and does not follow redirects, so DNS rebinding or a 30x
+cannot point it at loopback, RFC 1918, link-local or metadata addresses.
+"""
+
+import http.client
+import ipaddress
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import urllib.parse
+import uuid
+from datetime import datetime
+
+from config import Config
+
+# 🎯 DATADOG METRICS
+from modules.datadog_client import increment, timing
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    files TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker_id TEXT,
+    lease_expires REAL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    webhook_url TEXT,
+    webhook_status TEXT,
+    webhook_attempts INTEGER NOT NULL DEFAULT 0,
+    webhook_next_at REAL,
+    webhook_error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_queue ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_webhooks ON jobs (webhook_status, webhook_next_at);
+"""
+
+# Job states
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+_WORKER_LOST_ERROR = json.dumps({'success': False, 'error': 'Worker lost while processing job'})
+
+
+def _iso(ts):
+    return datetime.fromtimestamp(ts).isoformat() if ts else None
+
+
+def check_webhook_url(url):
+    """
+    (scheme, host, port, path, address to connect to) for a webhook URL.
+
+    Raises ValueError unless it is an http(s) URL whose host is in
+    WEBHOOK_ALLOWED_HOSTS or, without an allowlist, resolves only to public
+    addresses.
+    """
+    try:
+        parts = urllib.parse.urlsplit(url)
+        port = parts.port
+    except ValueError:
+        raise ValueError('webhook_url is not a valid URL')
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise ValueError('webhook_url must be an http(s) URL')
+    host = parts.hostname.lower()
+    port = port or (443 if parts.scheme == 'https' else 80)
+
+    try:
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError):
+        raise ValueError(f'webhook host {host} does not resolve')
+    # Scoped IPv6 addresses carry a %interface suffix
+    addresses = [ipaddress.ip_address(info[4][0].split('%')[0]) for info in infos]
+
+    if Config.WEBHOOK_ALLOWED_HOSTS:
+        if host not in Config.WEBHOOK_ALLOWED_HOSTS:
+            raise ValueError(f'webhook host {host} is not in WEBHOOK_ALLOWED_HOSTS')
+    else:
+        # Every address, not just the first: a client may be handed any of them
+        blocked = next((address for address in addresses if not address.is_global), None)
+        if blocked is not None:
+            raise ValueError(f'webhook host {host} resolves to a non-public address ({blocked})')
+
+    path = parts.path or '/'
+    if parts.query:
+        path += f'?{parts.query}'
+    return parts.scheme, host, port, path, str(addresses[0])
+
+
+class _PinnedHTTPConnection(http.client.HTTPConnection):
+    """HTTP to `address` (already checked), with the URL's host in the Host header"""
+
+    def __init__(self, host, port, address, **kwargs):
+        super().__init__(host, port, **kwargs)
+        self.address = address
+
+    def connect(self):
+        self.sock = socket.create_connection((self.address, self.port), self.timeout)
+
+
+class _PinnedHTTPSConnection(http.client.HTTPSConnection):
+    """HTTPS to `address` (already checked); the certificate is still verified for the URL's host"""
+
+    def __init__(self, host, port, address, **kwargs):
+        super().__init__(host, port, **kwargs)
+        self.address = address
+
+    def connect(self):
+        sock = socket.create_connection((self.address, self.port), self.timeout)
+        self.sock = self._context.wrap_socket(sock, server_hostname=self.host)
+
+
+def post_webhook(url, body, timeout):
+    """POST `body` (JSON bytes) to a checked webhook URL; returns the HTTP status. Redirects are not followed."""
+    scheme, host, port, path, address = check_webhook_url(url)
+    connection_class = _PinnedHTTPSConnection if scheme == 'https' else _PinnedHTTPConnection
+    connection = connection_class(host, port, address, timeout=timeout)
+    try:
+        connection.request('POST', path, body=body, headers={
+            'Content-Type': 'application/json', 'User-Agent': 'GovDocGenie-Webhook/1.0'
+        })
+        return connection.getresponse().status
+    finally:
+        connection.close()
+
+
+class JobStore:
+    """SQLite job table shared by all workers on this host"""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or Config.JOBS_DB_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._local = threading.local()
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def create_job(self, files, webhook_url=None):
+        """Enqueue an analysis of saved documents ({doc_type: filepath})"""
+        job_id = uuid.uuid4().hex
+        self._conn().execute(
+            "INSERT INTO jobs (id, status, files, created_at, webhook_url) VALUES (?, ?, ?, ?, ?)",
+            (job_id, QUEUED, json.dumps(files), time.time(), webhook_url)
+        )
+        increment("govdoc.jobs.created")
+        return job_id
+
+    def get_job(self, job_id):
+        row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def claim_next(self, worker_id, lease_seconds):
+        """
+        Atomically take the oldest runnable job.
+
+        Runnable means queued, or running with an expired lease (its worker
+        died). Jobs that already used JOB_MAX_ATTEMPTS are failed instead.
+        """
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ?, worker_id = NULL, "
+                "webhook_status = CASE WHEN webhook_url IS NULL THEN NULL ELSE 'pending' END, "
+                "webhook_next_at = ? "
+                "WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, _WORKER_LOST_ERROR, now, now,
+                 RUNNING, now, Config.JOB_MAX_ATTEMPTS)
+            )
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? OR (status = ? AND lease_expires < ?) "
+                "ORDER BY created_at LIMIT 1",
+                (QUEUED, RUNNING, now)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker_id = ?, lease_expires = ?, "
+                "attempts = attempts + 1, started_at = ? WHERE id = ?",
+                (RUNNING, worker_id, now + lease_seconds, now, row['id'])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        job = dict(row)
+        job['files'] = json.loads(job['files'])
+        if job['status'] == RUNNING:
+            increment("govdoc.jobs.reclaimed")
+        return job
+
+    def renew_lease(self, job_id, worker_id, lease_seconds):
+        self._conn().execute(
+            "UPDATE jobs SET lease_expires = ? WHERE id = ? AND worker_id = ? AND status = ?",
+            (time.time() + lease_seconds, job_id, worker_id, RUNNING)
+        )
+
+    def finish(self, job_id, worker_id, result=None, error=None):
+        """Store the outcome; a lost lease means another worker owns the job now"""
+        status = FAILED if error is not None else DONE
+        now = time.time()
+        cursor = self._conn().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, "
+            "lease_expires = NULL, "
+            "webhook_status = CASE WHEN webhook_url IS NULL THEN NULL ELSE 'pending' END, "
+            "webhook_next_at = ? "
+            "WHERE id = ? AND worker_id = ? AND status = ?",
+            (status, json.dumps(result, default=str) if result is not None else None,
+             error, now, now, job_id, worker_id, RUNNING)
+        )
+        return cursor.rowcount == 1
+
+    def claim_due_webhook(self, lease_seconds):
+        """Take one pending webhook whose next attempt is due"""
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE webhook_status = 'pending' AND webhook_next_at <= ? "
+                "ORDER BY webhook_next_at LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is not None:
+                # Push the next attempt out so other workers skip it while in flight
+                conn.execute(
+                    "UPDATE jobs SET webhook_next_at = ? WHERE id = ?",
+                    (now + lease_seconds, row['id'])
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return dict(row) if row else None
+
+    def record_webhook_attempt(self, job_id, delivered, error=None):
+        job = self.get_job(job_id)
+        attempts = job['webhook_attempts'] + 1
+        if delivered:
+            status, next_at = 'delivered', None
+        elif attempts >= Config.WEBHOOK_MAX_ATTEMPTS:
+            status, next_at = 'failed', None
+        else:
+            backoff = min(Config.WEBHOOK_BACKOFF_SECONDS * (2 ** (attempts - 1)),
+                          Config.WEBHOOK_BACKOFF_MAX_SECONDS)
+            status, next_at = 'pending', time.time() + backoff
+        self._conn().execute(
+            "UPDATE jobs SET webhook_status = ?, webhook_attempts = ?, webhook_next_at = ?, "
+            "webhook_error = ? WHERE id = ?",
+            (status, attempts, next_at, error, job_id)
+        )
+        return status
+
+    def to_response(self, job):
+        """Public view of a job row for GET /jobs/<id>"""
+        response = {
+            'job_id': job['id'],
+            'status': job['status'],
+            'document_types': list(json.loads(job['files'])),
+            'attempts': job['attempts'],
+            'created_at': _iso(job['created_at']),
+            'started_at': _iso(job['started_at']),
+            'finished_at': _iso(job['finished_at']),
+        }
+        if job['status'] == DONE and job['result']:
+            response['result'] = json.loads(job['result'])
+        if job['status'] == FAILED and job['error']:
+            response['error'] = json.loads(job['error'])
+        if job['webhook_url']:
+            response['webhook'] = {
+                'status': job['webhook_status'],
+                'attempts': job['webhook_attempts'],
+                'last_error': job['webhook_error']
+            }
+        return response
+
+
+class JobRunner:
+    """Background threads that drain the job table and deliver webhooks"""
+
+    def __init__(self, store, handler, workers=None):
+        """
+        Args:
+            store: JobStore
+            handler: callable(files) -> result dict; raises on failure.
+                     A failure payload may be attached as `exc.payload`.
+            workers: number of worker threads (default Config.JOB_WORKERS)
+        """
+        self.store = store
+        self.handler = handler
+        self.workers = Config.JOB_WORKERS if workers is None else workers
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = threading.Event()
+        self._active = {}
+        self._active_lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        if self._threads or self.workers <= 0:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work_loop, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name="job-heartbeat", daemon=True)
+        heartbeat.start()
+        self._threads.append(heartbeat)
+        print(f"✅ Job runner started: {self.workers} workers ({self.worker_id}), db={self.store.db_path}")
+
+    def stop(self):
+        self._stop.set()
+
+    def _work_loop(self):
+        while not self._stop.is_set():
+            try:
+                did_work = self._run_one_job() | self._deliver_one_webhook()
+            except Exception as e:
+                print(f"⚠️ Job runner error: {e}")
+                did_work = False
+            if not did_work:
+                self._stop.wait(Config.JOB_POLL_INTERVAL_SECONDS)
+
+    def _run_one_job(self):
+        claimer = f"{self.worker_id}/{threading.current_thread().name}"
+        job = self.store.claim_next(claimer, Config.JOB_LEASE_SECONDS)
+        if job is None:
+            return False
+
+        print(f"\n📥 Job {job['id']} claimed by {claimer} (attempt {job['attempts'] + 1})")
+        with self._active_lock:
+            self._active[job['id']] = claimer
+
+        start = time.time()
+        result, error = None, None
+        try:
+            result = self.handler(job['files'])
+        except Exception as e:
+            payload = getattr(e, 'payload', None) or {'success': False, 'error': str(e)}
+            error = json.dumps(payload, default=str)
+        finally:
+            with self._active_lock:
+                self._active.pop(job['id'], None)
+
+        if self.store.finish(job['id'], claimer, result=result, error=error):
+            outcome = 'failed' if error else 'done'
+            increment("govdoc.jobs.finished", tags=[f"status:{outcome}"])
+            timing("govdoc.jobs.duration", (time.time() - start) * 1000, tags=[f"status:{outcome}"])
+            print(f"📤 Job {job['id']} {outcome} in {time.time() - start:.1f}s")
+        else:
+            print(f"⚠️ Job {job['id']} lease was lost, result discarded")
+        return True
+
+    def _deliver_one_webhook(self):
+        job = self.store.claim_due_webhook(Config.WEBHOOK_TIMEOUT_SECONDS * 2)
+        if job is None:
+            return False
+
+        body = json.dumps({
+            'job_id': job['id'],
+            'status': job['status'],
+            'status_url': f"/jobs/{job['id']}",
+            'finished_at': _iso(job['finished_at'])
+        }).encode('utf-8')
+
+        try:
+            # Checked again here: the host may resolve differently than at submit time
+            http_status = post_webhook(job['webhook_url'], body, Config.WEBHOOK_TIMEOUT_SECONDS)
+            delivered, error = 200 <= http_status < 300, None
+            if not delivered:
+                error = f"HTTP {http_status}"
+        except Exception as e:
+            delivered, error = False, str(e)[:500]
+
+        status = self.store.record_webhook_attempt(job['id'], delivered, error)
+        increment("govdoc.jobs.webhook", tags=[f"status:{status}"])
+        print(f"🔔 Webhook for job {job['id']}: {status}" + (f" ({error})" if error else ""))
+        return True
+
+    def _heartbeat_loop(self):
+        interval = max(1.0, Config.JOB_LEASE_SECONDS / 3)
+        while not self._stop.wait(interval):
+            with self._active_lock:
+                active = list(self._active.items())
+            for job_id, claimer in active:
+                try:
+                    self.store.renew_lease(job_id, claimer, Config.JOB_LEASE_SECONDS)
+                except Exception as e:
+                    print(f"⚠️ Lease renewal failed for job {job_id}: {e}")
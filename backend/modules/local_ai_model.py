@@ -6,6 +6,7 @@ from datetime import datetime
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.base import BaseEstimator
 import re
+from modules.text_data import TextData
 
 class SimpleLocalAIModel:
     def __init__(self, model_path='models/classifier.pkl'):
@@ -45,9 +46,14 @@ class SimpleLocalAIModel:
         """Extract features from document text"""
         features = {}
         
-        # Combine all text
-        all_text = " ".join([item['text'] for item in text_data]) if isinstance(text_data, list) else str(text_data)
-        all_text_lower = all_text.lower()
+        # Combine all text (TextData caches the joined and lowercase views)
+        if isinstance(text_data, (list, TextData)):
+            text_data = TextData.of(text_data)
+            all_text = text_data.joined
+            all_text_lower = text_data.lower
+        else:
+            all_text = str(text_data)
+            all_text_lower = all_text.lower()
         
         # Basic document presence features
         features['gst_present'] = 1 if re.search(r'gst(in)?\s*[:]?\s*[0-9]{2}[A-Z]{5}[0-9]{4}[A-Z]{1}[1-9A-Z]{1}Z[0-9A-Z]{1}', all_text, re.IGNORECASE) else 0
@@ -72,7 +78,7 @@ class SimpleLocalAIModel:
         features['price_consistency'] = 1 if len(re.findall(r'₹\s*\d+', all_text)) > 0 else 0
         
         # Document quality
-        features['num_pages'] = len(set(item.get('page', 1) for item in text_data)) if isinstance(text_data, list) else 1
+        features['num_pages'] = len(text_data.page_numbers()) if isinstance(text_data, TextData) else 1
         features['has_signature'] = features['signature_present']
         features['has_delivery_date'] = 1 if any(word in all_text_lower for word in ['delivery', 'dispatch', 'within']) else 0
         features['has_payment_terms'] = 1 if any(word in all_text_lower for word in ['payment', 'terms', 'advance']) else 0
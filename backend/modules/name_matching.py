@@ -0,0 +1,340 @@
+# ==================== modules/name_matching.py ====================
+"""
+Company-name normalisation, similarity and the vendor-master name index.
+
+check_name_consistency used to clean names with chained str.replace (which
+also cut "limited" out of "Unlimited") and compare them with
+difflib.SequenceMatcher, whose cost grows with the square of the name
+length. It could also only compare the names inside one bundle.
+
+- normalise_company_name() drops "M/s", punctuation and legal-form words
+  (Pvt, Ltd, LLP, ...), using precompiled regexes on word boundaries.
+- name_similarity() is the cosine between the names' character-bigram
+  counts. It is linear in name length and does not care about word order.
+  A misread character changes two bigrams (three trigrams), so OCR noise
+  costs about as much as it did with SequenceMatcher and the 0.75
+  threshold keeps its meaning.
+- VendorNameIndex holds the TF-IDF weighted trigrams of every name in a
+  vendor master, in NumPy arrays: a forward index (vendor -> trigrams) and
+  an inverted index (trigram -> vendors). A lookup takes candidates from the
+  postings of the query's rarest trigrams, within a postings budget. It
+  keeps the MAX_SCORED_CANDIDATES that share the most query weight, and
+  scores only those with the exact cosine. This finds the right
+  registered entity for a quotation's "M/s ... Pvt Ltd" among hundreds of
+  thousands of vendors in one to two milliseconds.
+"""
+
+import os
+import re
+import tempfile
+from collections import Counter
+
+import numpy as np
+
+from config import Config
+
+_MS_PREFIX = re.compile(r'^\s*m\s*/\s*s\b\.?')
+_PUNCTUATION = re.compile(r'[^\w\s]+')
+# Legal-form words say nothing about which company it is. "Limited" and
+# "Private" are also matched as OCR reads them ("Lirnited", "Pr1vate").
+_LIMITED = r'l[il1](?:m|rn)[il1]ted'
+_LEGAL_FORMS = re.compile(rf'\b{_LIMITED} liability partnership\b'
+                          rf'|\b(?:pvt|pr[il1]vate|ltd|{_LIMITED}|llp|llc|opc)\b')
+_SPACES = re.compile(r'\s+')
+
+# Trigram alphabet: space, a-z, 0-9, and one symbol for everything else
+_SPACE = 0
+_OTHER = 37
+_ALPHABET = 38
+FEATURES = _ALPHABET ** 3
+
+_SYMBOLS = np.full(129, _OTHER, dtype=np.int32)  # index 128: any non-ASCII code point
+_SYMBOLS[ord(' ')] = _SPACE
+_SYMBOLS[ord('a'):ord('z') + 1] = np.arange(1, 27)
+_SYMBOLS[ord('0'):ord('9') + 1] = np.arange(27, 37)
+_SYMBOL_OF = {chr(code): int(symbol) for code, symbol in enumerate(_SYMBOLS[:128])}
+
+# Longer (padded) names are indexed on their first MAX_NAME_CHARS characters
+MAX_NAME_CHARS = 96
+
+# Candidates come from at least this many of the query's rarest trigrams:
+# the vendors sharing a single trigram tie, so one list cannot rank them
+MIN_CANDIDATE_GRAMS = 5
+
+# Candidates from the rare-trigram postings that get the exact cosine
+MAX_SCORED_CANDIDATES = 200
+
+INDEX_FORMAT = 1
+
+
+def normalise_company_name(name):
+    """'M/s. HawkAI Innovations Pvt. Ltd.' -> 'hawkai innovations'"""
+    name = _MS_PREFIX.sub('', str(name).lower()).replace('&', ' and ')
+    name = _PUNCTUATION.sub(' ', name)
+    name = _LEGAL_FORMS.sub(' ', name)
+    return _SPACES.sub(' ', name).strip()
+
+
+def _bigrams(normalised):
+    """Bigram counts, each word padded with spaces (bigrams never span words)"""
+    grams = Counter()
+    for word in normalised.split():
+        padded = f' {word} '
+        grams.update(padded[i:i + 2] for i in range(len(padded) - 1))
+    return grams
+
+
+def name_similarity(a, b):
+    """Cosine similarity of two company names' bigram counts, 0.0 - 1.0"""
+    a, b = normalise_company_name(a), normalise_company_name(b)
+    if a == b:
+        return 1.0
+    grams_a, grams_b = _bigrams(a), _bigrams(b)
+    if not grams_a or not grams_b:
+        return 0.0
+    dot = sum(count * grams_b[gram] for gram, count in grams_a.items() if gram in grams_b)
+    norm_a = sum(count * count for count in grams_a.values())
+    norm_b = sum(count * count for count in grams_b.values())
+    return dot / (norm_a * norm_b) ** 0.5
+
+
+def _gram_ids(normalised_names):
+    """(row, trigram id) for every trigram of every name, as arrays"""
+    padded = [' ' + name.replace(' ', '  ') + ' ' for name in normalised_names]
+    width = max(3, min(MAX_NAME_CHARS, max(map(len, padded), default=0)))
+    lengths = np.minimum(np.fromiter(map(len, padded), dtype=np.int64, count=len(padded)), width)
+    codes = np.array(padded, dtype=f'<U{width}').view(np.uint32).reshape(len(padded), width)
+    symbols = _SYMBOLS[np.minimum(codes, 128)]
+    grams = (symbols[:, :-2] * _ALPHABET + symbols[:, 1:-1]) * _ALPHABET + symbols[:, 2:]
+    # Inside the padded text, and not centred on a space (the double space between words)
+    valid = (np.arange(width - 2) + 3 <= lengths[:, None]) & (symbols[:, 1:-1] != _SPACE)
+    rows, cols = np.nonzero(valid)
+    return rows, grams[rows, cols]
+
+
+def _name_gram_ids(normalised):
+    """_gram_ids for one name, without the character matrix (lookups)"""
+    ids = []
+    for word in normalised.split():
+        symbols = [_SYMBOL_OF.get(char, _OTHER) for char in f' {word} ']
+        ids.extend((a * _ALPHABET + b) * _ALPHABET + c for a, b, c in zip(symbols, symbols[1:], symbols[2:]))
+    return ids
+
+
+def _pack_strings(values):
+    blobs = [str(value).encode('utf-8') for value in values]
+    offsets = np.zeros(len(blobs) + 1, dtype=np.int64)
+    np.cumsum([len(blob) for blob in blobs], out=offsets[1:])
+    return np.frombuffer(b''.join(blobs), dtype=np.uint8), offsets
+
+
+def _unpack_strings(blob, offsets):
+    data = blob.tobytes()
+    return [data[start:end].decode('utf-8') for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+
+class VendorNameIndex:
+    """TF-IDF character-trigram index over a vendor master's company names"""
+
+    def __init__(self, names, vendor_ids, doc_ptr, doc_grams, doc_weights, idf, source_stamp='',
+                 candidate_postings=None):
+        """Use build(), from_master() or load(); the arrays are the forward index"""
+        self.names = names
+        self.vendor_ids = vendor_ids
+        self.doc_ptr = doc_ptr
+        self.doc_grams = doc_grams
+        self.doc_weights = doc_weights
+        self.idf = idf
+        self.source_stamp = source_stamp
+        self.candidate_postings = (Config.VENDOR_MATCH_CANDIDATE_POSTINGS
+                                   if candidate_postings is None else candidate_postings)
+
+        # Inverted index: postings of each trigram, vendors in ascending order
+        order = np.argsort(doc_grams, kind='stable')
+        docs = np.repeat(np.arange(len(names), dtype=np.int32), np.diff(doc_ptr))
+        self.post_docs = docs[order]
+        self.post_ptr = np.zeros(FEATURES + 1, dtype=np.int64)
+        np.cumsum(np.bincount(doc_grams, minlength=FEATURES), out=self.post_ptr[1:])
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def build(cls, names, vendor_ids=None, source_stamp='', batch_rows=50000):
+        """Index `names`; vendor_ids default to the row numbers. Empty names are skipped"""
+        vendor_ids = list(range(1, len(names) + 1)) if vendor_ids is None else vendor_ids
+        kept_names, kept_ids, normalised = [], [], []
+        for name, vendor_id in zip(names, vendor_ids):
+            text = normalise_company_name(name or '')
+            if text:
+                kept_names.append(name)
+                kept_ids.append(vendor_id)
+                normalised.append(text)
+        names, vendor_ids = kept_names, kept_ids
+
+        # (vendor, trigram) keys with their counts, a batch at a time to bound the character matrix
+        keys, counts = [], []
+        for start in range(0, len(normalised), batch_rows):
+            rows, grams = _gram_ids(normalised[start:start + batch_rows])
+            batch_keys, batch_counts = np.unique((rows + start) * FEATURES + grams, return_counts=True)
+            keys.append(batch_keys)
+            counts.append(batch_counts)
+        keys = np.concatenate(keys) if keys else np.zeros(0, dtype=np.int64)
+        tf = np.concatenate(counts) if counts else np.zeros(0, dtype=np.int64)
+        docs = keys // FEATURES
+        doc_grams = (keys % FEATURES).astype(np.int32)
+
+        df = np.bincount(doc_grams, minlength=FEATURES)
+        idf = (np.log((len(names) + 1) / (df + 1)) + 1).astype(np.float32)
+        weights = (1 + np.log(tf)) * idf[doc_grams]
+        norms = np.sqrt(np.bincount(docs, weights * weights, minlength=len(names)))
+        doc_weights = (weights / norms[docs]).astype(np.float32)
+
+        doc_ptr = np.zeros(len(names) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(docs, minlength=len(names)), out=doc_ptr[1:])
+        return cls(names, vendor_ids, doc_ptr, doc_grams, doc_weights, idf, source_stamp)
+
+    @classmethod
+    def from_master(cls, path, fmt=None):
+        """Index a CSV / NDJSON vendor master (registry_check column names)"""
+        # Imported here: registry_check imports ComplianceChecker, which imports this module
+        from modules.registry_check import iter_vendor_records, normalise_record
+
+        names, vendor_ids = [], []
+        for row, record in enumerate(iter_vendor_records(path, fmt), 1):
+            if '_error' in record:
+                continue
+            fields = normalise_record(record)
+            name = fields['company_name'] or fields['gst_name'] or fields['udyam_name']
+            if name:
+                names.append(name)
+                vendor_ids.append(fields['vendor_id'] or fields['gst_number'] or str(row))
+        return cls.build(names, vendor_ids, source_stamp=master_stamp(path))
+
+    def save(self, path):
+        """Write the index to an .npz file atomically"""
+        names_blob, names_offsets = _pack_strings(self.names)
+        ids_blob, ids_offsets = _pack_strings(self.vendor_ids)
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, format=INDEX_FORMAT, source_stamp=self.source_stamp,
+                     names_blob=names_blob, names_offsets=names_offsets,
+                     ids_blob=ids_blob, ids_offsets=ids_offsets,
+                     doc_ptr=self.doc_ptr, doc_grams=self.doc_grams, doc_weights=self.doc_weights, idf=self.idf)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Index saved by save(), or None if the file is missing or from another format"""
+        try:
+            with np.load(path) as data:
+                if int(data['format']) != INDEX_FORMAT:
+                    return None
+                return cls(_unpack_strings(data['names_blob'], data['names_offsets']),
+                           _unpack_strings(data['ids_blob'], data['ids_offsets']),
+                           data['doc_ptr'], data['doc_grams'], data['doc_weights'], data['idf'],
+                           str(data['source_stamp']))
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def _query(self, normalised):
+        """Sorted trigram ids of a normalised name and their unit-length TF-IDF weights"""
+        grams, tf = np.unique(np.array(_name_gram_ids(normalised), dtype=np.int64), return_counts=True)
+        weights = (1 + np.log(tf)) * self.idf[grams]
+        return grams, (weights / np.sqrt(np.dot(weights, weights))).astype(np.float32)
+
+    def _candidates(self, grams, weights):
+        """
+        Vendors sharing the query's rarest trigrams (MIN_CANDIDATE_GRAMS of
+        them, more while within the postings budget), the
+        MAX_SCORED_CANDIDATES with the most shared query weight
+        """
+        df = self.post_ptr[grams + 1] - self.post_ptr[grams]
+        order = np.argsort(df, kind='stable')
+        # Trigrams no vendor has (OCR damage) come first but select nothing
+        order = order[df[order] > 0]
+        within_budget = int(np.searchsorted(np.cumsum(df[order]), self.candidate_postings, side='right'))
+        take = order[:max(MIN_CANDIDATE_GRAMS, within_budget)]
+        if not len(take):
+            # No trigram of the query is in the index (an unseen or garbled name)
+            return np.zeros(0, dtype=self.post_docs.dtype)
+        postings = [self.post_docs[self.post_ptr[gram]:self.post_ptr[gram + 1]] for gram in grams[take]]
+        docs, inverse = np.unique(np.concatenate(postings), return_inverse=True)
+        if len(docs) <= MAX_SCORED_CANDIDATES:
+            return docs
+        shared = np.bincount(inverse, weights=np.repeat(weights[take], df[take]), minlength=len(docs))
+        return np.sort(docs[np.argpartition(-shared, MAX_SCORED_CANDIDATES - 1)[:MAX_SCORED_CANDIDATES]])
+
+    def _scores(self, candidates, grams, weights):
+        """Exact cosine between the query and each candidate's forward-index row"""
+        starts = self.doc_ptr[candidates]
+        lengths = self.doc_ptr[candidates + 1] - starts
+        offsets = np.cumsum(lengths) - lengths
+        # Concatenated rows of all candidates
+        idx = np.arange(int(lengths.sum())) + np.repeat(starts - offsets, lengths)
+        row_grams = self.doc_grams[idx]
+        pos = np.minimum(np.searchsorted(grams, row_grams), len(grams) - 1)
+        products = np.where(grams[pos] == row_grams, self.doc_weights[idx] * weights[pos], 0)
+        return np.add.reduceat(products, offsets)
+
+    def top_k(self, name, k=None):
+        """
+        Best-matching vendors for `name`, best first:
+        [{'vendor_id', 'name', 'score'}]. The score is the TF-IDF cosine (0-1).
+        """
+        k = Config.VENDOR_MATCH_TOP_K if k is None else k
+        normalised = normalise_company_name(name or '')
+        if not normalised or not len(self) or k <= 0:
+            return []
+        grams, weights = self._query(normalised)
+        candidates = self._candidates(grams, weights)
+        if not len(candidates):
+            return []
+
+        scores = self._scores(candidates, grams, weights)
+        if len(scores) > k:
+            best = np.argpartition(-scores, k - 1)[:k]
+        else:
+            best = np.arange(len(scores))
+        best = best[np.argsort(-scores[best], kind='stable')]
+        return [{
+            'vendor_id': self.vendor_ids[candidates[i]],
+            'name': self.names[candidates[i]],
+            'score': round(float(scores[i]), 4)
+        } for i in best.tolist() if scores[i] > 0]
+
+
+def master_stamp(path):
+    """Changes whenever the vendor master file is replaced or edited"""
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def load_vendor_index(master_path=None, index_path=None):
+    """
+    VendorNameIndex of Config.VENDOR_MASTER_PATH, or None when no master is
+    configured. The saved index is reused while the master is unchanged;
+    otherwise it is rebuilt and saved again.
+    """
+    master_path = Config.VENDOR_MASTER_PATH if master_path is None else master_path
+    index_path = Config.VENDOR_INDEX_PATH if index_path is None else index_path
+    if not master_path:
+        return None
+    if not os.path.exists(master_path):
+        print(f"⚠️ Vendor master not found: {master_path}; vendor matching disabled")
+        return None
+
+    index = VendorNameIndex.load(index_path)
+    if index is not None and index.source_stamp == master_stamp(master_path):
+        return index
+
+    print(f"🔨 Building vendor name index from {master_path}")
+    index = VendorNameIndex.from_master(master_path)
+    try:
+        index.save(index_path)
+    except OSError as e:
+        print(f"⚠️ Vendor name index not saved: {e}")
+    print(f"✅ Vendor name index: {len(index)} names")
+    return index
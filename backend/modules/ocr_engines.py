@@ -0,0 +1,151 @@
+# ==================== modules/ocr_engines.py ====================
+"""
+Tesseract engines behind one image_to_data interface.
+
+pytesseract writes every page to a temporary image, starts the tesseract
+binary, which loads the traineddata again, and parses its TSV output. The
+tesserocr engine keeps initialised TessBaseAPI handles in-process instead,
+one per (thread, psm, oem), so a page only pays for recognition. Both
+return pytesseract's Output.DICT columns for word boxes, so the records
+built from them are identical. OCR_ENGINE selects the engine; if tesserocr
+is missing or cannot load its language data, pytesseract is used.
+"""
+
+import threading
+
+import numpy as np
+import pytesseract
+from PIL import Image
+
+from config import Config
+
+# Columns of pytesseract.image_to_data(output_type=Output.DICT)
+DATA_COLUMNS = ('level', 'page_num', 'block_num', 'par_num', 'line_num', 'word_num',
+                'left', 'top', 'width', 'height', 'conf', 'text')
+
+# TSV 'level' of word rows
+WORD_LEVEL = 5
+
+
+class OCREngine:
+    """Runs Tesseract on one image and returns word boxes"""
+
+    name = None
+
+    def image_to_data(self, image, psm=6, oem=3, whitelist=None):
+        """
+        OCR a PIL image or numpy array; `whitelist` limits the characters
+        Tesseract may output (tessedit_char_whitelist).
+
+        Returns {column: [value, ...]} with DATA_COLUMNS, like
+        pytesseract.image_to_data(output_type=Output.DICT).
+        """
+        raise NotImplementedError
+
+
+class PytesseractEngine(OCREngine):
+    """One tesseract subprocess per call"""
+
+    name = 'pytesseract'
+
+    def image_to_data(self, image, psm=6, oem=3, whitelist=None):
+        config = f'--psm {psm} --oem {oem}'
+        if whitelist:
+            config += f' -c tessedit_char_whitelist={whitelist}'
+        return pytesseract.image_to_data(
+            image,
+            output_type=pytesseract.Output.DICT,
+            config=config
+        )
+
+
+class TesserocrEngine(OCREngine):
+    """In-process libtesseract through tesserocr, with handles reused per thread"""
+
+    name = 'tesserocr'
+
+    def __init__(self, lang='eng'):
+        import tesserocr
+        self.tesserocr = tesserocr
+        self.lang = lang
+        self._local = threading.local()
+        # Fail now, not on the first page, if the language data cannot be loaded
+        self._api(6, 3)
+
+    def _api(self, psm, oem):
+        apis = getattr(self._local, 'apis', None)
+        if apis is None:
+            apis = self._local.apis = {}
+        api = apis.get((psm, oem))
+        if api is None:
+            api = self.tesserocr.PyTessBaseAPI(lang=self.lang, psm=psm, oem=oem)
+            apis[(psm, oem)] = api
+        return api
+
+    def image_to_data(self, image, psm=6, oem=3, whitelist=None):
+        api = self._api(psm, oem)
+        # Handles are shared between profiles, so always (re)set the whitelist
+        api.SetVariable('tessedit_char_whitelist', whitelist or '')
+        if isinstance(image, np.ndarray):
+            if image.ndim == 2 and image.dtype == np.uint8:
+                image = np.ascontiguousarray(image)
+                height, width = image.shape
+                api.SetImageBytes(image.tobytes(), width, height, 1, width)
+            else:
+                api.SetImage(Image.fromarray(image))
+        else:
+            api.SetImage(image)
+
+        try:
+            api.Recognize()
+            return self._word_rows(api)
+        finally:
+            api.Clear()
+
+    def _word_rows(self, api):
+        """Walk the result iterator, numbering blocks/paragraphs/lines like Tesseract's TSV"""
+        RIL = self.tesserocr.RIL
+        data = {column: [] for column in DATA_COLUMNS}
+        iterator = api.GetIterator()
+        if iterator is None:
+            return data
+
+        block = par = line = word = 0
+        for item in self.tesserocr.iterate_level(iterator, RIL.WORD):
+            if item.IsAtBeginningOf(RIL.BLOCK):
+                block, par, line = block + 1, 0, 0
+            if item.IsAtBeginningOf(RIL.PARA):
+                par, line = par + 1, 0
+            if item.IsAtBeginningOf(RIL.TEXTLINE):
+                line, word = line + 1, 0
+            word += 1
+
+            box = item.BoundingBox(RIL.WORD)
+            if box is None:
+                continue
+            left, top, right, bottom = box
+            row = (WORD_LEVEL, 1, block, par, line, word, left, top, right - left, bottom - top,
+                   int(item.Confidence(RIL.WORD)), item.GetUTF8Text(RIL.WORD) or '')
+            for column, value in zip(DATA_COLUMNS, row):
+                data[column].append(value)
+        return data
+
+
+OCR_ENGINES = {
+    'pytesseract': PytesseractEngine,
+    'tesserocr': TesserocrEngine,
+}
+
+
+def get_ocr_engine(name=None):
+    """Instantiate the engine named by `name` (default Config.OCR_ENGINE)"""
+    name = (name or Config.OCR_ENGINE).lower()
+    engine_class = OCR_ENGINES.get(name)
+    if engine_class is None:
+        print(f"⚠️ Unknown OCR engine '{name}', using pytesseract")
+        return PytesseractEngine()
+    try:
+        return engine_class()
+    except (ImportError, RuntimeError) as e:
+        print(f"⚠️ OCR engine '{name}' unavailable ({e}), using pytesseract")
+        return PytesseractEngine()
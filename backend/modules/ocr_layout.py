@@ -0,0 +1,114 @@
+# ==================== modules/ocr_layout.py ====================
+"""
+Turns Tesseract word boxes into text_data records.
+
+OCR used to emit one record per word, so a scanned page became hundreds of
+one-word items. Every field regex ran over each of them, and anything OCR
+split into two tokens (UDYAM-MH-01- 1234567, Rs. 1,200, company names)
+could never match. With OCR_LINE_ASSEMBLY the words are grouped by
+Tesseract's block/paragraph/line numbers into one record per text line. The
+record has the union bounding box and the mean word confidence, and keeps
+the word boxes under 'words' as evidence. Words around a hyphen are joined
+without a space when the gap between them is narrow, which restores
+hyphenated identifiers.
+"""
+
+from config import Config
+
+# Words below this Tesseract confidence are dropped (as before)
+MIN_WORD_CONFIDENCE = 30
+
+# Hyphen-split words closer than this fraction of the line height are rejoined
+HYPHEN_JOIN_GAP = 0.6
+
+
+def ocr_records(ocr_data, page_num, record_type, dpi=None, lines=None):
+    """
+    text_data records for one OCR'd image.
+
+    `ocr_data` holds image_to_data's Output.DICT columns. Returns (records,
+    confidences of the kept words); the page confidence is averaged over
+    words either way. `lines` defaults to Config.OCR_LINE_ASSEMBLY.
+    """
+    lines = Config.OCR_LINE_ASSEMBLY if lines is None else lines
+    words = _words(ocr_data)
+    confidences = [word['confidence'] for _, word in words]
+    build = _line_records if lines else _word_records
+    records = build(words, page_num, record_type)
+    if dpi:
+        for record in records:
+            record['dpi'] = dpi
+    return records, confidences
+
+
+def _words(ocr_data):
+    """[(line key, word)] for the words worth keeping, in Tesseract's reading order"""
+    words = []
+    for i in range(len(ocr_data['text'])):
+        text = str(ocr_data['text'][i]).strip()
+        conf = int(float(ocr_data['conf'][i]))
+        if not text or conf <= MIN_WORD_CONFIDENCE:
+            continue
+        key = (ocr_data['block_num'][i], ocr_data['par_num'][i], ocr_data['line_num'][i])
+        words.append((key, {
+            'text': text,
+            'confidence': conf / 100.0,
+            'line': ocr_data['line_num'][i],
+            'position': {
+                'left': ocr_data['left'][i],
+                'top': ocr_data['top'][i],
+                'width': ocr_data['width'][i],
+                'height': ocr_data['height'][i]
+            }
+        }))
+    return words
+
+
+def _word_records(words, page_num, record_type):
+    return [{
+        'page': page_num,
+        'line': word['line'],
+        'text': word['text'],
+        'type': record_type,
+        'confidence': word['confidence'],
+        'position': word['position']
+    } for _, word in words]
+
+
+def _line_records(words, page_num, record_type):
+    groups = {}
+    for key, word in words:
+        groups.setdefault(key, []).append(word)
+
+    records = []
+    # Dicts keep insertion order, i.e. Tesseract's reading order of lines
+    for line_num, line_words in enumerate(groups.values(), 1):
+        text = line_words[0]['text']
+        for previous, word in zip(line_words, line_words[1:]):
+            text += ('' if _is_hyphen_split(previous, word) else ' ') + word['text']
+
+        left = min(w['position']['left'] for w in line_words)
+        top = min(w['position']['top'] for w in line_words)
+        right = max(w['position']['left'] + w['position']['width'] for w in line_words)
+        bottom = max(w['position']['top'] + w['position']['height'] for w in line_words)
+        records.append({
+            'page': page_num,
+            'line': line_num,
+            'text': text,
+            'type': record_type,
+            'confidence': sum(w['confidence'] for w in line_words) / len(line_words),
+            'position': {'left': left, 'top': top, 'width': right - left, 'height': bottom - top},
+            'words': [{key: w[key] for key in ('text', 'confidence', 'position')} for w in line_words]
+        })
+    return records
+
+
+def _is_hyphen_split(previous, word):
+    """'01-' + '1234567': one token OCR split at a hyphen (a lone '-' is a real dash)"""
+    hyphenated = ((previous['text'].endswith('-') and len(previous['text']) > 1) or
+                  (word['text'].startswith('-') and len(word['text']) > 1))
+    if not hyphenated:
+        return False
+    gap = word['position']['left'] - (previous['position']['left'] + previous['position']['width'])
+    height = max(previous['position']['height'], word['position']['height'], 1)
+    return gap < HYPHEN_JOIN_GAP * height
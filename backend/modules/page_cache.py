@@ -0,0 +1,180 @@
+# ==================== modules/page_cache.py ====================
+"""
+Disk-backed cache of per-page OCR results.
+
+ExtractionCache only helps when a whole file repeats. The same pages,
+though, keep coming back inside different files: a WhatsApp photo of a PAN
+card is re-sent under a new name, or the same GST certificate scan is
+embedded in several bundle PDFs. PageOCRCache keys a page's OCR output by
+the SHA-256 of its rendered pixels and a fingerprint of everything that
+shapes the result (dpi, preprocessing stages and thresholds, OCR engine,
+line assembly, ROI, pipeline version). A repeated page then skips
+preprocessing and Tesseract.
+
+Entries are pickle files under OCR_PAGE_CACHE_DIR, written atomically, so
+every gunicorn worker and OCR pool process sharing the directory shares the
+cache. A hit refreshes the file's mtime. When the directory grows past
+OCR_PAGE_CACHE_MAX_MB, the least recently used files are deleted. Temp
+files a killed writer left behind are removed by the next scan.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+
+from config import Config
+
+# 🎯 DATADOG METRICS
+from modules.datadog_client import increment, gauge
+
+# Another process may have added entries since our last scan: re-scan this often
+RESCAN_EVERY_PUTS = 64
+
+# Eviction frees space down to this fraction of the budget, so it does not run on every put
+EVICT_TO = 0.9
+
+# A .tmp file this old is not being written any more: its writer died between mkstemp and os.replace
+STALE_TMP_SECONDS = 300
+
+
+def page_digest(image_np):
+    """SHA-256 hex digest of a rendered page's pixels, shape and dtype"""
+    sha = hashlib.sha256(f"{image_np.shape}:{image_np.dtype}:".encode())
+    sha.update(image_np.tobytes())
+    return sha.hexdigest()
+
+
+class PageOCRCache:
+    """Size-bounded, directory-shared LRU of per-page OCR results"""
+
+    def __init__(self, directory=None, max_bytes=None):
+        self.directory = Config.OCR_PAGE_CACHE_DIR if directory is None else directory
+        self.max_bytes = Config.OCR_PAGE_CACHE_MAX_MB * 1024 * 1024 if max_bytes is None else max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._size = None  # bytes on disk at the last scan plus our puts since
+        self._puts = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(image_np, fingerprint):
+        return hashlib.sha256(f"{page_digest(image_np)}:{fingerprint}".encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.pkl")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            os.utime(path)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            # Missing, evicted by another process meanwhile, or half-written by a crash
+            value = None
+
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        increment("govdoc.ocr.page_cache.miss" if value is None else "govdoc.ocr.page_cache.hit")
+        return value
+
+    def put(self, key, value):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            return False
+
+        path = self._path(key)
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(blob)
+            # Readers in other processes see either no file or the complete one
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ OCR page cache write failed: {e}")
+            if tmp_path is not None:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass  # never created or already replaced
+            return False
+
+        with self._lock:
+            self._puts += 1
+            if self._size is not None:
+                self._size += len(blob)
+            rescan = self._size is None or self._size > self.max_bytes or self._puts % RESCAN_EVERY_PUTS == 0
+        if rescan:
+            self._evict()
+        return True
+
+    def _scan(self):
+        """[(mtime, size, path)] of every entry, oldest first; deletes stale temp files"""
+        entries = []
+        stale_before = time.time() - STALE_TMP_SECONDS
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                is_tmp = name.endswith('.tmp')
+                if not is_tmp and not name.endswith('.pkl'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                    if is_tmp:
+                        # Recent ones belong to a put still in progress
+                        if stat.st_mtime < stale_before:
+                            os.remove(path)
+                        continue
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        return entries
+
+    def _evict(self):
+        entries = self._scan()
+        size = sum(entry[1] for entry in entries)
+        evicted = 0
+        if size > self.max_bytes:
+            target = self.max_bytes * EVICT_TO
+            for _, entry_size, path in entries:
+                if size <= target:
+                    break
+                try:
+                    os.remove(path)
+                    evicted += 1
+                except OSError:
+                    pass  # another process evicted it first
+                size -= entry_size
+
+        with self._lock:
+            self._size = size
+            self.evictions += evicted
+        if evicted:
+            increment("govdoc.ocr.page_cache.eviction", value=evicted)
+        gauge("govdoc.ocr.page_cache.bytes", size)
+
+    def stats(self):
+        entries = self._scan()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'directory': self.directory,
+                'entries': len(entries),
+                'bytes': sum(entry[1] for entry in entries),
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,187 @@
+# ==================== modules/page_raster.py ====================
+"""
+Bounded-memory PDF page rasterisation for OCR.
+
+pdf2image.convert_from_path renders every requested page into a PIL image
+before returning, so a 40-page A4 scan at 300 dpi held several GB of RGB
+buffers before the first page was OCR'd. PopplerRasterizer renders a small
+window of pages per poppler call instead, sized so the window fits the
+OCR_RASTER_MEMORY_BUDGET_MB budget, and yields them one by one. Each image
+is closed as soon as the consumer asks for the next page.
+
+Pages are rendered in grayscale by default: _preprocess_image converts to
+grayscale first anyway, and a gray page is a third of the RGB size.
+
+poppler runs as a pdftoppm subprocess that writes PPM files, which are then
+decoded into PIL images and copied once more by np.array. PyMuPDFRasterizer
+renders in-process with MuPDF instead. It renders one page at a time,
+straight into a pixmap at the requested dpi and colourspace, and yields it
+as a numpy array over the pixmap's bytes. OCR_RASTER_BACKEND picks the
+backend. If PyMuPDF is missing or cannot open a file, poppler is used.
+"""
+
+import math
+import re
+
+import numpy as np
+import pdf2image
+
+from config import Config
+
+# pdfinfo reports "612 x 792 pts (letter)"; A4 is assumed when it cannot be read
+_PAGE_SIZE = re.compile(r'([\d.]+)\s*x\s*([\d.]+)\s*pts')
+_DEFAULT_PAGE_POINTS = (595.0, 842.0)
+
+
+class PageRasterizer:
+    """Renders PDF pages for OCR; subclasses implement page_info and iter_pages"""
+
+    name = None
+
+    def __init__(self, memory_budget=None, grayscale=None):
+        """
+        Args:
+            memory_budget: bytes that one window of rendered pages may use
+                           (default Config.OCR_RASTER_MEMORY_BUDGET_MB)
+            grayscale: render 8-bit gray instead of RGB (default Config.OCR_RASTER_GRAYSCALE)
+        """
+        self.memory_budget = (Config.OCR_RASTER_MEMORY_BUDGET_MB * 1024 * 1024
+                              if memory_budget is None else memory_budget)
+        self.grayscale = Config.OCR_RASTER_GRAYSCALE if grayscale is None else grayscale
+
+    def page_info(self, pdf_path):
+        """(page count, (width, height) of the first page in points)"""
+        raise NotImplementedError
+
+    def iter_pages(self, pdf_path, dpi=300, first_page=1, last_page=None):
+        """
+        Yield (page_num, image) for pages first_page..last_page in order; the
+        image is a PIL image or a numpy array (H x W, or H x W x 3 for RGB).
+        """
+        raise NotImplementedError
+
+    def page_bytes(self, points, dpi):
+        """Bytes of one rendered page"""
+        width = math.ceil(points[0] / 72 * dpi)
+        height = math.ceil(points[1] / 72 * dpi)
+        return width * height * (1 if self.grayscale else 3)
+
+
+class PopplerRasterizer(PageRasterizer):
+    """Renders PDF pages in memory-bounded windows with poppler (pdf2image)"""
+
+    name = 'poppler'
+
+    def page_info(self, pdf_path):
+        info = pdf2image.pdfinfo_from_path(pdf_path)
+        size = _PAGE_SIZE.search(str(info.get('Page size', '')))
+        points = (float(size.group(1)), float(size.group(2))) if size else _DEFAULT_PAGE_POINTS
+        return int(info['Pages']), points
+
+    def window_size(self, points, dpi):
+        """Pages per poppler call that fit the budget (at least 1)"""
+        # poppler's PPM output and the decoded images coexist while a window is parsed
+        return max(1, self.memory_budget // (2 * self.page_bytes(points, dpi)))
+
+    def iter_pages(self, pdf_path, dpi=300, first_page=1, last_page=None):
+        """
+        Yield (page_num, PIL image) for pages first_page..last_page in order.
+
+        The image is closed when the next page is requested; callers must
+        not keep it past that point.
+        """
+        page_count, points = self.page_info(pdf_path)
+        last_page = page_count if last_page is None else min(last_page, page_count)
+        window = self.window_size(points, dpi)
+
+        for start in range(first_page, last_page + 1, window):
+            end = min(start + window - 1, last_page)
+            images = pdf2image.convert_from_path(
+                pdf_path, dpi=dpi, first_page=start, last_page=end, grayscale=self.grayscale
+            )
+            # Pop from the end so the window list drops each page once it is used
+            images.reverse()
+            page_num = start
+            while images:
+                image = images.pop()
+                try:
+                    yield page_num, image
+                finally:
+                    image.close()
+                page_num += 1
+
+
+class PyMuPDFRasterizer(PageRasterizer):
+    """Renders PDF pages in-process with MuPDF, one page at a time, as numpy arrays"""
+
+    name = 'pymupdf'
+
+    def __init__(self, memory_budget=None, grayscale=None):
+        super().__init__(memory_budget, grayscale)
+        import fitz
+        self.fitz = fitz
+        # Files MuPDF cannot open still get OCR'd
+        self.fallback = PopplerRasterizer(memory_budget, grayscale)
+
+    def _open(self, pdf_path):
+        try:
+            return self.fitz.open(pdf_path)
+        except Exception as e:
+            print(f"⚠️ MuPDF cannot open {pdf_path} ({e}), rendering with poppler")
+            return None
+
+    def page_info(self, pdf_path):
+        doc = self._open(pdf_path)
+        if doc is None:
+            return self.fallback.page_info(pdf_path)
+        with doc:
+            rect = doc[0].rect if doc.page_count else None
+            points = (rect.width, rect.height) if rect else (595.0, 842.0)
+            return doc.page_count, points
+
+    def iter_pages(self, pdf_path, dpi=300, first_page=1, last_page=None):
+        """
+        Yield (page_num, numpy array) for pages first_page..last_page in order.
+
+        The array is read-only and owns its buffer (the pixmap's bytes), so
+        callers may keep it after asking for the next page.
+        """
+        doc = self._open(pdf_path)
+        if doc is None:
+            yield from self.fallback.iter_pages(pdf_path, dpi, first_page, last_page)
+            return
+
+        colorspace = self.fitz.csGRAY if self.grayscale else self.fitz.csRGB
+        zoom = dpi / 72
+        matrix = self.fitz.Matrix(zoom, zoom)
+        with doc:
+            last_page = doc.page_count if last_page is None else min(last_page, doc.page_count)
+            for page_num in range(first_page, last_page + 1):
+                pixmap = doc[page_num - 1].get_pixmap(matrix=matrix, colorspace=colorspace, alpha=False)
+                height, width, channels, stride = pixmap.height, pixmap.width, pixmap.n, pixmap.stride
+                # samples copies the pixels out of MuPDF once; frombuffer wraps that copy
+                pixels = np.frombuffer(pixmap.samples, dtype=np.uint8)
+                del pixmap
+                if stride != width * channels:
+                    pixels = pixels.reshape(height, stride)[:, :width * channels]
+                yield page_num, pixels.reshape((height, width) if channels == 1 else (height, width, channels))
+
+
+RASTER_BACKENDS = {
+    'poppler': PopplerRasterizer,
+    'pymupdf': PyMuPDFRasterizer,
+}
+
+
+def get_rasterizer(name=None):
+    """Instantiate the rasteriser named by `name` (default Config.OCR_RASTER_BACKEND)"""
+    name = (name or Config.OCR_RASTER_BACKEND).lower()
+    rasterizer_class = RASTER_BACKENDS.get(name)
+    if rasterizer_class is None:
+        print(f"⚠️ Unknown raster backend '{name}', using poppler")
+        return PopplerRasterizer()
+    try:
+        return rasterizer_class()
+    except ImportError as e:
+        print(f"⚠️ Raster backend '{name}' unavailable ({e}), using poppler")
+        return PopplerRasterizer()
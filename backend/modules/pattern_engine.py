@@ -0,0 +1,209 @@
+# ==================== modules/pattern_engine.py ====================
+"""
+Precompiled multi-pattern extraction over extracted text_data.
+
+The field patterns (GST, PAN, Udyam, company names, dates, prices) are
+compiled once. Each pattern makes one C-level finditer pass over the
+document's shared TextData buffer instead of one findall per text item.
+Match offsets are mapped back to their page/line item with bisect, and
+duplicates are dropped with a set per pattern. Results are identical to
+the old per-item `re.findall` loop.
+
+Dates are one alternation (modules.date_parser.DATE_PATTERN). Its match
+groups are turned into an ISO 'date' on the record by a converter, so the
+value is not parsed a second time.
+
+Most patterns cannot match without one of a few literals ('ltd', 'rs', a
+month name...). Those patterns only scan the text items containing such a
+literal, which skips the backtracking-heavy company-name scan on most items.
+"""
+
+import re
+
+from config import Config
+from modules.date_parser import DATE_PATTERN, date_fields
+from modules.text_data import TextData
+
+# Each pattern is paired with literals one of which every match must contain
+# (compared case-folded); () means the pattern is always scanned.
+COMPANY_NAME_PATTERNS = [
+    (r'(?:M/s\.?\s*)?([A-Z][A-Za-z\s&]{3,}(?:Pvt\.?\s*Ltd\.?|Private\s+Limited|Limited|LLP|LLC))',
+     ('ltd', 'limited', 'llp', 'llc')),
+    (r'Company\s*Name\s*[:]?\s*([A-Z][A-Za-z\s&]{3,})', ('company',)),
+    (r'Business\s*Name\s*[:]?\s*([A-Z][A-Za-z\s&]{3,})', ('business',)),
+    (r'Name\s*[:]?\s*([A-Z][A-Za-z\s&]{3,})', ('name',))
+]
+
+MONTHS = ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec')
+
+# One pass for every layout, so an ISO date is not also reported as DD-MM-YY
+DATE_PATTERNS = [
+    (DATE_PATTERN, ('-', '/') + MONTHS)
+]
+
+PRICE_PATTERNS = [
+    (r'₹\s*[\d,]+(?:\.\d{2})?', ('₹',)),
+    (r'Rs\.?\s*[\d,]+(?:\.\d{2})?', ('rs',)),
+    (r'INR\s*[\d,]+(?:\.\d{2})?', ('inr',)),
+    (r'Total\s*[:]?\s*[\d,]+(?:\.\d{2})?', ('total',)),
+    (r'\$\s*[\d,]+(?:\.\d{2})?', ('$',)),
+    (r'[\d,]+(?:\.\d{2})?\s*(?:USD|EUR|GBP)', ('usd', 'eur', 'gbp'))
+]
+
+COMPANY_NAME_KEYS = [f'company_name_{i}' for i in range(len(COMPANY_NAME_PATTERNS))]
+DATE_KEYS = [f'date_{i}' for i in range(len(DATE_PATTERNS))]
+PRICE_KEYS = [f'price_{i}' for i in range(len(PRICE_PATTERNS))]
+
+
+def document_specs():
+    """(key, field_name, pattern, literals) for every field DocumentProcessor extracts"""
+    specs = [
+        ('gst_number', 'gst_number', Config.GST_PATTERN, ()),
+        ('pan_number', 'pan_number', Config.PAN_PATTERN, ()),
+        ('udyam_number', 'udyam_number', Config.UDYAM_PATTERN, ()),
+    ]
+    specs += [(key, 'company_name', p, lits) for key, (p, lits) in zip(COMPANY_NAME_KEYS, COMPANY_NAME_PATTERNS)]
+    specs += [(key, 'date', p, lits) for key, (p, lits) in zip(DATE_KEYS, DATE_PATTERNS)]
+    specs += [(key, 'price', p, lits) for key, (p, lits) in zip(PRICE_KEYS, PRICE_PATTERNS)]
+    return specs
+
+
+# field_name -> converter(match) adding fields to its records (None drops the match)
+DOCUMENT_CONVERTERS = {'date': date_fields}
+
+
+def _fold(text):
+    # casefold() plus the two i's that re.IGNORECASE equates with 'i' but casefold does not
+    return text.casefold().replace('\u0131', 'i').replace('i\u0307', 'i')
+
+
+class PatternEngine:
+    """Field patterns compiled once and scanned over a joined document buffer"""
+
+    def __init__(self, specs, flags=re.IGNORECASE, converters=None):
+        """
+        Args:
+            specs: list of (key, field_name, pattern, literals); keys must be
+                   unique, literals may be () (see COMPANY_NAME_PATTERNS)
+            flags: re flags shared by all patterns
+            converters: optional {field_name: fn(match)} returning extra
+                   record fields, or None for a match that is not a value
+        """
+        converters = converters or {}
+        self.flags = flags
+        self.specs = {}
+        self.by_pattern = {}
+        for key, field_name, pattern, literals in specs:
+            compiled = re.compile(pattern, flags)
+            self.specs[key] = {
+                'field': field_name,
+                'compiled': compiled,
+                # Literal hints assume case-insensitive matching
+                'literals': tuple(literals) if flags & re.IGNORECASE else (),
+                # findall reports the first group when a pattern has any
+                'value_group': 1 if compiled.groups else 0,
+                'convert': converters.get(field_name)
+            }
+            self.by_pattern.setdefault(pattern, key)
+
+    def key_for(self, pattern, flags):
+        """Spec key of a precompiled pattern, or None"""
+        return self.by_pattern.get(pattern) if flags == self.flags else None
+
+    def scan(self, text_data, keys=None):
+        """
+        Run the patterns named by `keys` (default: all) over text_data.
+
+        text_data may be a TextData or a list of records. Returns
+        {key: [record, ...]}, each record holding field, value, page, line,
+        snippet and confidence, in document order.
+        """
+        keys = list(self.specs) if keys is None else keys
+        if not text_data:
+            return {key: [] for key in keys}
+
+        data = TextData.of(text_data)
+        results = {}
+        for key in keys:
+            spec = self.specs[key]
+            if spec['literals']:
+                results[key] = self._scan_items(spec, data, self._candidates(data, spec['literals']))
+            elif data.clean:
+                results[key] = self._scan_buffer(spec, data)
+            else:
+                results[key] = self._scan_items(spec, data, range(len(data)))
+        return results
+
+    @staticmethod
+    def _candidates(data, literals):
+        """Indices of the items whose folded text contains one of `literals`"""
+        buffer, starts = data.folded(_fold)
+        found = set()
+        for literal in literals:
+            pos = buffer.find(literal)
+            while pos != -1:
+                index = data.index_at(pos, starts)
+                found.add(index)
+                pos = buffer.find(literal, starts[index + 1])
+        return sorted(found)
+
+    def _scan_buffer(self, spec, data):
+        results = []
+        seen = set()
+        value_group = spec['value_group']
+        for m in spec['compiled'].finditer(data.buffer):
+            index = data.span_index(m.start(), m.end())
+            if index is None:
+                # Ran across an item boundary: findall per item would not see it
+                return self._scan_items(spec, data, range(len(data)))
+
+            value = m.group(value_group) or ''
+            if value in seen:
+                continue
+            seen.add(value)
+            record = _match_record(spec, data, index, value, data.text(index), m, data.starts[index])
+            if record is not None:
+                results.append(record)
+        return results
+
+    @staticmethod
+    def _scan_items(spec, data, indices):
+        """Per-item matching over the given items (prefiltered or fallback path)"""
+        results = []
+        seen = set()
+        value_group = spec['value_group']
+        for index in indices:
+            text = data.text(index)
+            # Same values as findall: the first group if the pattern has any
+            for m in spec['compiled'].finditer(text):
+                value = m.group(value_group) or ''
+                if value in seen:
+                    continue
+                seen.add(value)
+                record = _match_record(spec, data, index, value, text, m)
+                if record is not None:
+                    results.append(record)
+        return results
+
+
+def _match_record(spec, data, index, value, text, m, base=0):
+    """Result dict for match `m`; `base` is the offset of `text` in the string `m` ran over"""
+    extra = {}
+    if spec['convert'] is not None:
+        extra = spec['convert'](m)
+        if extra is None:
+            return None
+    # An assembled OCR line is as reliable as the words the value was read from
+    # The matched occurrence, not the first one: a PAN also appears inside the GSTIN
+    offset = m.start(spec['value_group']) - base if value else -1
+    confidence = (data.span_confidence(index, offset, offset + len(value))
+                  if offset >= 0 else data.confidence(index))
+    return {
+        'field': spec['field'],
+        'value': value,
+        'page': data.page(index),
+        'line': data.line(index),
+        'snippet': text[:100],
+        'confidence': confidence,
+        **extra
+    }
@@ -0,0 +1,321 @@
+# ==================== modules/registry_check.py ====================
+"""
+Streaming cross-check of a vendor registry export against the compliance rules.
+
+/analyze applies validate_gst/pan/udyam, check_gst_pan_consistency,
+check_date_validity and check_name_consistency to one uploaded bundle.
+RegistryCheck applies the same ComplianceChecker rules to every row of a
+CSV or NDJSON vendor export:
+
+- The input is read lazily in chunks of REGISTRY_CHECK_CHUNK_ROWS rows.
+- Chunks are checked in a process pool with at most two chunks per
+  worker in flight, and the results are written to an NDJSON file in row
+  order. Memory stays constant whatever the file size.
+- After every chunk, a checkpoint (rows done, output bytes, running
+  summary) is replaced atomically next to the output.
+- An interrupted run resumes from the checkpoint. Output written after
+  the last checkpoint is truncated and re-checked, so no row is lost or
+  duplicated.
+
+Used by the /registry-check endpoints and from the command line:
+    python -m modules.registry_check vendors.csv [-o results.ndjson] [--restart]
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from config import Config
+from modules.compliance_checker import ComplianceChecker
+
+# 🎯 DATADOG METRICS
+from modules.datadog_client import increment, timing
+
+# Accepted column names per field (lowercased); the first present one wins
+FIELD_ALIASES = {
+    'vendor_id': ('vendor_id', 'vendor_code', 'id'),
+    'gst_number': ('gst_number', 'gstin', 'gst'),
+    'pan_number': ('pan_number', 'pan'),
+    'udyam_number': ('udyam_number', 'udyam'),
+    'company_name': ('company_name', 'vendor_name', 'name'),
+    'gst_name': ('gst_name', 'gst_legal_name', 'legal_name'),
+    'udyam_name': ('udyam_name', 'enterprise_name'),
+    'gst_date': ('gst_date', 'gst_registration_date'),
+    'udyam_date': ('udyam_date', 'udyam_registration_date'),
+}
+
+# Names on the different certificates must describe the same company
+NAME_FIELDS = ('company_name', 'gst_name', 'udyam_name')
+
+FORMATS = {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}
+
+# Built once per pool process by _init_registry_worker
+_worker_checker = None
+
+
+def detect_format(path):
+    fmt = FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"Unsupported registry format: {path} (expected .csv, .ndjson or .jsonl)")
+    return fmt
+
+
+def iter_vendor_records(path, fmt=None):
+    """Yield one dict per data row, lazily; an unparsable NDJSON line yields {'_error': ...}"""
+    fmt = fmt or detect_format(path)
+    if fmt == 'csv':
+        # utf-8-sig: spreadsheet exports often start with a BOM
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            yield from csv.DictReader(f)
+        return
+
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                record = {'_error': f'Invalid JSON: {e}'}
+            yield record if isinstance(record, dict) else {'_error': 'Row is not a JSON object'}
+
+
+def normalise_record(record):
+    """{field: stripped value or None} using FIELD_ALIASES"""
+    lowered = {str(key).strip().lower(): value for key, value in record.items() if key is not None}
+    fields = {}
+    for field, aliases in FIELD_ALIASES.items():
+        value = next((lowered[alias] for alias in aliases if lowered.get(alias) not in (None, '')), None)
+        fields[field] = str(value).strip() if value is not None else None
+    return fields
+
+
+def check_vendor(checker, row, record):
+    """Run the /analyze rules that apply to one registry row"""
+    result = {'row': row}
+    if '_error' in record:
+        result.update({'compliant': False, 'failed_checks': ['row'], 'issues': [record['_error']], 'checks': {}})
+        return result
+
+    fields = normalise_record(record)
+    result['vendor_id'] = fields['vendor_id']
+    checks = {}
+    if fields['gst_number']:
+        checks['gst'] = checker.validate_gst(fields['gst_number'])
+    if fields['pan_number']:
+        checks['pan'] = checker.validate_pan(fields['pan_number'])
+    if fields['udyam_number']:
+        checks['udyam'] = checker.validate_udyam(fields['udyam_number'])
+    if fields['gst_number'] and fields['pan_number']:
+        checks['gst_pan'] = checker.check_gst_pan_consistency(fields['gst_number'], fields['pan_number'])
+    if fields['gst_date']:
+        checks['gst_date'] = checker.check_date_validity(fields['gst_date'], 'gst')
+    if fields['udyam_date']:
+        checks['udyam_date'] = checker.check_date_validity(fields['udyam_date'], 'udyam')
+    names = [fields[field] for field in NAME_FIELDS if fields[field]]
+    if len(names) > 1:
+        checks['names'] = checker.check_name_consistency(names)
+
+    failed = [name for name, check in checks.items() if not check.get('valid', check.get('consistent', False))]
+    issues = [f"{name}: {checks[name].get('error') or checks[name].get('message')}" for name in failed]
+    if not checks:
+        failed, issues = ['identifiers'], ['No GST, PAN or Udyam number']
+    result.update({'compliant': not failed, 'failed_checks': failed, 'issues': issues, 'checks': checks})
+    return result
+
+
+def _init_registry_worker():
+    global _worker_checker
+    _worker_checker = ComplianceChecker()
+
+
+def _check_chunk(first_row, records):
+    """
+    Check one chunk; returns (NDJSON text, summary). Serialising here keeps
+    the parent process down to writing bytes.
+    """
+    checker = _worker_checker or ComplianceChecker()
+    lines = []
+    summary = _empty_summary()
+    for offset, record in enumerate(records):
+        result = check_vendor(checker, first_row + offset, record)
+        lines.append(json.dumps(result, default=str))
+        _count(summary, result)
+    return '\n'.join(lines) + '\n' if lines else '', summary
+
+
+def _empty_summary():
+    return {'rows': 0, 'compliant': 0, 'failed_checks': {}}
+
+
+def _count(summary, result):
+    summary['rows'] += 1
+    summary['compliant'] += int(result['compliant'])
+    for check in result['failed_checks']:
+        summary['failed_checks'][check] = summary['failed_checks'].get(check, 0) + 1
+
+
+def _merge(summary, part):
+    summary['rows'] += part['rows']
+    summary['compliant'] += part['compliant']
+    for check, count in part['failed_checks'].items():
+        summary['failed_checks'][check] = summary['failed_checks'].get(check, 0) + count
+
+
+class RegistryCheck:
+    """One resumable registry cross-check: input file -> NDJSON results + checkpoint"""
+
+    def __init__(self, input_path, output_path, checkpoint_path=None, fmt=None, chunk_rows=None, workers=None):
+        self.input_path = input_path
+        self.output_path = output_path
+        self.checkpoint_path = checkpoint_path or f"{output_path}.checkpoint.json"
+        self.fmt = fmt or detect_format(input_path)
+        self.chunk_rows = Config.REGISTRY_CHECK_CHUNK_ROWS if chunk_rows is None else chunk_rows
+        self.workers = Config.REGISTRY_CHECK_WORKERS if workers is None else workers
+
+    def status(self):
+        """Checkpoint contents, or None before the first chunk"""
+        try:
+            with open(self.checkpoint_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_checkpoint(self, state):
+        directory = os.path.dirname(os.path.abspath(self.checkpoint_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _start_state(self, resume):
+        input_size = os.path.getsize(self.input_path)
+        state = self.status() if resume else None
+        if state is not None and state.get('input_size') != input_size:
+            raise ValueError("Input file changed since the checkpoint; rerun with restart")
+        if state is None:
+            state = {
+                'input': os.path.abspath(self.input_path),
+                'input_size': input_size,
+                'format': self.fmt,
+                'rows_done': 0,
+                'output_bytes': 0,
+                'summary': _empty_summary(),
+                'started_at': time.time(),
+                'finished': False
+            }
+        return state
+
+    def run(self, resume=True):
+        """
+        Check the rows not covered by the checkpoint; yields NDJSON text per
+        chunk, in row order, after it is written and checkpointed.
+
+        Stopping the generator early (client disconnect, Ctrl-C) leaves a
+        consistent checkpoint to resume from.
+        """
+        state = self._start_state(resume)
+        if state['finished']:
+            return
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.output_path)), exist_ok=True)
+        mode = 'r+b' if state['rows_done'] and os.path.exists(self.output_path) else 'wb'
+        executor = None
+        try:
+            with open(self.output_path, mode) as out:
+                # Drop results written after the last checkpoint; those rows are checked again
+                out.truncate(state['output_bytes'])
+                out.seek(state['output_bytes'])
+
+                records = islice(iter_vendor_records(self.input_path, self.fmt), state['rows_done'], None)
+                chunks = _chunks(records, self.chunk_rows, state['rows_done'] + 1)
+                if self.workers > 1:
+                    executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context(Config.EXTRACTION_MP_CONTEXT),
+                        initializer=_init_registry_worker
+                    )
+
+                in_flight = deque()
+                limit = 2 * self.workers if executor else 1
+                for first_row, chunk in chunks:
+                    if executor:
+                        in_flight.append((len(chunk), executor.submit(_check_chunk, first_row, chunk)))
+                    else:
+                        in_flight.append((len(chunk), _check_chunk(first_row, chunk)))
+                    if len(in_flight) >= limit:
+                        yield self._write(out, state, *in_flight.popleft())
+                while in_flight:
+                    yield self._write(out, state, *in_flight.popleft())
+
+            state['finished'] = True
+            state['finished_at'] = time.time()
+            self._save_checkpoint(state)
+            timing("govdoc.registry_check.duration_ms", (state['finished_at'] - state['started_at']) * 1000)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def _write(self, out, state, rows, outcome):
+        text, summary = outcome.result() if hasattr(outcome, 'result') else outcome
+        out.write(text.encode('utf-8'))
+        out.flush()
+        os.fsync(out.fileno())
+
+        state['rows_done'] += rows
+        state['output_bytes'] = out.tell()
+        _merge(state['summary'], summary)
+        self._save_checkpoint(state)
+
+        increment("govdoc.registry_check.rows", value=rows)
+        if summary['rows'] - summary['compliant']:
+            increment("govdoc.registry_check.noncompliant", value=summary['rows'] - summary['compliant'])
+        return text
+
+
+def _chunks(records, size, first_row):
+    """(first row number, [record, ...]) per `size` records"""
+    row = first_row
+    while True:
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        yield row, chunk
+        row += len(chunk)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cross-check a vendor registry export (CSV or NDJSON)")
+    parser.add_argument('input', help="vendors.csv / vendors.ndjson")
+    parser.add_argument('-o', '--output', help="NDJSON results (default: <input>.results.ndjson)")
+    parser.add_argument('--restart', action='store_true', help="ignore an existing checkpoint")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-rows', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    output = args.output or f"{os.path.splitext(args.input)[0]}.results.ndjson"
+    job = RegistryCheck(args.input, output, chunk_rows=args.chunk_rows, workers=args.workers)
+    previous = None if args.restart else job.status()
+    if previous and not previous['finished']:
+        print(f"↩️ Resuming after row {previous['rows_done']}")
+
+    start = time.perf_counter()
+    for _ in job.run(resume=not args.restart):
+        state = job.status()
+        print(f"  {state['rows_done']} rows checked ({time.perf_counter() - start:.0f}s)", file=sys.stderr)
+
+    summary = job.status()['summary']
+    print(json.dumps(summary, indent=2))
+    print(f"✅ Results: {output}")
+
+
+if __name__ == "__main__":
+    main()
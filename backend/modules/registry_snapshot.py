@@ -0,0 +1,388 @@
+# ==================== modules/registry_snapshot.py ====================
+"""
+Offline GSTIN / PAN / Udyam registry snapshot with memory-mapped lookups.
+
+validate_gst, validate_pan and validate_udyam only check the format. The
+periodic registry dumps also say whether a registration exists, whether it
+is active, cancelled or suspended, and since when. compile_snapshot() turns
+such a dump (CSV or NDJSON) into one binary file:
+
+- a JSON header (counts, snapshot date, source file),
+- per identifier kind, the numbers sorted as a fixed-width byte array, and
+  a parallel array of records: status code, registration day and the day
+  the status last changed.
+
+RegistrySnapshot maps that file read-only with mmap. Nothing is parsed
+at start-up, and gunicorn workers share the pages through the OS page
+cache instead of each holding a copy. A lookup is a binary search over the
+sorted numbers: about 24 probes for ten million registrations, a few
+microseconds. Recompiling replaces the file atomically; a worker keeps the
+snapshot it mapped until it restarts.
+
+Compile a dump from the command line:
+    python -m modules.registry_snapshot gst_dump.csv [-o snapshot.bin] [--as-of 2026-10-01]
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+from functools import partial
+
+import numpy as np
+
+from config import Config
+from modules.bulk_validation import validate_gst_many, validate_pan_many, validate_udyam_many
+from modules.date_parser import DateParser
+from modules.registry_check import iter_vendor_records
+
+MAGIC = b'GDREGSNP'
+SNAPSHOT_FORMAT = 1
+_ALIGN = 64
+
+# Identifier kind -> (number width, bulk format check). The widths differ, so
+# a valid number belongs to exactly one kind. The registry is the authority on
+# which GSTINs exist: a well-formed one is indexed whatever its check character.
+KINDS = {
+    'gst': (15, partial(validate_gst_many, checksum_required=False)),
+    'pan': (10, validate_pan_many),
+    'udyam': (19, validate_udyam_many),
+}
+LABELS = {'gst': 'GSTIN', 'pan': 'PAN', 'udyam': 'Udyam registration'}
+
+# Status code = index; registry spellings are mapped with STATUS_ALIASES
+STATUSES = ('unknown', 'active', 'cancelled', 'suspended', 'inoperative')
+ACTIVE = STATUSES.index('active')
+STATUS_ALIASES = {
+    'valid': 'active', 'approved': 'active', 'provisional': 'active',
+    'canceled': 'cancelled', 'cancelled suo moto': 'cancelled', 'deleted': 'cancelled', 'surrendered': 'cancelled',
+    'inactive': 'inoperative',
+}
+
+# Accepted dump column names per field (lowercased); the first present one wins
+DUMP_FIELDS = {
+    'number': ('number', 'gstin', 'gst_number', 'pan', 'pan_number', 'udyam', 'udyam_number',
+               'registration_number'),
+    'status': ('status', 'registration_status', 'gstin_status', 'pan_status'),
+    'registered': ('registration_date', 'date_of_registration', 'registered_on', 'effective_date'),
+    'status_since': ('status_date', 'cancellation_date', 'status_effective_date', 'last_updated'),
+}
+
+RECORD = np.dtype([('status', 'u1'), ('registered', '<i4'), ('status_since', '<i4')])
+# One record read straight from the mapping: cheaper than a NumPy row for single lookups
+_RECORD_STRUCT = struct.Struct('<Bii')
+# Day number for a date the dump did not give
+NO_DAY = int(np.iinfo(np.int32).min)
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+LOOKUP_RESULT = np.dtype([('found', '?'), ('status', 'u1'), ('registered', 'M8[D]'), ('status_since', 'M8[D]')])
+
+COMPILE_CHUNK_ROWS = 100000
+
+
+def _aligned(offset):
+    return -(-offset // _ALIGN) * _ALIGN
+
+
+def _status_code(value):
+    status = str(value or '').strip().lower()
+    status = STATUS_ALIASES.get(status, status)
+    return STATUSES.index(status) if status in STATUSES else 0
+
+
+def _day_numbers(parser, values, source):
+    days = parser.parse_many(values, source)
+    return np.where(np.isnat(days), NO_DAY, days.astype(np.int64)).astype(np.int32)
+
+
+def _day(value):
+    """ISO date for a stored day number, None for NO_DAY"""
+    return None if value == NO_DAY else date.fromordinal(_EPOCH_ORDINAL + value).isoformat()
+
+
+def _columns(keys):
+    """{field: dump column or None} for one set of dump column names"""
+    lowered = {str(key).strip().lower(): key for key in keys if key is not None}
+    return {field: next((lowered[alias] for alias in aliases if alias in lowered), None)
+            for field, aliases in DUMP_FIELDS.items()}
+
+
+def _compile_chunk(rows, parser, sections):
+    """Append one chunk's (numbers, records) to `sections` per kind; returns the rejected row count"""
+    # A CSV dump has one header; NDJSON rows usually share their keys too
+    columns_by_keys = {}
+    values = {field: [] for field in DUMP_FIELDS}
+    for row in rows:
+        keys = tuple(row)
+        columns = columns_by_keys.get(keys) or columns_by_keys.setdefault(keys, _columns(keys))
+        for field, column in columns.items():
+            values[field].append(row.get(column) if column is not None else None)
+
+    numbers = ['' if number is None else str(number).strip().upper() for number in values['number']]
+    records = np.zeros(len(numbers), dtype=RECORD)
+    records['status'] = [_status_code(status) for status in values['status']]
+    records['registered'] = _day_numbers(parser, values['registered'], 'registry:registered')
+    records['status_since'] = _day_numbers(parser, values['status_since'], 'registry:status_since')
+
+    accepted = np.zeros(len(numbers), dtype=bool)
+    for kind, (width, validate) in KINDS.items():
+        valid = validate(numbers)['valid'] & ~accepted
+        if valid.any():
+            rows_of_kind = np.flatnonzero(valid)
+            sections[kind].append((np.array([numbers[i] for i in rows_of_kind.tolist()], dtype=f'S{width}'),
+                                   records[rows_of_kind]))
+        accepted |= valid
+    return int(len(numbers) - accepted.sum())
+
+
+def _sorted_section(chunks, width):
+    """One kind's numbers sorted, duplicates resolved to the row that came last in the dump"""
+    if not chunks:
+        return np.zeros(0, dtype=f'S{width}'), np.zeros(0, dtype=RECORD)
+    numbers = np.concatenate([chunk[0] for chunk in chunks])
+    records = np.concatenate([chunk[1] for chunk in chunks])
+    # Stable: equal numbers keep dump order, so the last of each run is the latest row
+    order = np.argsort(numbers, kind='stable')
+    numbers, records = numbers[order], records[order]
+    last = np.ones(len(numbers), dtype=bool)
+    last[:-1] = numbers[1:] != numbers[:-1]
+    return numbers[last], records[last]
+
+
+def compile_snapshot(dump_path, snapshot_path=None, as_of=None, chunk_rows=COMPILE_CHUNK_ROWS):
+    """
+    Compile a registry dump into a snapshot file; returns its header.
+
+    Rows whose number is not a well-formed GSTIN, PAN or Udyam number are
+    counted as rejected and skipped. `as_of` (a date) is the day the dump was taken;
+    it defaults to the dump file's modification day.
+    """
+    snapshot_path = snapshot_path or Config.REGISTRY_SNAPSHOT_PATH
+    if not snapshot_path:
+        raise ValueError("No snapshot path given and REGISTRY_SNAPSHOT_PATH is not set")
+    as_of = as_of or date.fromtimestamp(os.path.getmtime(dump_path))
+    start = time.perf_counter()
+
+    parser = DateParser()
+    sections = {kind: [] for kind in KINDS}
+    rows = rejected = 0
+    chunk = []
+    for record in iter_vendor_records(dump_path):
+        if '_error' in record:
+            rejected += 1
+            rows += 1
+            continue
+        chunk.append(record)
+        if len(chunk) >= chunk_rows:
+            rejected += _compile_chunk(chunk, parser, sections)
+            rows += len(chunk)
+            chunk = []
+    if chunk:
+        rejected += _compile_chunk(chunk, parser, sections)
+        rows += len(chunk)
+
+    header = {
+        'format': SNAPSHOT_FORMAT,
+        'source': os.path.abspath(dump_path),
+        'as_of': as_of.isoformat(),
+        'compiled_at': datetime.now().isoformat(timespec='seconds'),
+        'rows': rows,
+        'rejected': rejected,
+        'kinds': {}
+    }
+    arrays = []
+    offset = 0
+    for kind, (width, _) in KINDS.items():
+        numbers, records = _sorted_section(sections.pop(kind), width)
+        numbers_offset = offset
+        offset = _aligned(offset + numbers.nbytes)
+        header['kinds'][kind] = {'count': len(numbers), 'width': width,
+                                 'numbers_offset': numbers_offset, 'records_offset': offset}
+        offset = _aligned(offset + records.nbytes)
+        arrays += [(numbers_offset, numbers), (header['kinds'][kind]['records_offset'], records)]
+
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = _aligned(len(MAGIC) + 4 + len(header_bytes))
+
+    directory = os.path.dirname(os.path.abspath(snapshot_path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(MAGIC + np.uint32(len(header_bytes)).tobytes() + header_bytes)
+            for array_offset, array in arrays:
+                f.seek(data_start + array_offset)
+                f.write(array.tobytes())
+            f.truncate(data_start + offset)
+        # Workers that mapped the old file keep its inode; new ones map this one
+        os.replace(tmp_path, snapshot_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    print(f"📒 Registry snapshot compiled in {time.perf_counter() - start:.1f}s: "
+          + ', '.join(f"{section['count']} {kind}" for kind, section in header['kinds'].items())
+          + f", {rejected} rejected rows -> {snapshot_path}")
+    return header
+
+
+class RegistrySnapshot:
+    """Read-only, memory-mapped view of a compiled registry snapshot"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            # The mapping outlives the descriptor
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        mapped = np.frombuffer(self._map, dtype=np.uint8)
+        if bytes(mapped[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"Not a registry snapshot: {path}")
+        length = int(mapped[len(MAGIC):len(MAGIC) + 4].view('<u4')[0])
+        self.header = json.loads(bytes(mapped[len(MAGIC) + 4:len(MAGIC) + 4 + length]))
+        if self.header.get('format') != SNAPSHOT_FORMAT:
+            raise ValueError(f"Registry snapshot format {self.header.get('format')}, expected {SNAPSHOT_FORMAT}")
+
+        data_start = _aligned(len(MAGIC) + 4 + length)
+        self._numbers = {}
+        self._records = {}
+        self._record_starts = {}
+        for kind, section in self.header['kinds'].items():
+            count, width = section['count'], section['width']
+            start = data_start + section['numbers_offset']
+            # Contiguous, so searchsorted works on the mapping without a copy
+            self._numbers[kind] = mapped[start:start + count * width].view(f'S{width}')
+            start = data_start + section['records_offset']
+            self._records[kind] = mapped[start:start + count * RECORD.itemsize].view(RECORD)
+            self._record_starts[kind] = start
+
+    @property
+    def as_of(self):
+        return self.header['as_of']
+
+    def count(self, kind):
+        return len(self._numbers.get(kind, ()))
+
+    def info(self):
+        """Snapshot summary for /system-status"""
+        return {'path': self.path, 'as_of': self.as_of, 'compiled_at': self.header['compiled_at'],
+                'counts': {kind: self.count(kind) for kind in self._numbers}}
+
+    def _index(self, kind, number):
+        numbers = self._numbers.get(kind)
+        if numbers is None or number is None:
+            return None
+        try:
+            key = str(number).strip().upper().encode('ascii')
+        except UnicodeEncodeError:
+            return None
+        if not key or len(key) > numbers.itemsize:
+            return None
+        i = int(numbers.searchsorted(key))
+        return i if i < len(numbers) and numbers[i] == key else None
+
+    def lookup(self, kind, number):
+        """{'number', 'status', 'active', 'registered_on', 'status_since'}, or None if not in the snapshot"""
+        i = self._index(kind, number)
+        if i is None:
+            return None
+        status, registered, status_since = _RECORD_STRUCT.unpack_from(
+            self._map, self._record_starts[kind] + i * RECORD.itemsize)
+        return {
+            'number': self._numbers[kind][i].decode('ascii'),
+            'status': STATUSES[status],
+            'active': status == ACTIVE,
+            'registered_on': _day(registered),
+            'status_since': _day(status_since)
+        }
+
+    def lookup_many(self, kind, numbers):
+        """LOOKUP_RESULT array, one row per number; NaT where a date is unknown"""
+        width = KINDS[kind][0]
+        keys = [str(number or '').strip().upper() for number in numbers]
+        # Too long or non-ASCII: cannot be in the snapshot; '' never is
+        keys = np.array([key if len(key) <= width and key.isascii() else '' for key in keys], dtype=f'S{width}')
+        sorted_numbers = self._numbers[kind]
+        result = np.zeros(len(keys), dtype=LOOKUP_RESULT)
+        if not len(sorted_numbers):
+            result['registered'] = result['status_since'] = np.datetime64('NaT')
+            return result
+
+        positions = np.minimum(np.searchsorted(sorted_numbers, keys), len(sorted_numbers) - 1)
+        found = (sorted_numbers[positions] == keys) & (keys != b'')
+        records = self._records[kind][positions]
+        result['found'] = found
+        result['status'] = np.where(found, records['status'], 0)
+        for field in ('registered', 'status_since'):
+            days = records[field]
+            result[field] = np.where(found & (days != NO_DAY), days.astype('M8[D]'), np.datetime64('NaT'))
+        return result
+
+    def verify(self, kind, number, reject_unknown=None):
+        """
+        Registry tier of validate_gst/pan/udyam: the lookup plus 'valid' and,
+        when invalid, an 'error'. A number missing from the snapshot only
+        fails with REGISTRY_REJECT_UNKNOWN: the dump may predate it.
+        """
+        reject_unknown = Config.REGISTRY_REJECT_UNKNOWN if reject_unknown is None else reject_unknown
+        record = self.lookup(kind, number)
+        label = LABELS[kind]
+        if record is None:
+            result = {'found': False, 'status': 'not_found', 'active': False, 'as_of': self.as_of,
+                      'valid': not reject_unknown}
+            if reject_unknown:
+                result['error'] = f'{label} not in registry snapshot of {self.as_of}'
+            return result
+
+        result = {'found': True, **record, 'as_of': self.as_of, 'valid': record['active']}
+        if not record['active']:
+            since = f" since {record['status_since']}" if record['status_since'] else ''
+            result['error'] = f"{label} {record['status']}{since} (registry snapshot of {self.as_of})"
+        return result
+
+
+def load_registry_snapshot(path=None):
+    """RegistrySnapshot of Config.REGISTRY_SNAPSHOT_PATH, or None when none is configured or compiled"""
+    path = Config.REGISTRY_SNAPSHOT_PATH if path is None else path
+    if not path:
+        return None
+    if not os.path.exists(path):
+        print(f"⚠️ Registry snapshot not found: {path}; registry checks disabled "
+              f"(compile one with python -m modules.registry_snapshot)")
+        return None
+    try:
+        return RegistrySnapshot(path)
+    except ValueError as e:
+        print(f"⚠️ {e}; registry checks disabled")
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile a GSTIN/PAN/Udyam registry dump (CSV or NDJSON)")
+    parser.add_argument('dump', help="registry dump: number, status, registration_date, status_date columns")
+    parser.add_argument('-o', '--output', help="snapshot file (default: REGISTRY_SNAPSHOT_PATH)")
+    parser.add_argument('--as-of', type=date.fromisoformat, default=None,
+                        help="day the dump was taken, YYYY-MM-DD (default: the dump's modification day)")
+    parser.add_argument('--lookup', nargs='*', default=(), metavar='NUMBER',
+                        help="look these numbers up in the compiled snapshot")
+    args = parser.parse_args(argv)
+
+    output = args.output or Config.REGISTRY_SNAPSHOT_PATH
+    if not output:
+        parser.error("give -o or set REGISTRY_SNAPSHOT_PATH")
+    header = compile_snapshot(args.dump, output, as_of=args.as_of)
+    print(json.dumps(header, indent=2))
+
+    snapshot = RegistrySnapshot(output)
+    for number in args.lookup:
+        kind = next((kind for kind, (width, validate) in KINDS.items() if validate([number])['valid'][0]), None)
+        result = snapshot.verify(kind, number) if kind else {'error': 'Not a GSTIN, PAN or Udyam number'}
+        print(f"{number}: {json.dumps(result)}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
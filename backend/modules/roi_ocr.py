@@ -0,0 +1,166 @@
+# ==================== modules/roi_ocr.py ====================
+"""
+Region-of-interest OCR for identifier fields.
+
+A GSTIN, PAN or Udyam number is one short token, but a page is OCR'd with
+a generic whole-page configuration, where 0/O and 1/I/l confusions break the
+Config patterns. When a page shows a field's label (GSTIN, Permanent Account
+Number, ...) but no identifier matching the pattern, RegionOCR uses the
+anchor word boxes from that first pass. It re-reads only the strip to the
+right of each anchor and the line below it, upscaled to a comfortable glyph
+height, as a single text line (psm 7) restricted to the field's characters.
+The records it returns are added to the page's text_data, so
+DocumentProcessor.find_pattern sees them like any other text. A low-dpi
+page whose identifier is recovered this way no longer has to be rendered
+and OCR'd again at full resolution.
+"""
+
+import re
+
+import cv2
+
+from config import Config
+
+ALNUM = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+# White margin around a crop; Tesseract misses glyphs touching the edge
+CROP_BORDER = 10
+
+# Crops whose anchor line is shorter than this (px) are upscaled to it
+CROP_LINE_HEIGHT = 40
+
+
+class FieldProfile:
+    """How to recognise that a field is missing, where to look, and how to OCR it"""
+
+    def __init__(self, field, label, anchors, pattern, whitelist, psm=7):
+        """
+        Args:
+            field: find_pattern field name ('gst_number', ...)
+            label: regex over the page text saying the field should be present
+            anchors: lowercase words whose boxes the identifier sits next to or under
+            pattern: identifier regex (Config.*_PATTERN)
+            whitelist: characters Tesseract may produce in the crop
+            psm: Tesseract page segmentation mode for the crop
+        """
+        self.field = field
+        self.label = re.compile(label, re.IGNORECASE)
+        self.anchors = set(anchors)
+        self.pattern = re.compile(pattern, re.IGNORECASE)
+        self.whitelist = whitelist
+        self.psm = psm
+
+    def is_missing(self, page_text):
+        """Label on the page but no identifier matching the pattern"""
+        return bool(self.label.search(page_text)) and not self.pattern.search(page_text)
+
+    def anchor_boxes(self, text_results):
+        """(left, top, width, height) of the anchor words, in reading order"""
+        boxes = []
+        for item in text_results:
+            # Assembled OCR lines keep their word boxes under 'words'
+            for word in item.get('words') or [item]:
+                position = word.get('position')
+                if position and re.sub(r'[^a-z]', '', word['text'].lower()) in self.anchors:
+                    boxes.append((position['left'], position['top'], position['width'], position['height']))
+        return boxes
+
+
+FIELD_PROFILES = [
+    FieldProfile('gst_number', r'\bGSTIN\b|\bGST\s*(?:No|Number)\b', ('gstin', 'gst'),
+                 Config.GST_PATTERN, ALNUM),
+    FieldProfile('pan_number', r'\bPAN\s*(?:No|Number)?\s*[:.]|Permanent\s+Account\s+Number', ('pan', 'permanent'),
+                 Config.PAN_PATTERN, ALNUM),
+    FieldProfile('udyam_number', r'\bUdyam\s+Registration\s+Number|\bUDYAM-', ('udyam',),
+                 Config.UDYAM_PATTERN, ALNUM + '-'),
+]
+
+
+def missing_fields(text_results):
+    """Profiles whose label is on the page without a matching identifier"""
+    page_text = ' '.join(item['text'] for item in text_results)
+    return [profile for profile in FIELD_PROFILES if profile.is_missing(page_text)]
+
+
+class RegionOCR:
+    """Re-reads identifier regions next to anchor words with a field profile"""
+
+    def __init__(self, engine, max_anchors=None):
+        self.engine = engine
+        self.max_anchors = Config.OCR_ROI_MAX_ANCHORS if max_anchors is None else max_anchors
+
+    def read_fields(self, image_np, text_results, profiles, page_num, dpi=None):
+        """
+        OCR the regions around each profile's anchors in `image_np`.
+
+        `text_results` are the first-pass records of the same image; their
+        positions locate the anchors. Returns one 'ocr_roi' record per field
+        found, from the first region whose text matches the field pattern.
+        """
+        gray = cv2.cvtColor(image_np, cv2.COLOR_RGB2GRAY) if image_np.ndim == 3 else image_np
+        records = []
+        for profile in profiles:
+            for box in profile.anchor_boxes(text_results)[:self.max_anchors]:
+                record = self._read_anchor(gray, profile, box, page_num, dpi)
+                if record is not None:
+                    records.append(record)
+                    break
+        return records
+
+    def _read_anchor(self, gray, profile, box, page_num, dpi):
+        zoom = CROP_LINE_HEIGHT / box[3] if 0 < box[3] < CROP_LINE_HEIGHT else 1.0
+        for region in _candidate_regions(box, gray.shape):
+            left, top, right, bottom = region
+            crop = gray[top:bottom, left:right]
+            if crop.size == 0:
+                continue
+            if zoom > 1.0:
+                crop = cv2.resize(crop, None, fx=zoom, fy=zoom, interpolation=cv2.INTER_CUBIC)
+            _, crop = cv2.threshold(crop, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+            crop = cv2.copyMakeBorder(crop, CROP_BORDER, CROP_BORDER, CROP_BORDER, CROP_BORDER,
+                                      cv2.BORDER_CONSTANT, value=255)
+            data = self.engine.image_to_data(crop, psm=profile.psm, whitelist=profile.whitelist)
+
+            words = []
+            confidences = []
+            for text, conf in zip(data['text'], data['conf']):
+                text = str(text).strip()
+                if text and int(float(conf)) >= 0:
+                    words.append(text)
+                    confidences.append(int(float(conf)) / 100.0)
+            if not words:
+                continue
+
+            # The whitelist has no space, but Tesseract may still split a long token
+            for text in (' '.join(words), ''.join(words)):
+                if profile.pattern.search(text):
+                    record = {
+                        'page': page_num,
+                        'line': f"roi_{profile.field}",
+                        'text': text,
+                        'type': 'ocr_roi',
+                        'confidence': sum(confidences) / len(confidences),
+                        'position': {'left': left, 'top': top, 'width': right - left, 'height': bottom - top}
+                    }
+                    if dpi:
+                        record['dpi'] = dpi
+                    return record
+        return None
+
+
+def _candidate_regions(box, shape):
+    """(left, top, right, bottom) strips: right of the anchor on its line, then the line below"""
+    left, top, width, height = box
+    page_h, page_w = shape[:2]
+    line_h = max(height, 1)
+
+    def clip(l, t, r, b):
+        return (int(max(0, l)), int(max(0, t)), int(min(page_w, r)), int(min(page_h, b)))
+
+    regions = [
+        # Same line: "GSTIN: 27ABCDE1234F1Z5"
+        clip(left + width, top - 0.5 * line_h, page_w, top + 1.5 * line_h),
+        # Next line: PAN cards print the number under "Permanent Account Number"
+        clip(left - 2 * line_h, top + 1.2 * line_h, left + 30 * line_h, top + 3.2 * line_h),
+    ]
+    return [r for r in regions if r[2] > r[0] and r[3] > r[1]]
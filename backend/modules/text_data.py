@@ -0,0 +1,384 @@
+# ==================== modules/text_data.py ====================
+"""
+Columnar container for extracted text_data.
+
+Extraction used to hand around a list of per-line / per-word dicts, and OCR
+of a large scan produces tens of thousands of them. TextData keeps the same
+fields in parallel arrays (page, line, type, confidence, bbox, OCR dpi, and
+the word boxes of assembled OCR lines) and all texts in one SEPARATOR-joined
+buffer with start offsets. The space-joined and
+lowercase views that the checker, the local model and the debug endpoints
+each rebuilt are computed once and cached, and a regex match offset in the
+buffer maps back to its page/line item by bisect.
+
+It behaves like the old list for readers: len(), iteration and indexing
+yield the same dicts (built on demand), and slices are TextData again.
+"""
+
+from array import array
+from bisect import bisect_right
+
+# Joins item texts in the buffer; no field pattern matches it, so a match
+# found in the buffer never spans two items
+SEPARATOR = '\x00'
+
+# bbox column value for items without an OCR 'position'
+NO_BOX = -1
+
+_BOX_KEYS = ('left', 'top', 'width', 'height')
+
+# Ints per word in the words column: offset and length in the line text, box, confidence %
+_WORD_FIELDS = 7
+
+
+class TextData:
+    """Immutable page/line text records stored as parallel columns"""
+
+    __slots__ = ('_buffer', '_starts', '_pages', '_lines', '_line_labels', '_types', '_type_names',
+                 '_confidences', '_boxes', '_dpis', '_word_starts', '_words', '_clean', '_joined', '_lower',
+                 '_folded')
+
+    def __init__(self):
+        self._buffer = ''
+        self._starts = array('I', [1])  # item i is _buffer[_starts[i]:_starts[i + 1] - 1]
+        self._pages = array('I')
+        self._lines = array('i')
+        self._line_labels = {}  # index -> non-integer line label ('table1_row2')
+        self._types = array('B')
+        self._type_names = []
+        self._confidences = array('d')
+        self._boxes = array('i')  # 4 per item (left, top, width, height), empty if no item has one
+        self._dpis = array('H')  # OCR render resolution per item (0: not OCR), empty if no item has one
+        self._word_starts = array('I')  # item i's words are _words[_WORD_FIELDS * _word_starts[i]:...[i + 1]]
+        self._words = array('i')  # _WORD_FIELDS per word, both empty if no item has 'words'
+        self._clean = True  # no text contains SEPARATOR
+        self._joined = None
+        self._lower = None
+        self._folded = {}  # fold function -> (folded buffer, starts)
+
+    # ---- construction ----
+
+    @classmethod
+    def of(cls, text_data):
+        """`text_data` as a TextData (returned as is if it already is one)"""
+        if isinstance(text_data, cls):
+            return text_data
+        return cls.from_records(text_data or [])
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Build from dicts with page, line, text and optional type/confidence/
+        position/dpi/words. A line's 'words' ({text, confidence, position})
+        must appear in its text in order.
+        """
+        data = cls()
+        texts = []
+        boxes = []
+        has_boxes = False
+        dpis = []
+        word_starts = array('I', [0])
+        words = array('i')
+        type_index = {}
+        for index, record in enumerate(records):
+            text = record['text']
+            texts.append(text)
+            data._starts.append(data._starts[-1] + len(text) + 1)
+            data._pages.append(record.get('page', 1))
+            line = record.get('line', 0)
+            if isinstance(line, int) and not isinstance(line, bool):
+                data._lines.append(line)
+            else:
+                data._lines.append(-1)
+                data._line_labels[index] = line
+            kind = record.get('type', 'unknown')
+            if kind not in type_index:
+                type_index[kind] = len(data._type_names)
+                data._type_names.append(kind)
+            data._types.append(type_index[kind])
+            data._confidences.append(record.get('confidence', 1.0))
+            position = record.get('position')
+            if position:
+                boxes.extend(int(position[key]) for key in _BOX_KEYS)
+                has_boxes = True
+            else:
+                boxes.extend((NO_BOX,) * 4)
+            dpis.append(record.get('dpi') or 0)
+            cursor = 0
+            for word in record.get('words') or ():
+                offset = text.find(word['text'], cursor)
+                if offset < 0:
+                    raise ValueError(f"word {word['text']!r} not found in line {text!r}")
+                cursor = offset + len(word['text'])
+                box = word['position']
+                words.extend((offset, len(word['text']), *(int(box[key]) for key in _BOX_KEYS),
+                              round(word['confidence'] * 100)))
+            word_starts.append(len(words) // _WORD_FIELDS)
+        # Text-layer items have no boxes; only OCR output pays for the column
+        if has_boxes:
+            data._boxes = array('i', boxes)
+        if any(dpis):
+            data._dpis = array('H', dpis)
+        if words:
+            data._word_starts = word_starts
+            data._words = words
+        data._buffer = SEPARATOR + SEPARATOR.join(texts) if texts else ''
+        data._clean = not any(SEPARATOR in text for text in texts)
+        return data
+
+    @classmethod
+    def concat(cls, parts):
+        """One TextData holding the items of every part, in order"""
+        parts = [cls.of(part) for part in parts if part]
+        if len(parts) == 1:
+            return parts[0]
+        data = cls()
+        type_index = {}
+        for part in parts:
+            base = len(data._pages)
+            offset = data._starts[-1] - 1
+            data._starts.extend(start + offset for start in part._starts[1:])
+            data._pages.extend(part._pages)
+            data._lines.extend(part._lines)
+            data._line_labels.update({base + i: label for i, label in part._line_labels.items()})
+            for kind in part._type_names:
+                if kind not in type_index:
+                    type_index[kind] = len(data._type_names)
+                    data._type_names.append(kind)
+            remap = [type_index[kind] for kind in part._type_names]
+            data._types.extend(remap[t] for t in part._types)
+            data._confidences.extend(part._confidences)
+            if part._boxes:
+                if not data._boxes:
+                    data._boxes.extend((NO_BOX,) * (4 * base))
+                data._boxes.extend(part._boxes)
+            elif data._boxes:
+                data._boxes.extend((NO_BOX,) * (4 * len(part)))
+            if part._dpis:
+                if not data._dpis:
+                    data._dpis.extend((0,) * base)
+                data._dpis.extend(part._dpis)
+            elif data._dpis:
+                data._dpis.extend((0,) * len(part))
+            if part._words:
+                if not data._word_starts:
+                    data._word_starts.extend((0,) * (base + 1))
+                word_base = data._word_starts[-1]
+                data._word_starts.extend(start + word_base for start in part._word_starts[1:])
+                data._words.extend(part._words)
+            elif data._word_starts:
+                data._word_starts.extend((data._word_starts[-1],) * len(part))
+            data._clean = data._clean and part._clean
+        data._buffer = ''.join(part._buffer for part in parts)
+        return data
+
+    # ---- list-like access ----
+
+    def __len__(self):
+        return len(self._pages)
+
+    def __bool__(self):
+        return len(self._pages) > 0
+
+    def __iter__(self):
+        for index in range(len(self._pages)):
+            yield self.record(index)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.select(range(*index.indices(len(self))))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('TextData index out of range')
+        return self.record(index)
+
+    def __eq__(self, other):
+        if isinstance(other, (TextData, list)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        return f"TextData({len(self)} items, {len(self.buffer)} chars)"
+
+    def __getstate__(self):
+        # Cached views are rebuilt on demand instead of being pickled
+        return (self._buffer, self._starts, self._pages, self._lines, self._line_labels, self._types,
+                self._type_names, self._confidences, self._boxes, self._dpis, self._word_starts, self._words,
+                self._clean)
+
+    def __setstate__(self, state):
+        (self._buffer, self._starts, self._pages, self._lines, self._line_labels, self._types,
+         self._type_names, self._confidences, self._boxes, self._dpis, self._word_starts, self._words,
+         self._clean) = state
+        self._joined = self._lower = None
+        self._folded = {}
+
+    def record(self, index):
+        """Item `index` as the dict extraction used to produce"""
+        record = {
+            'page': self._pages[index],
+            'line': self.line(index),
+            'text': self.text(index),
+            'type': self._type_names[self._types[index]],
+            'confidence': self._confidences[index]
+        }
+        dpi = self.dpi(index)
+        if dpi is not None:
+            record['dpi'] = dpi
+        box = self.bbox(index)
+        if box is not None:
+            record['position'] = dict(zip(_BOX_KEYS, box))
+        words = self.words(index)
+        if words:
+            record['words'] = words
+        return record
+
+    def to_records(self):
+        return list(self)
+
+    def select(self, indices):
+        """TextData with only the items at `indices`, in that order"""
+        return TextData.from_records([self.record(index) for index in indices])
+
+    # ---- columns ----
+
+    def text(self, index):
+        return self._buffer[self._starts[index]:self._starts[index + 1] - 1]
+
+    def page(self, index):
+        return self._pages[index]
+
+    def line(self, index):
+        line = self._lines[index]
+        return self._line_labels.get(index, line) if line == -1 else line
+
+    def type(self, index):
+        return self._type_names[self._types[index]]
+
+    def confidence(self, index):
+        return self._confidences[index]
+
+    def dpi(self, index):
+        """Resolution an OCR item was read at, or None"""
+        return (self._dpis[index] or None) if self._dpis else None
+
+    def bbox(self, index):
+        """(left, top, width, height) of an OCR item, or None"""
+        if not self._boxes:
+            return None
+        box = tuple(self._boxes[4 * index:4 * index + 4])
+        return None if box[0] == NO_BOX else box
+
+    def _word_rows(self, index):
+        if not self._word_starts:
+            return []
+        first, last = self._word_starts[index], self._word_starts[index + 1]
+        return [self._words[_WORD_FIELDS * w:_WORD_FIELDS * (w + 1)] for w in range(first, last)]
+
+    def words(self, index):
+        """Word evidence of an assembled OCR line: [{text, confidence, position}], or []"""
+        text = self.text(index)
+        return [{
+            'text': text[row[0]:row[0] + row[1]],
+            'confidence': row[6] / 100.0,
+            'position': dict(zip(_BOX_KEYS, row[2:6]))
+        } for row in self._word_rows(index)]
+
+    def span_confidence(self, index, start, end):
+        """
+        Mean confidence of the words overlapping text(index)[start:end];
+        the item's confidence if it has no word evidence there
+        """
+        confidences = [row[6] for row in self._word_rows(index)
+                       if row[0] < end and row[0] + row[1] > start]
+        if not confidences:
+            return self._confidences[index]
+        return sum(confidences) / len(confidences) / 100.0
+
+    @property
+    def pages(self):
+        """Page number of each item"""
+        return self._pages
+
+    @property
+    def confidences(self):
+        return self._confidences
+
+    def page_numbers(self):
+        """Distinct page numbers, ascending"""
+        return sorted(set(self._pages))
+
+    def text_length(self, index):
+        return self._starts[index + 1] - self._starts[index] - 1
+
+    # ---- shared views ----
+
+    @property
+    def buffer(self):
+        """All texts, each preceded by SEPARATOR; item i starts at starts[i]"""
+        return self._buffer
+
+    @property
+    def starts(self):
+        """Start offset of each item in `buffer`, plus one past the end"""
+        return self._starts
+
+    @property
+    def clean(self):
+        """True if no text contains SEPARATOR, so buffer matches stay within one item"""
+        return self._clean
+
+    @property
+    def joined(self):
+        """' '.join of all texts, built once"""
+        if self._joined is None:
+            if self._clean:
+                self._joined = self._buffer[1:].replace(SEPARATOR, ' ')
+            else:
+                self._joined = ' '.join(self.text(index) for index in range(len(self)))
+        return self._joined
+
+    @property
+    def lower(self):
+        """joined.lower(), built once"""
+        if self._lower is None:
+            self._lower = self.joined.lower()
+        return self._lower
+
+    def folded(self, fold):
+        """
+        (folded buffer, starts) with `fold` applied per item, built once per
+        fold function.
+
+        Folding may change text lengths, so the folded buffer has its own
+        start offsets; use them with index_at() to map folded hits to items.
+        """
+        folded = self._folded.get(fold)
+        if folded is None:
+            folded_texts = [fold(self.text(index)) for index in range(len(self))]
+            starts = array('I', [1])
+            for text in folded_texts:
+                starts.append(starts[-1] + len(text) + 1)
+            buffer = SEPARATOR + SEPARATOR.join(folded_texts) if folded_texts else ''
+            folded = self._folded[fold] = (buffer, starts)
+        return folded
+
+    # ---- offset mapping ----
+
+    def index_at(self, offset, starts=None):
+        """Item whose text contains buffer `offset` (-1 before the first item)"""
+        starts = self._starts if starts is None else starts
+        return bisect_right(starts, offset) - 1
+
+    def span_index(self, start, end):
+        """Item containing the buffer span [start, end), or None if it crosses items"""
+        index = self.index_at(start)
+        if index < 0 or index >= len(self) or end > self._starts[index + 1] - 1:
+            return None
+        return index
+
+    def locate(self, offset):
+        """(page, line) of the item containing buffer `offset`"""
+        index = min(max(self.index_at(offset), 0), len(self) - 1)
+        return self._pages[index], self.line(index)
@@ -0,0 +1,213 @@
+# ==================== modules/upload_ingest.py ====================
+"""
+Streaming upload ingestion with size limits, inline hashing and magic-byte sniffing.
+
+IngestRequest replaces Werkzeug's multipart stream factory, so every file
+part is written straight to a temp file in the upload folder while the body
+is parsed, one parser chunk at a time. On the way through, each chunk is
+counted against MAX_FILE_SIZE and MAX_REQUEST_SIZE, fed to SHA-256 and its
+first bytes are checked against the signature of the declared extension. An
+oversized or disguised upload is rejected mid-stream, before pdfplumber or
+poppler ever see it. commit_upload() then moves the temp file into place and
+returns the content hash for the extraction cache.
+"""
+
+import hashlib
+import io
+import os
+import shutil
+import uuid
+
+from flask import Request
+
+from config import Config
+
+# 🎯 DATADOG METRICS
+from modules.datadog_client import increment
+
+
+# File signatures per allowed extension
+MAGIC_NUMBERS = {
+    'pdf': b'%PDF-',
+    'png': b'\x89PNG\r\n\x1a\n',
+    'jpg': b'\xff\xd8\xff',
+    'jpeg': b'\xff\xd8\xff',
+}
+
+# PDF readers accept the %PDF- header anywhere in the first 1 KiB
+SNIFF_BYTES = 1024
+
+
+class UploadRejected(Exception):
+    """Upload refused during ingestion (deliberately not a ValueError: Werkzeug would swallow it)"""
+
+    def __init__(self, message, status_code=400, reason='invalid'):
+        super().__init__(message)
+        self.status_code = status_code
+        self.reason = reason
+
+
+def _extension(filename):
+    return filename.rsplit('.', 1)[1].lower() if filename and '.' in filename else ''
+
+
+class _RequestBudget:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.used = 0
+
+    def consume(self, n):
+        self.used += n
+        if self.used > self.max_bytes:
+            raise UploadRejected(
+                f'Request exceeds {self.max_bytes // (1024 * 1024)}MB upload limit',
+                status_code=413, reason='request_too_large'
+            )
+
+
+class IngestFile:
+    """Writable/readable temp file that enforces limits, hashes and sniffs as it is written"""
+
+    def __init__(self, filename, budget, folder=None):
+        self.filename = filename or ''
+        self.extension = _extension(self.filename)
+        self.budget = budget
+        self.size = 0
+        self.sha256 = hashlib.sha256()
+        self._head = b''
+        self._sniffed = False
+        self._committed = False
+
+        folder = folder or Config.UPLOAD_FOLDER
+        self.temp_path = os.path.join(folder, f".ingest-{uuid.uuid4().hex}.part")
+        self._file = open(self.temp_path, 'w+b')
+
+    def write(self, data):
+        self.size += len(data)
+        self.budget.consume(len(data))
+        if self.size > Config.MAX_FILE_SIZE:
+            raise UploadRejected(
+                f'{self.filename} exceeds {Config.MAX_FILE_SIZE // (1024 * 1024)}MB file limit',
+                status_code=413, reason='file_too_large'
+            )
+
+        if not self._sniffed:
+            self._head += data[:SNIFF_BYTES]
+            self._sniff(final=False)
+
+        self.sha256.update(data)
+        return self._file.write(data)
+
+    def _sniff(self, final):
+        signature = MAGIC_NUMBERS.get(self.extension)
+        if signature is None:
+            raise UploadRejected(f'Unsupported file type: {self.filename}', status_code=415, reason='extension')
+
+        if self.extension == 'pdf':
+            if signature in self._head[:SNIFF_BYTES]:
+                self._sniffed = True
+            elif final or len(self._head) >= SNIFF_BYTES:
+                raise UploadRejected(f'{self.filename} is not a PDF', status_code=415, reason='magic_mismatch')
+        elif len(self._head) >= len(signature) or final:
+            if not self._head.startswith(signature):
+                raise UploadRejected(
+                    f'{self.filename} is not a {self.extension.upper()} image',
+                    status_code=415, reason='magic_mismatch'
+                )
+            self._sniffed = True
+
+    def commit(self, dest_path):
+        """Move the verified upload to dest_path and describe it"""
+        if not self._sniffed:
+            self._sniff(final=True)
+        self._file.flush()
+        self._file.close()
+        os.replace(self.temp_path, dest_path)
+        self._committed = True
+        return {
+            'path': dest_path,
+            'size': self.size,
+            'sha256': self.sha256.hexdigest(),
+            'kind': self.extension
+        }
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+        if not self._committed and os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+    # Werkzeug reads the part back through FileStorage.stream
+    def read(self, *args):
+        return self._file.read(*args)
+
+    def readline(self, *args):
+        return self._file.readline(*args)
+
+    def seek(self, *args):
+        return self._file.seek(*args)
+
+    def tell(self):
+        return self._file.tell()
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+
+class IngestRequest(Request):
+    """Flask request whose multipart file parts stream into IngestFile objects"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if not hasattr(self, '_ingest_budget'):
+            self._ingest_budget = _RequestBudget(Config.MAX_REQUEST_SIZE)
+            self._ingest_files = []
+
+        if _extension(filename) not in Config.ALLOWED_EXTENSIONS:
+            # Parts the routes ignore anyway: count them, keep nothing on disk
+            return _DiscardFile(self._ingest_budget)
+
+        ingest = IngestFile(filename, self._ingest_budget)
+        self._ingest_files.append(ingest)
+        return ingest
+
+    def close(self):
+        # A part rejected mid-parse never reaches request.files; drop its temp file too
+        super().close()
+        for ingest in getattr(self, '_ingest_files', ()):
+            ingest.close()
+
+
+class _DiscardFile(io.BytesIO):
+    def __init__(self, budget):
+        super().__init__()
+        self.budget = budget
+
+    def write(self, data):
+        self.budget.consume(len(data))
+        return len(data)
+
+
+def commit_upload(file_storage, dest_path):
+    """
+    Persist an uploaded part at dest_path.
+
+    Returns {'path', 'size', 'sha256', 'kind'}; raises UploadRejected.
+    Parts that did not come through IngestRequest (e.g. a plain Request)
+    are copied through an IngestFile in UPLOAD_CHUNK_SIZE chunks so the
+    same limits and checks apply.
+    """
+    stream = file_storage.stream
+    if isinstance(stream, IngestFile):
+        upload = stream.commit(dest_path)
+    else:
+        ingest = IngestFile(file_storage.filename, _RequestBudget(Config.MAX_REQUEST_SIZE),
+                            folder=os.path.dirname(dest_path) or '.')
+        try:
+            shutil.copyfileobj(stream, ingest, Config.UPLOAD_CHUNK_SIZE)
+            upload = ingest.commit(dest_path)
+        finally:
+            ingest.close()
+
+    increment("govdoc.upload.bytes", value=upload['size'], tags=[f"kind:{upload['kind']}"])
+    return upload
@@ -27,6 +27,83 @@ class ApiService {
     }
   }
 
+  /**
+   * Streaming variant of analyzeDocuments. Calls onEvent(event, data) for every
+   * stage event from /analyze/stream (upload_saved, document_extracted,
+   * evidence, document_processed, cross_validation, extracted, model_decision,
+   * gemini_advisory) and resolves with the final result payload.
+   */
+  async analyzeDocumentsStream(formData, onEvent = () => {}) {
+    const response = await fetch(`${this.baseURL}/analyze/stream`, {
+      method: 'POST',
+      body: formData,
+    });
+
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let result = null;
+
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary;
+      while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+        const frame = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+
+        let event = 'message';
+        let data = '';
+        for (const line of frame.split('\n')) {
+          if (line.startsWith('event: ')) event = line.slice(7);
+          else if (line.startsWith('data: ')) data += line.slice(6);
+        }
+        if (!data) continue; // keep-alive comment
+
+        const payload = JSON.parse(data);
+        onEvent(event, payload);
+        if (event === 'result') result = payload;
+        if (event === 'error') throw new Error(payload.error || 'Analysis failed');
+      }
+    }
+
+    return result;
+  }
+
+  async submitAnalysisJob(formData) {
+    try {
+      const response = await fetch(`${this.baseURL}/jobs`, {
+        method: 'POST',
+        body: formData,
+      });
+      
+      if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+      }
+      
+      return await response.json();
+    } catch (error) {
+      console.error('Job submission error:', error);
+      throw error;
+    }
+  }
+
+  async getAnalysisJob(jobId) {
+    try {
+      const response = await fetch(`${this.baseURL}/jobs/${jobId}`);
+      return await response.json();
+    } catch (error) {
+      console.error('Job status error:', error);
+      throw error;
+    }
+  }
+
   async getSystemStatus() {
     try {
       const response = await fetch(`${this.baseURL}/system-status`);